@@ -0,0 +1,89 @@
+import json
+import logging
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+
+from flask import g, has_request_context, request
+
+access_logger = logging.getLogger('access')
+
+# Attributs standards d'un LogRecord, exclus des champs JSON supplémentaires
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """Une ligne JSON par enregistrement, avec les champs passés via `extra`."""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class RequestIdFilter(logging.Filter):
+    """Ajoute l'identifiant de la requête HTTP en cours à chaque enregistrement."""
+
+    def filter(self, record):
+        if not hasattr(record, 'request_id') and has_request_context():
+            record.request_id = g.get('request_id')
+        return True
+
+
+def _configure_root_logger(level):
+    root = logging.getLogger()
+    root.setLevel(level)
+    # create_app peut être appelé plusieurs fois (tests) : un seul handler JSON
+    if any(getattr(handler, '_json_access_log', False) for handler in root.handlers):
+        return
+    handler = logging.StreamHandler()
+    handler.setFormatter(JsonFormatter())
+    handler.addFilter(RequestIdFilter())
+    handler._json_access_log = True
+    root.addHandler(handler)
+
+
+def init_access_log(app):
+    """Logs JSON structurés et journal d'accès échantillonné.
+
+    `LOG_LEVEL` règle le niveau global : les `logger.debug` des routes ne
+    coûtent rien au-delà d'un test de niveau quand DEBUG est désactivé.
+    `ACCESS_LOG_SAMPLE_RATE` (0 à 1) est la part des requêtes journalisées ;
+    les erreurs serveur (5xx) le sont toujours.
+    """
+    _configure_root_logger(app.config.get('LOG_LEVEL', 'INFO'))
+    sample_rate = app.config.get('ACCESS_LOG_SAMPLE_RATE', 1.0)
+
+    @app.before_request
+    def start_request():
+        g.request_id = request.headers.get('X-Request-ID') or uuid.uuid4().hex
+        g.request_started_at = time.perf_counter()
+
+    @app.after_request
+    def log_request(response):
+        response.headers['X-Request-ID'] = g.request_id
+        if response.status_code < 500 and random.random() >= sample_rate:
+            return response
+        if not access_logger.isEnabledFor(logging.INFO):
+            return response
+
+        access_logger.info('%s %s %s', request.method, request.path, response.status_code, extra={
+            'request_id': g.request_id,
+            'method': request.method,
+            'path': request.path,
+            'endpoint': request.endpoint,
+            'status': response.status_code,
+            'duration_ms': round((time.perf_counter() - g.request_started_at) * 1000, 2),
+            'remote_addr': request.remote_addr,
+        })
+        return response
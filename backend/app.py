@@ -2,40 +2,71 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 from config import Config
 from extensions import db, jwt
-import logging
+from pagination import PaginationError
+from access_log import init_access_log
+from metrics import init_metrics
+from response_cache import init_response_cache
+from passwords import HasherBusy, init_password_hasher
+from events import init_events
+from serializers import init_json
+import change_tracking  # Compteurs de version des tables (ETag, cache)
+import dashboard_stats  # Compteurs des tableaux de bord, recalculés à chaque écriture
+import os
+
+# Politique CORS de l'API, reprise par les vues asynchrones d'asgi.py
+CORS_RESOURCES = {
+    r"/api/*": {
+        "origins": ["http://localhost:3000"],
+        "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
+        "allow_headers": ["Content-Type", "Authorization"],
+        "supports_credentials": True
+    }
+}
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
     
-    # Configuration des logs
-    logging.basicConfig(level=logging.DEBUG)
+    # Encodeur JSON rapide (orjson) s'il est installé
+    init_json(app)
+    
+    # Logs JSON structurés et journal d'accès échantillonné
+    init_access_log(app)
     
     # Configuration CORS globale
-    CORS(app, resources={
-        r"/api/*": {
-            "origins": ["http://localhost:3000"],
-            "methods": ["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"],
-            "allow_headers": ["Content-Type", "Authorization"],
-            "supports_credentials": True
-        }
-    })
+    CORS(app, resources=CORS_RESOURCES)
     
     # Route racine pour vérifier que le serveur fonctionne
     @app.route('/')
     def index():
         return jsonify({"status": "ok", "message": "API is running"})
     
-    # Middleware pour logger les requêtes
-    @app.before_request
-    def log_request_info():
-        app.logger.debug('Headers: %s', request.headers)
-        app.logger.debug('Body: %s', request.get_data())
+    # Paramètres de pagination ou de filtre invalides
+    @app.errorhandler(PaginationError)
+    def handle_pagination_error(e):
+        return jsonify({'error': str(e)}), 400
+    
+    # Trop de connexions simultanées : le client réessaie plus tard
+    @app.errorhandler(HasherBusy)
+    def handle_hasher_busy(e):
+        return jsonify({'error': 'Serveur occupé, réessayez dans un instant'}), 503, {'Retry-After': '1'}
     
     # Initialisation des extensions
     db.init_app(app)
     jwt.init_app(app)
     
+    # Temps de réponse, nombre de requêtes SQL et temps base par requête
+    init_metrics(app)
+    
+    # Cache serveur des réponses de liste, invalidé à chaque commit
+    init_response_cache(app)
+    
+    # Pool borné pour le hachage des mots de passe
+    init_password_hasher(app)
+    
+    # Événements poussés aux clients (SSE), diffusés après chaque commit
+    init_events(app)
+    
     # Enregistrement des blueprints
     from routes.auth import auth_bp
     from routes.classrooms import classrooms_bp
@@ -43,6 +74,10 @@ def create_app():
     from routes.assignments import assignments_bp
     from routes.student_readings import student_readings_bp
     from routes.users import users_bp
+    from routes.metrics import metrics_bp
+    from routes.dashboard import dashboard_bp
+    from routes.events import events_bp
+    from routes.sync import sync_bp
     
     app.register_blueprint(auth_bp, url_prefix='/api')
     app.register_blueprint(classrooms_bp, url_prefix='/api')
@@ -50,9 +85,14 @@ def create_app():
     app.register_blueprint(assignments_bp, url_prefix='/api')
     app.register_blueprint(student_readings_bp, url_prefix='/api')
     app.register_blueprint(users_bp, url_prefix='/api')
+    app.register_blueprint(metrics_bp, url_prefix='/api')
+    app.register_blueprint(dashboard_bp, url_prefix='/api')
+    app.register_blueprint(events_bp, url_prefix='/api')
+    app.register_blueprint(sync_bp, url_prefix='/api')
     
     return app
 
+# Serveur de développement uniquement : en production, utiliser wsgi.py avec gunicorn
 if __name__ == '__main__':
     app = create_app()
-    app.run(debug=True, host='0.0.0.0')
\ No newline at end of file
+    app.run(debug=os.getenv('FLASK_DEBUG') == '1', host='0.0.0.0')
\ No newline at end of file
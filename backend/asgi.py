@@ -0,0 +1,262 @@
+"""Point d'entrée ASGI : uvicorn asgi:create_asgi_app --factory --workers 4
+
+Les listes les plus lues (`GET /api/student-readings`,
+`GET /api/users/<id>/submissions`, `GET /api/assignments`) sont servies par
+des vues asyncio sur le moteur asynchrone de SQLAlchemy (asyncpg en
+production) : une requête qui attend PostgreSQL n'occupe plus de thread.
+Toutes les autres routes sont transmises à l'application Flask via un
+adaptateur WSGI.
+
+Le flux d'événements `GET /api/events` (events.py) y est aussi servi en
+asyncio : un client connecté n'occupe pas de thread, contrairement au mode
+WSGI où leur nombre est limité par EVENTS_MAX_STREAMS.
+
+Les vues asynchrones reprennent les requêtes, filtres, pagination et formats
+(JSON, NDJSON en streaming) des vues Flask, mais ne passent pas par leurs
+hooks : ni journal d'accès, ni Server-Timing, ni ETag, ni cache serveur. La
+politique CORS de l'API (`CORS_RESOURCES`) leur est appliquée ici.
+"""
+import asyncio
+import logging
+import re
+from urllib.parse import parse_qsl
+
+import jwt
+from asgiref.wsgi import WsgiToAsgi
+from flask import current_app
+from flask_jwt_extended import decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from werkzeug.datastructures import MIMEAccept, MultiDict
+from werkzeug.http import parse_accept_header
+
+from app import CORS_RESOURCES, create_app
+from config import Config, async_database_url, async_engine_options
+from events import PING, AsyncSubscription, user_audience
+from models import ReadingAssignment, User
+from pagination import PaginationError, is_paginated, keyset, make_page, page_payload
+from queries import READING_ORDER, assignments, professor_readings, student_submissions
+from serializers import ASSIGNMENT, READING_FIELDS, SUBMISSION_FIELDS
+from streaming import NDJSON_MIMETYPE, wants_ndjson
+
+logger = logging.getLogger(__name__)
+
+CORS_POLICY = CORS_RESOURCES[r"/api/*"]
+
+
+class Request:
+    def __init__(self, scope, match, receive):
+        self.path = scope['path']
+        self.match = match
+        self.receive = receive
+        self.args = MultiDict(parse_qsl(scope.get('query_string', b'').decode('latin-1'), keep_blank_values=True))
+        self.headers = {name.decode('latin-1').lower(): value.decode('latin-1') for name, value in scope['headers']}
+        self.accept_mimetypes = parse_accept_header(self.headers.get('accept'), MIMEAccept)
+
+
+class HTTPError(Exception):
+    def __init__(self, status, payload):
+        self.status = status
+        self.payload = payload
+
+
+class AsyncApi:
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.engine = create_async_engine(async_database_url(Config), **async_engine_options(Config))
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        # (chemin, rôles autorisés ou None pour tout utilisateur connecté, vue)
+        self.routes = [
+            (re.compile(r'/api/student-readings'), ('professor',), self.all_readings),
+            (re.compile(r'/api/users/(\d+)/submissions'), ('professor',), self.student_submissions),
+            (re.compile(r'/api/assignments'), None, self.assignments),
+            (re.compile(r'/api/events'), None, self.events),
+        ]
+        # EventSource ne permet pas d'envoyer d'en-tête : jeton accepté dans ?jwt=
+        self.query_token_paths = {'/api/events'}
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        if scope['type'] == 'http' and scope['method'] == 'GET':
+            for pattern, roles, view in self.routes:
+                match = pattern.fullmatch(scope['path'])
+                if match:
+                    # Contexte d'application pour la configuration, le JSON et
+                    # les jetons ; chaque requête asyncio a sa propre copie
+                    with self.flask_app.app_context():
+                        return await self.dispatch(Request(scope, match, receive), roles, view, send)
+        await self.wsgi(scope, receive, send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.engine.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def dispatch(self, request, roles, view, send):
+        cors = cors_headers(request.headers.get('origin'))
+        started = False
+
+        async def send_response(message):
+            # En-têtes CORS ajoutés à toute réponse, erreurs comprises
+            nonlocal started
+            if message['type'] == 'http.response.start':
+                started = True
+                message = dict(message, headers=list(message['headers']) + cors)
+            await send(message)
+
+        try:
+            async with self.sessions() as session:
+                identity = await self.authenticate(session, request, roles)
+                await view(session, request, identity, send_response)
+            return
+        except HTTPError as e:
+            status, payload = e.status, e.payload
+        except PaginationError as e:
+            status, payload = 400, {'error': str(e)}
+        except Exception as e:
+            logger.exception("Erreur sur %s", request.path)
+            status, payload = 500, {'error': str(e)}
+        if started:
+            # En-têtes déjà envoyés (streaming) : on ne peut que clore le corps
+            await send_response({'type': 'http.response.body', 'body': b''})
+        else:
+            await self.send_json(send_response, status, payload)
+
+    async def authenticate(self, session, request, roles):
+        """Vérifie le jeton comme `jwt_required`/`role_required` et retourne l'identité."""
+        authorization = request.headers.get('authorization', '')
+        if authorization.startswith('Bearer '):
+            token = authorization[len('Bearer '):]
+        elif request.path in self.query_token_paths and current_app.config['JWT_QUERY_STRING_NAME'] in request.args:
+            token = request.args[current_app.config['JWT_QUERY_STRING_NAME']]
+        else:
+            raise HTTPError(401, {'msg': 'Missing Authorization Header'})
+        try:
+            claims = decode_token(token)
+        except jwt.ExpiredSignatureError:
+            raise HTTPError(401, {'msg': 'Token has expired'})
+        except (jwt.PyJWTError, JWTExtendedException) as e:
+            raise HTTPError(422, {'msg': str(e)})
+
+        identity = claims[current_app.config['JWT_IDENTITY_CLAIM']]
+        if roles is not None:
+            role = claims.get('role')
+            if role is None:
+                # Jeton émis avant l'ajout des claims : lecture en base
+                user = await session.get(User, int(identity))
+                role = user.role if user else None
+            if role not in roles:
+                raise HTTPError(403, {'error': 'Accès non autorisé'})
+        return identity
+
+    async def all_readings(self, session, request, identity, send):
+        selection = READING_FIELDS.select(request.args)
+        query = professor_readings(int(identity), request.args, selection)
+        await self.send_list(session, request, send, query, READING_ORDER, selection.serialize)
+
+    async def student_submissions(self, session, request, identity, send):
+        student_id = int(request.match.group(1))
+        student = await session.get(User, student_id)
+        if not student or student.role != 'student':
+            raise HTTPError(404, {'error': 'Étudiant non trouvé'})
+        selection = SUBMISSION_FIELDS.select(request.args)
+        query = student_submissions(student_id, request.args, selection)
+        await self.send_list(session, request, send, query, READING_ORDER, selection.serialize)
+
+    async def assignments(self, session, request, identity, send):
+        query = assignments(request.args)
+        await self.send_list(session, request, send, query, (ReadingAssignment.id,), ASSIGNMENT,
+                             stream=False)
+
+    async def events(self, session, request, identity, send):
+        broker = current_app.extensions['events']
+        heartbeat = current_app.config.get('EVENTS_HEARTBEAT', 15)
+        audiences = [user_audience(identity)]
+        subscription = broker.subscribe(audiences, AsyncSubscription(audiences, broker.max_queue))
+        disconnected = asyncio.ensure_future(self.wait_disconnect(request.receive))
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': 200,
+                'headers': [(b'content-type', b'text/event-stream'), (b'cache-control', b'no-cache'),
+                            (b'x-accel-buffering', b'no')],
+            })
+            await send({'type': 'http.response.body', 'body': b'retry: 5000\n\n', 'more_body': True})
+            while not subscription.lagging and not disconnected.done():
+                message = await subscription.get(heartbeat)
+                await send({'type': 'http.response.body', 'body': (message or PING).encode(), 'more_body': True})
+            if not disconnected.done():
+                await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            disconnected.cancel()
+            broker.unsubscribe(subscription)
+
+    @staticmethod
+    async def wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    async def send_list(self, session, request, send, query, columns, serialize, stream=True):
+        """Page demandée, ou liste complète envoyée en streaming comme streaming.py."""
+        if stream and not is_paginated(request.args):
+            return await self.send_stream(session, request, send, query.order_by(*columns), serialize)
+        query, limit = keyset(query, columns, request.args)
+        rows = (await session.scalars(query.statement)).all()
+        await self.send_json(send, 200, page_payload(make_page(rows, columns, limit), serialize))
+
+    async def send_stream(self, session, request, send, query, serialize):
+        batch_size = current_app.config.get('STREAM_BATCH_SIZE', 500)
+        dumps = current_app.json.dumps
+        # La requête est exécutée avant l'envoi des en-têtes, comme en WSGI
+        rows = await session.stream_scalars(query.statement.execution_options(yield_per=batch_size))
+        ndjson = wants_ndjson(request.accept_mimetypes)
+
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [(b'content-type', NDJSON_MIMETYPE.encode() if ndjson else b'application/json')],
+        })
+        separator = '' if ndjson else '['
+        async for partition in rows.partitions():
+            chunk = []
+            for row in partition:
+                if ndjson:
+                    chunk.append(dumps(serialize(row)) + '\n')
+                else:
+                    chunk.append(separator + dumps(serialize(row)))
+                    separator = ','
+            await send({'type': 'http.response.body', 'body': ''.join(chunk).encode(), 'more_body': True})
+        closing = '' if ndjson else ('[]' if separator == '[' else ']')
+        await send({'type': 'http.response.body', 'body': closing.encode()})
+
+    async def send_json(self, send, status, payload):
+        body = current_app.json.dumps(payload).encode()
+        await send({
+            'type': 'http.response.start',
+            'status': status,
+            'headers': [(b'content-type', b'application/json'), (b'content-length', str(len(body)).encode())],
+        })
+        await send({'type': 'http.response.body', 'body': body})
+
+
+def cors_headers(origin):
+    """En-têtes CORS de la réponse, comme les pose Flask-CORS pour une origine autorisée."""
+    if origin not in CORS_POLICY['origins']:
+        return []
+    headers = [(b'access-control-allow-origin', origin.encode('latin-1')), (b'vary', b'Origin')]
+    if CORS_POLICY.get('supports_credentials'):
+        headers.append((b'access-control-allow-credentials', b'true'))
+    return headers
+
+
+def create_asgi_app():
+    """Application ASGI, construite au démarrage du worker et non à l'import
+    du module : uvicorn asgi:create_asgi_app --factory"""
+    return AsyncApi(create_app())
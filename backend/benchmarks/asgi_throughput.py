@@ -0,0 +1,93 @@
+"""Compare le débit du mode WSGI à threads (gunicorn) et du mode asyncio (uvicorn).
+
+Lance successivement `gunicorn -c gunicorn.conf.py wsgi:app` puis
+`uvicorn asgi:create_asgi_app --factory` avec le même nombre de workers, et
+envoie des requêtes authentifiées concurrentes sur une liste servie par les
+vues asynchrones.
+
+    DATABASE_URL=postgresql://... python benchmarks/asgi_throughput.py --concurrency 200
+
+L'intérêt du mode asyncio est de garder beaucoup de connexions en attente de
+PostgreSQL sans un thread par requête : à mesurer sur PostgreSQL, avec une
+concurrence supérieure à WEB_WORKERS * WEB_THREADS. Sans DATABASE_URL, une
+base SQLite temporaire est utilisée (aiosqlite passe par un thread : les
+chiffres ne sont alors qu'indicatifs).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from wsgi_throughput import BACKEND_DIR, benchmark
+
+
+def seed_readings(env, count):
+    """Crée un professeur et `count` résumés, puis affiche un jeton du professeur."""
+    script = (
+        'from flask_jwt_extended import create_access_token\n'
+        'from app import create_app\n'
+        'from decorators import user_claims\n'
+        'from extensions import db\n'
+        'from models import User, Classroom, Book, ReadingAssignment, StudentReading\n'
+        'app = create_app()\n'
+        'with app.app_context():\n'
+        '    db.create_all()\n'
+        '    professor = User.query.filter_by(email="bench-prof@test.com").first()\n'
+        '    if professor is None:\n'
+        '        professor = User(email="bench-prof@test.com", password="x", role="professor",\n'
+        '                         first_name="Bench", last_name="Prof")\n'
+        '        student = User(email="bench-student@test.com", password="x", role="student",\n'
+        '                       first_name="Bench", last_name="Student")\n'
+        '        db.session.add_all([professor, student])\n'
+        '        db.session.flush()\n'
+        '        classroom = Classroom(name="Bench", professor_id=professor.id)\n'
+        '        book = Book(title="Bench", author="Bench")\n'
+        '        db.session.add_all([classroom, book])\n'
+        '        db.session.flush()\n'
+        '        assignment = ReadingAssignment(book_id=book.id, classroom_id=classroom.id)\n'
+        '        db.session.add(assignment)\n'
+        '        db.session.flush()\n'
+        f'        db.session.add_all([StudentReading(user_id=student.id, assignment_id=assignment.id,\n'
+        f'                                           summary=f"Résumé {{i}}") for i in range({count})])\n'
+        '        db.session.commit()\n'
+        '    print(create_access_token(identity=str(professor.id), additional_claims=user_claims(professor)))\n'
+    )
+    output = subprocess.run([sys.executable, '-c', script], cwd=BACKEND_DIR, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    return output.strip().splitlines()[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--path', default='/api/student-readings?limit=50')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--readings', type=int, default=500)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--port', type=int, default=5099)
+    args = parser.parse_args()
+
+    env = dict(os.environ, WEB_WORKERS=str(args.workers), LOG_LEVEL='WARNING')
+    if 'DATABASE_URL' not in env:
+        database = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+        env['DATABASE_URL'] = f'sqlite:///{database}'
+    token = seed_readings(env, args.readings)
+    headers = {'Authorization': f'Bearer {token}'}
+
+    results = [
+        benchmark('gunicorn gthread (WSGI)',
+                  [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                  args.port, dict(env, BIND=f'127.0.0.1:{args.port}'), args, headers),
+        benchmark('uvicorn (ASGI)',
+                  [sys.executable, '-m', 'uvicorn', 'asgi:create_asgi_app', '--factory',
+                   '--host', '127.0.0.1', '--port', str(args.port), '--workers', str(args.workers),
+                   '--no-access-log'],
+                  args.port, env, args, headers),
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
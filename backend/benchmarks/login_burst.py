@@ -0,0 +1,150 @@
+"""Mesure les connexions simultanées d'une classe entière (début de cours).
+
+Crée `--students` élèves, démarre gunicorn puis envoie une connexion par élève,
+toutes en même temps, pendant qu'un client sonde `GET /api/books` pour mesurer
+l'effet du hachage sur les autres routes. Deux réglages sont comparés : pool de
+hachage aussi large que les threads de requête et file illimitée (équivalent à
+un hachage dans le thread de requête), puis la configuration courante.
+
+    python benchmarks/login_burst.py --students 500
+
+Les 503 sont comptés à part : le client les réessaie après Retry-After.
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from wsgi_throughput import BACKEND_DIR, seed_books, wait_until_ready
+
+
+def seed_students(env, count):
+    script = (
+        'from app import create_app\n'
+        'from extensions import db\n'
+        'from models import User\n'
+        'from passwords import password_hasher\n'
+        'app = create_app()\n'
+        'with app.app_context():\n'
+        '    db.create_all()\n'
+        '    if not User.query.filter_by(role="student").first():\n'
+        '        # Un seul calcul : le même hash sert à tous les élèves\n'
+        '        password = password_hasher().hash("eleve123")\n'
+        f'        db.session.add_all([User(email=f"eleve{{i}}@bench.com", password=password, role="student",\n'
+        f'                                 first_name="Eleve", last_name=str(i)) for i in range({count})])\n'
+        '        db.session.commit()\n'
+    )
+    subprocess.run([sys.executable, '-c', script], cwd=BACKEND_DIR, env=env, check=True)
+
+
+def quantiles(values):
+    values = sorted(values)
+    if not values:
+        return None
+    quantile = lambda q: round(values[min(len(values) - 1, int(q * len(values)))] * 1000, 2)
+    return {'mean': round(statistics.mean(values) * 1000, 2), 'p50': quantile(0.5),
+            'p95': quantile(0.95), 'p99': quantile(0.99)}
+
+
+def burst(port, students):
+    latencies, probe = [], []
+    rejected = [0]
+    lock = threading.Lock()
+    done = threading.Event()
+    start_gate = threading.Barrier(students + 1)
+
+    def login(i):
+        body = json.dumps({'email': f'eleve{i}@bench.com', 'password': 'eleve123'})
+        start_gate.wait()
+        start = time.perf_counter()
+        while True:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+            conn.request('POST', '/api/auth/login', body=body, headers={'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            conn.close()
+            if response.status != 503:
+                break
+            with lock:
+                rejected[0] += 1
+            time.sleep(float(response.getheader('Retry-After', 1)))
+        with lock:
+            latencies.append(time.perf_counter() - start)
+
+    def sample_books():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+        while not done.is_set():
+            start = time.perf_counter()
+            conn.request('GET', '/api/books?limit=20')
+            conn.getresponse().read()
+            probe.append(time.perf_counter() - start)
+            time.sleep(0.05)
+
+    threads = [threading.Thread(target=login, args=(i,)) for i in range(students)]
+    for thread in threads:
+        thread.start()
+    prober = threading.Thread(target=sample_books)
+    prober.start()
+    began = time.perf_counter()
+    start_gate.wait()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+    done.set()
+    prober.join()
+
+    return {
+        'logins': len(latencies),
+        'rejected_503': rejected[0],
+        'seconds': round(elapsed, 2),
+        'logins_per_second': round(len(latencies) / elapsed, 1),
+        'login_latency_ms': quantiles(latencies),
+        'books_latency_ms': quantiles(probe),
+    }
+
+
+def run(name, env, port, students):
+    process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                               cwd=BACKEND_DIR, env=dict(env, BIND=f'127.0.0.1:{port}'),
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_ready(port)
+        result = burst(port, students)
+    finally:
+        process.terminate()
+        process.wait()
+    result['config'] = name
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=500)
+    parser.add_argument('--port', type=int, default=5099)
+    args = parser.parse_args()
+
+    env = dict(os.environ, LOG_LEVEL='WARNING')
+    if 'DATABASE_URL' not in env:
+        database = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+        env['DATABASE_URL'] = f'sqlite:///{database}'
+    seed_books(env, 200)
+    seed_students(env, args.students)
+
+    threads = env.get('WEB_THREADS', '4')
+    results = [
+        run('hachage dans les threads de requête',
+            dict(env, PASSWORD_HASH_WORKERS=threads, PASSWORD_HASH_QUEUE=str(args.students)),
+            args.port, args.students),
+        run('pool borné (configuration courante)', env, args.port, args.students),
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
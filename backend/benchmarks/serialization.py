@@ -0,0 +1,106 @@
+"""Compare la sérialisation de résumés avant et après serializers.py.
+
+Construit `--readings` résumés en mémoire (sans base) avec leur étudiant, leur
+devoir, leur livre et leur classe, puis mesure dictionnaires + encodage JSON :
+
+- avant : dictionnaires construits à la main, encodeur JSON de Flask ;
+- sérialiseur compilé seul, puis avec orjson (si installé).
+
+    python benchmarks/serialization.py --readings 10000
+"""
+import argparse
+import os
+import sys
+import timeit
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DATABASE_URL', 'sqlite:///:memory:')
+
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from app import create_app  # noqa: E402
+from models import Book, Classroom, ReadingAssignment, StudentReading, User  # noqa: E402
+from serializers import READING, OrjsonProvider  # noqa: E402
+
+
+def handwritten(r):
+    # Version d'origine de la vue GET /student-readings
+    student = r.student
+    assignment = r.assignment
+    book = assignment.book if assignment else None
+    classroom = assignment.classroom if assignment else None
+
+    return {
+        'id': r.id,
+        'assignment_id': r.assignment_id,
+        'user_id': r.user_id,
+        'summary': r.summary,
+        'status': r.status,
+        'submitted_at': r.submitted_at.isoformat(),
+        'validated_at': r.validated_at.isoformat() if r.validated_at else None,
+        'student': {
+            'id': student.id,
+            'first_name': student.first_name,
+            'last_name': student.last_name
+        } if student else None,
+        'assignment': {
+            'id': assignment.id,
+            'book': {
+                'id': book.id,
+                'title': book.title,
+                'author': book.author
+            } if book else None,
+            'classroom': {
+                'id': classroom.id,
+                'name': classroom.name
+            } if classroom else None
+        } if assignment else None
+    }
+
+
+def build_readings(count):
+    books = [Book(id=i, title=f'Livre {i}', author='Auteur') for i in range(20)]
+    classrooms = [Classroom(id=i, name=f'Classe {i}') for i in range(5)]
+    assignments = [ReadingAssignment(id=i, book=books[i % 20], classroom=classrooms[i % 5]) for i in range(50)]
+    students = [User(id=i, first_name=f'Élève {i}', last_name='Nom', email=f'e{i}@test.com', role='student')
+                for i in range(150)]
+    return [
+        StudentReading(id=i, user_id=i % 150, assignment_id=i % 50, summary='Résumé du livre. ' * 20,
+                       status='valide' if i % 3 else 'en_attente', submitted_at=datetime(2024, 1, 1, 8, i % 60),
+                       validated_at=datetime(2024, 1, 2) if i % 3 else None,
+                       student=students[i % 150], assignment=assignments[i % 50])
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--readings', type=int, default=10000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    readings = build_readings(args.readings)
+    default = DefaultJSONProvider(app)
+    cases = [
+        ('avant : dictionnaires à la main + json', lambda: default.dumps([handwritten(r) for r in readings])),
+        ('sérialiseur compilé + json', lambda: default.dumps([READING(r) for r in readings])),
+    ]
+    try:
+        import orjson  # noqa: F401
+        fast = OrjsonProvider(app)
+        cases.append(('sérialiseur compilé + orjson', lambda: fast.dumps([READING(r) for r in readings])))
+    except ImportError:
+        print('orjson non installé : cas ignoré')
+
+    assert default.dumps([handwritten(r) for r in readings]) == default.dumps([READING(r) for r in readings])
+    baseline = None
+    for name, run in cases:
+        best = min(timeit.repeat(run, number=1, repeat=args.repeat))
+        baseline = baseline or best
+        print(f'{name:42} {best * 1000:8.1f} ms  x{baseline / best:.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,322 @@
+"""Charge mixte sur l'API avec un jeu de données synthétique.
+
+Remplit la base (init_db.seed_dataset), démarre gunicorn puis enchaîne :
+
+1. une rafale de connexions (`--burst` élèves en même temps, début de cours) ;
+2. une charge mixte pendant `--duration` secondes : dépôts de résumés,
+   corrections groupées, tableaux de bord et listes, selon `--mix`.
+
+Pour chaque endpoint : requêtes, erreurs, débit, latences p50/p95/p99 et
+nombre de requêtes SQL (lu dans l'en-tête Server-Timing), en JSON.
+
+    python benchmarks/workload.py --students 30 --duration 20 --output run.json
+    python benchmarks/workload.py --baseline run.json   # compare à un run précédent
+
+Avec `--url`, la charge vise un serveur déjà démarré ; DATABASE_URL doit
+alors désigner sa base pour que le jeu de données y soit créé.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+from wsgi_throughput import BACKEND_DIR, wait_until_ready
+
+QUERIES = re.compile(r'desc="(\d+) queries"')
+DEFAULT_MIX = 'submit=3,grade=1,dashboard=2,list=2,me=2'
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def record(self, name, latency, status, queries):
+        with self.lock:
+            self.samples.setdefault(name, []).append((latency, status, queries))
+
+    def report(self, duration):
+        endpoints = {}
+        for name, samples in sorted(self.samples.items()):
+            ok = sorted(latency for latency, status, _ in samples if status < 400)
+            queries = [q for _, status, q in samples if status < 400 and q is not None]
+            quantile = lambda q: round(ok[min(len(ok) - 1, int(q * len(ok)))] * 1000, 2) if ok else None
+            endpoints[name] = {
+                'requests': len(samples),
+                'errors': len(samples) - len(ok),
+                'statuses': {str(s): sum(1 for _, status, _ in samples if status == s)
+                             for s in sorted({status for _, status, _ in samples})},
+                'requests_per_second': round(len(ok) / duration, 2),
+                'latency_ms': {
+                    'mean': round(statistics.mean(ok) * 1000, 2) if ok else None,
+                    'p50': quantile(0.50),
+                    'p95': quantile(0.95),
+                    'p99': quantile(0.99),
+                },
+                'sql_queries': {
+                    'mean': round(statistics.mean(queries), 2) if queries else None,
+                    'max': max(queries) if queries else None,
+                },
+            }
+        return endpoints
+
+
+class Client:
+    """Connexion HTTP persistante d'un utilisateur virtuel."""
+
+    def __init__(self, host, port, recorder):
+        self.host, self.port, self.recorder = host, port, recorder
+        self.conn = http.client.HTTPConnection(host, port, timeout=60)
+
+    def call(self, name, method, path, token=None, body=None):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        payload = json.dumps(body) if body is not None else None
+        start = time.perf_counter()
+        try:
+            self.conn.request(method, path, body=payload, headers=headers)
+            response = self.conn.getresponse()
+            data = response.read()
+            status = response.status
+        except (OSError, http.client.HTTPException):
+            self.conn.close()
+            self.conn = http.client.HTTPConnection(self.host, self.port, timeout=60)
+            data, status, response = b'', 599, None
+        latency = time.perf_counter() - start
+        match = QUERIES.search(response.getheader('Server-Timing', '') if response else '')
+        self.recorder.record(name, latency, status, int(match.group(1)) if match else None)
+        return status, json.loads(data) if data and status < 500 else None
+
+
+def login(client, email, password):
+    # 503 : le pool de hachage est plein, nouvel essai après Retry-After
+    for _ in range(20):
+        status, data = client.call('POST /api/auth/login', 'POST', '/api/auth/login',
+                                   body={'email': email, 'password': password})
+        if status != 503:
+            return data['access_token'] if status == 200 else None
+        time.sleep(1)
+    return None
+
+
+def login_burst(host, port, recorder, users, password):
+    """Connexion simultanée de tous `users` ; retourne {email: jeton}."""
+    tokens = {}
+    gate = threading.Barrier(len(users))
+
+    def run(user):
+        client = Client(host, port, recorder)
+        gate.wait()
+        tokens[user['email']] = login(client, user['email'], password)
+
+    threads = [threading.Thread(target=run, args=(user,)) for user in users]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {email: token for email, token in tokens.items() if token}, time.perf_counter() - started
+
+
+# Scénarios : une ou deux requêtes d'un utilisateur virtuel
+
+def submit(client, rng, students, professors):
+    student, token = rng.choice(students)
+    client.call('POST /api/student-readings', 'POST', '/api/student-readings', token, {
+        'assignment_id': rng.choice(student['assignments']),
+        'summary': 'Résumé déposé pendant le benchmark. ' * rng.randrange(5, 30)
+    })
+
+
+def grade(client, rng, students, professors):
+    _, token = rng.choice(professors)
+    status, data = client.call('GET /api/student-readings?status=en_attente', 'GET',
+                               '/api/student-readings?status=en_attente&limit=20&fields=id', token)
+    if status == 200 and data['items']:
+        client.call('PATCH /api/student-readings', 'PATCH', '/api/student-readings', token, {
+            'readings': [{'id': item['id'], 'status': rng.choice(('valide', 'refuse'))} for item in data['items']]
+        })
+
+
+def dashboard(client, rng, students, professors):
+    professor, token = rng.choice(professors)
+    client.call('GET /api/dashboard/summary', 'GET', '/api/dashboard/summary', token)
+    client.call('GET /api/classrooms/<id>/stats', 'GET',
+                f"/api/classrooms/{rng.choice(professor['classrooms'])}/stats", token)
+
+
+def professor_list(client, rng, students, professors):
+    _, token = rng.choice(professors)
+    client.call('GET /api/student-readings', 'GET', '/api/student-readings?limit=50', token)
+
+
+def student_list(client, rng, students, professors):
+    _, token = rng.choice(students)
+    client.call('GET /api/student-readings/me', 'GET', '/api/student-readings/me?limit=20', token)
+
+
+def sync(client, rng, students, professors):
+    # Tableau de bord tenu à jour par /api/sync au lieu de relire la liste
+    professor, token = rng.choice(professors)
+    since = professor.get('sync_cursor')
+    status, data = client.call('GET /api/sync', 'GET', f'/api/sync?since={since}' if since else '/api/sync', token)
+    if status == 200:
+        professor['sync_cursor'] = data['cursor']
+
+
+SCENARIOS = {'submit': submit, 'grade': grade, 'dashboard': dashboard, 'list': professor_list, 'me': student_list,
+             'sync': sync}
+
+
+def parse_mix(mix):
+    weights = {}
+    for item in mix.split(','):
+        name, _, weight = item.partition('=')
+        if name not in SCENARIOS:
+            raise SystemExit(f"Scénario inconnu : {name} (attendu parmi {', '.join(SCENARIOS)})")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+def mixed_load(host, port, recorder, weights, students, professors, concurrency, duration, seed):
+    stop_at = time.monotonic() + duration
+    names, values = list(weights), list(weights.values())
+
+    def worker(index):
+        rng = random.Random(seed * 1000 + index)
+        client = Client(host, port, recorder)
+        while time.monotonic() < stop_at:
+            SCENARIOS[rng.choices(names, values)[0]](client, rng, students, professors)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def populate(args):
+    sys.path.insert(0, BACKEND_DIR)
+    from app import create_app
+    from init_db import seed_dataset
+    from extensions import db
+
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        started = time.perf_counter()
+        manifest = seed_dataset(professors=args.professors, classrooms=args.classrooms, students=args.students,
+                            books=args.books, assignments=args.assignments,
+                            reading_ratio=args.reading_ratio, seed=args.seed)
+        manifest['seconds'] = round(time.perf_counter() - started, 2)
+    return manifest
+
+
+def compare(report, baseline):
+    """p95 et débit par endpoint, rapportés au run de référence."""
+    comparison = {}
+    for name, current in report['endpoints'].items():
+        previous = baseline.get('endpoints', {}).get(name)
+        if not previous or not previous['latency_ms']['p95'] or not current['latency_ms']['p95']:
+            continue
+        comparison[name] = {
+            'p95_ratio': round(current['latency_ms']['p95'] / previous['latency_ms']['p95'], 2),
+            'throughput_ratio': round(current['requests_per_second'] / previous['requests_per_second'], 2)
+            if previous['requests_per_second'] else None,
+            'sql_queries_delta': round((current['sql_queries']['mean'] or 0) - (previous['sql_queries']['mean'] or 0), 2),
+        }
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--professors', type=int, default=5)
+    parser.add_argument('--classrooms', type=int, default=4, help='Classes par professeur')
+    parser.add_argument('--students', type=int, default=30, help='Élèves par classe')
+    parser.add_argument('--books', type=int, default=200)
+    parser.add_argument('--assignments', type=int, default=5, help='Devoirs par classe')
+    parser.add_argument('--reading-ratio', type=float, default=0.6)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--burst', type=int, default=100, help='Élèves connectés en même temps')
+    parser.add_argument('--mix', default=DEFAULT_MIX)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=20)
+    parser.add_argument('--url', help='Serveur déjà démarré (sinon gunicorn est lancé)')
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--output', help='Fichier JSON du rapport (sinon sortie standard)')
+    parser.add_argument('--baseline', help='Rapport précédent à comparer')
+    args = parser.parse_args()
+    weights = parse_mix(args.mix)
+
+    if 'DATABASE_URL' not in os.environ:
+        database = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+        os.environ['DATABASE_URL'] = f'sqlite:///{database}'
+    os.environ.setdefault('LOG_LEVEL', 'WARNING')
+    manifest = populate(args)
+
+    process = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+    else:
+        host, port = '127.0.0.1', args.port
+        process = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                                   cwd=BACKEND_DIR, env=dict(os.environ, BIND=f'{host}:{port}'),
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_ready(port) if process else None
+        rng = random.Random(args.seed)
+        password = manifest['password']
+
+        burst_recorder = Recorder()
+        burst_users = rng.sample(manifest['students'], min(args.burst, len(manifest['students'])))
+        tokens, burst_seconds = login_burst(host, port, burst_recorder, burst_users, password)
+        professor_tokens, _ = login_burst(host, port, Recorder(), manifest['professors'], password)
+
+        students = [(s, tokens[s['email']]) for s in burst_users if s['email'] in tokens]
+        professors = [(p, professor_tokens[p['email']]) for p in manifest['professors'] if p['email'] in professor_tokens]
+        if not students or not professors:
+            raise SystemExit('Aucune connexion réussie : serveur ou base inaccessibles')
+
+        recorder = Recorder()
+        mixed_load(host, port, recorder, weights, students, professors, args.concurrency, args.duration, args.seed)
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    report = {
+        'dataset': dict(manifest['counts'], seconds=manifest['seconds']),
+        'config': {
+            'mix': weights, 'concurrency': args.concurrency, 'duration': args.duration, 'seed': args.seed,
+            'database': os.environ['DATABASE_URL'].split('://', 1)[0],
+            'web_workers': os.environ.get('WEB_WORKERS'), 'web_threads': os.environ.get('WEB_THREADS'),
+        },
+        'login_burst': dict(burst_recorder.report(burst_seconds)['POST /api/auth/login'],
+                            users=len(burst_users), seconds=round(burst_seconds, 2)),
+        'endpoints': recorder.report(args.duration),
+    }
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['comparison'] = compare(report, json.load(f))
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""Compare le débit du serveur de développement Flask et de gunicorn.
+
+Lance successivement `flask run` puis `gunicorn -c gunicorn.conf.py wsgi:app`
+sur la même base, envoie des requêtes GET concurrentes pendant une durée fixe
+et affiche le nombre de requêtes par seconde et les latences.
+
+    python benchmarks/wsgi_throughput.py --concurrency 32 --duration 10
+
+Sans DATABASE_URL, une base SQLite temporaire est créée et remplie de livres.
+"""
+import argparse
+import http.client
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def seed_books(env, count):
+    script = (
+        'from app import create_app\n'
+        'from extensions import db\n'
+        'from models import Book\n'
+        'app = create_app()\n'
+        'with app.app_context():\n'
+        '    db.create_all()\n'
+        '    if not Book.query.first():\n'
+        f'        db.session.add_all([Book(title=f"Livre {{i}}", author="Auteur") for i in range({count})])\n'
+        '        db.session.commit()\n'
+    )
+    subprocess.run([sys.executable, '-c', script], cwd=BACKEND_DIR, env=env, check=True)
+
+
+def wait_until_ready(port, timeout=20):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            conn.request('GET', '/')
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f'Le serveur ne répond pas sur le port {port}')
+
+
+def run_load(port, path, concurrency, duration, headers=None):
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def worker():
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        local = []
+        while time.monotonic() < stop_at:
+            start = time.perf_counter()
+            try:
+                conn.request('GET', path, headers=headers or {})
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    raise http.client.HTTPException(response.status)
+                local.append(time.perf_counter() - start)
+            except (OSError, http.client.HTTPException):
+                with lock:
+                    errors[0] += 1
+                conn.close()
+                conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    latencies.sort()
+    quantile = lambda q: round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 2) if latencies else None
+    return {
+        'requests': len(latencies),
+        'errors': errors[0],
+        'requests_per_second': round(len(latencies) / duration, 1),
+        'latency_ms': {
+            'mean': round(statistics.mean(latencies) * 1000, 2) if latencies else None,
+            'p50': quantile(0.50),
+            'p95': quantile(0.95),
+            'p99': quantile(0.99),
+        },
+    }
+
+
+def benchmark(name, command, port, env, args, headers=None):
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_until_ready(port)
+        result = run_load(port, args.path, args.concurrency, args.duration, headers)
+    finally:
+        process.terminate()
+        process.wait()
+    result['server'] = name
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--path', default='/api/books?limit=50')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--books', type=int, default=500)
+    parser.add_argument('--port', type=int, default=5099)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    if 'DATABASE_URL' not in env:
+        database = os.path.join(tempfile.mkdtemp(), 'bench.sqlite3')
+        env['DATABASE_URL'] = f'sqlite:///{database}'
+    seed_books(env, args.books)
+
+    results = [
+        benchmark('flask run', [sys.executable, '-m', 'flask', '--app', 'wsgi', 'run',
+                                '--port', str(args.port)], args.port, env, args),
+        benchmark('gunicorn', [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                  args.port, dict(env, BIND=f'127.0.0.1:{args.port}'), args),
+    ]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+import codecs
+import csv
+import json
+from datetime import datetime
+from itertools import islice
+
+from sqlalchemy import insert, select, tuple_
+
+from change_tracking import touch_tables
+from extensions import db
+from models import Book
+
+FORMATS = ('csv', 'jsonl')
+
+_TITLE_MAX = Book.__table__.c.title.type.length
+_AUTHOR_MAX = Book.__table__.c.author.type.length
+
+
+class BookImportError(ValueError):
+    """Fichier d'import illisible (format inconnu, en-tête CSV incomplet)."""
+
+
+def guess_format(filename=None, mimetype=None):
+    """Format déduit du type MIME ou de l'extension du fichier, ou None."""
+    if mimetype in ('text/csv', 'application/csv'):
+        return 'csv'
+    if mimetype in ('application/x-ndjson', 'application/jsonl', 'application/x-jsonlines'):
+        return 'jsonl'
+    if filename:
+        extension = filename.rsplit('.', 1)[-1].lower()
+        if extension == 'csv':
+            return 'csv'
+        if extension in ('jsonl', 'ndjson'):
+            return 'jsonl'
+    return None
+
+
+def _text_lines(stream):
+    # Lecture ligne à ligne d'un flux binaire : rien n'est chargé en entier
+    return codecs.iterdecode(iter(stream.readline, b''), 'utf-8-sig')
+
+
+def _csv_rows(stream):
+    reader = csv.DictReader(_text_lines(stream))
+    if reader.fieldnames is None or not {'title', 'author'} <= set(reader.fieldnames):
+        raise BookImportError("L'en-tête CSV doit contenir les colonnes title et author")
+    for row in reader:
+        yield reader.line_num, row
+
+
+def _jsonl_rows(stream):
+    for line_number, line in enumerate(_text_lines(stream), start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield line_number, None
+            continue
+        yield line_number, row
+
+
+def _validate(row):
+    """Ligne prête à insérer, ou message d'erreur."""
+    if not isinstance(row, dict):
+        return None, 'Ligne JSON invalide'
+    title = row.get('title')
+    author = row.get('author')
+    if not isinstance(title, str) or not title.strip() or not isinstance(author, str) or not author.strip():
+        return None, 'title et author sont requis'
+    title, author = title.strip(), author.strip()
+    if len(title) > _TITLE_MAX or len(author) > _AUTHOR_MAX:
+        return None, f'title et author sont limités à {_TITLE_MAX} caractères'
+
+    published_at = row.get('published_at') or None
+    if published_at is not None:
+        try:
+            published_at = datetime.strptime(published_at, '%Y-%m-%d')
+        except (TypeError, ValueError):
+            return None, 'Invalid date format, expected YYYY-MM-DD'
+    return {'title': title, 'author': author, 'published_at': published_at}, None
+
+
+def _insert_batch(rows):
+    """Insère un lot en ignorant les couples (title, author) déjà connus."""
+    unique = {}
+    for row in rows:
+        unique.setdefault((row['title'], row['author']), row)
+
+    existing = set(db.session.execute(
+        select(Book.title, Book.author).where(tuple_(Book.title, Book.author).in_(list(unique)))
+    ).all())
+    new_rows = [row for key, row in unique.items() if key not in existing]
+    if new_rows:
+        # Une seule instruction executemany (INSERT multi-lignes) pour le lot
+        db.session.execute(insert(Book), new_rows)
+        touch_tables(db.session, 'book')
+    db.session.commit()
+    return len(new_rows)
+
+
+def import_books(stream, fmt, batch_size=1000):
+    """Importe des livres depuis un flux binaire CSV ou JSON Lines.
+
+    Les lignes sont lues, validées et insérées par lots de `batch_size`,
+    chaque lot dans sa propre transaction : la mémoire utilisée ne dépend
+    pas de la taille du fichier. Les doublons (title, author), dans le
+    fichier ou déjà en base, sont ignorés.
+
+    Génère après chaque lot un état cumulé (`processed`, `inserted`,
+    `duplicates`, `failed`) avec les erreurs du lot (`errors`, une entrée
+    `{line, error}` par ligne rejetée).
+    """
+    if fmt not in FORMATS:
+        raise BookImportError(f"Format inconnu, attendu : {', '.join(FORMATS)}")
+    rows = _csv_rows(stream) if fmt == 'csv' else _jsonl_rows(stream)
+
+    progress = {'processed': 0, 'inserted': 0, 'duplicates': 0, 'failed': 0}
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch and progress['processed']:
+            break
+        valid = []
+        errors = []
+        for line, row in batch:
+            book, error = _validate(row)
+            if error:
+                errors.append({'line': line, 'error': error})
+            else:
+                valid.append(book)
+
+        inserted = _insert_batch(valid) if valid else 0
+        progress['processed'] += len(batch)
+        progress['inserted'] += inserted
+        progress['duplicates'] += len(valid) - inserted
+        progress['failed'] += len(errors)
+        yield dict(progress, errors=errors)
+        if not batch:
+            # Fichier vide : un seul état, à zéro
+            break
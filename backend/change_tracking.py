@@ -0,0 +1,117 @@
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, attributes
+
+from db_utils import dialect_insert
+from models import TableVersion
+
+_version_table = TableVersion.__table__
+
+
+def _pending(session):
+    return session.info.setdefault('pending_tables', set())
+
+
+def changed_tables(session):
+    """Tables modifiées par la transaction en cours, remises à zéro au commit/rollback."""
+    return session.info.setdefault('changed_tables', set())
+
+
+def _bump_versions(connection, tables):
+    rows = [{'name': name, 'version': 1} for name in sorted(tables)]
+    statement = dialect_insert(_version_table, bind=connection).values(rows)
+    statement = statement.on_conflict_do_update(
+        index_elements=[_version_table.c.name],
+        set_={'version': _version_table.c.version + 1}
+    )
+    connection.execute(statement)
+
+
+def touch_tables(session, *tables):
+    """À appeler après une requête SQL directe (insert/update/delete groupé) que
+    les événements de l'ORM ne voient pas."""
+    changed_tables(session).update(tables)
+
+
+def _secondary_tables(obj):
+    # Tables d'association (classroom_student) modifiées via une relation many-to-many
+    tables = set()
+    state = inspect(obj)
+    for relationship in state.mapper.relationships:
+        if relationship.secondary is None:
+            continue
+        if obj in state.session.deleted or attributes.get_history(
+                obj, relationship.key, passive=attributes.PASSIVE_NO_INITIALIZE).has_changes():
+            tables.add(relationship.secondary.name)
+    return tables
+
+
+def _cascaded_tables(mapper):
+    # Tables vidées par un ON DELETE CASCADE de la base, que l'ORM ne voit pas
+    # (relations passive_deletes dont les enfants ne sont pas chargés)
+    tables = set()
+    for relationship in mapper.relationships:
+        if relationship.passive_deletes and relationship.secondary is not None:
+            tables.add(relationship.secondary.name)
+        elif relationship.passive_deletes and 'delete' in relationship.cascade:
+            tables.add(relationship.mapper.local_table.name)
+            tables |= _cascaded_tables(relationship.mapper)
+    return tables
+
+
+@event.listens_for(Session, 'before_flush')
+def _collect_changes(session, flush_context, instances):
+    pending = _pending(session)
+    for obj in session.new:
+        pending.add(obj.__table__.name)
+        pending |= _secondary_tables(obj)
+    for obj in session.deleted:
+        pending.add(obj.__table__.name)
+        pending |= _secondary_tables(obj)
+        pending |= _cascaded_tables(inspect(obj).mapper)
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            pending.add(obj.__table__.name)
+        pending |= _secondary_tables(obj)
+    pending.discard(_version_table.name)
+
+
+@event.listens_for(Session, 'after_flush')
+def _record_changed_tables(session, flush_context):
+    pending = session.info.pop('pending_tables', None)
+    if pending:
+        changed_tables(session).update(pending)
+
+
+@event.listens_for(Session, 'before_commit')
+def _bump_changed_tables(session):
+    # Compteurs incrémentés juste avant le commit, en une seule requête triée :
+    # leurs lignes ne restent verrouillées que le temps du commit, et non de
+    # toute la transaction, ce qui sérialiserait les écritures concurrentes
+    session.flush()
+    tables = session.info.get('changed_tables')
+    if tables:
+        _bump_versions(session.connection(), tables)
+
+
+_commit_hooks = []
+
+
+def on_commit(hook):
+    """Enregistre `hook(tables)`, appelé après chaque commit avec les tables modifiées."""
+    _commit_hooks.append(hook)
+    return hook
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_changes(session):
+    tables = session.info.pop('changed_tables', None)
+    session.info.pop('pending_tables', None)
+    if tables:
+        for hook in _commit_hooks:
+            hook(frozenset(tables))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _reset_changes(session):
+    session.info.pop('changed_tables', None)
+    session.info.pop('pending_tables', None)
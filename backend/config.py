@@ -10,3 +10,119 @@ class Config:
     JWT_CSRF_IN_COOKIES = False
     JWT_COOKIE_CSRF_PROTECT = False
     JWT_CSRF_METHODS = []
+
+    # Pagination par curseur des endpoints de liste
+    PAGE_SIZE_DEFAULT = int(os.getenv('PAGE_SIZE_DEFAULT', 50))
+    PAGE_SIZE_MAX = int(os.getenv('PAGE_SIZE_MAX', 500))
+    # Nombre maximal d'éléments d'une opération groupée (une seule requête SQL)
+    BULK_MAX_ITEMS = int(os.getenv('BULK_MAX_ITEMS', 1000))
+    # Import de catalogue : lignes par transaction et erreurs renvoyées au plus
+    IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 1000))
+    IMPORT_MAX_ERRORS = int(os.getenv('IMPORT_MAX_ERRORS', 1000))
+    # Encodeur des réponses JSON : auto (orjson s'il est installé), orjson ou json
+    JSON_ENCODER = os.getenv('JSON_ENCODER', 'auto')
+    # Taille des lots lus en base pour les réponses en streaming
+    STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', 500))
+
+    # Durée de validité (s) des réponses GET avec ETag ; 0 impose une revalidation
+    HTTP_CACHE_MAX_AGE = int(os.getenv('HTTP_CACHE_MAX_AGE', 0))
+
+    # Cache serveur des réponses de liste : none, local (LRU propre à chaque
+    # processus) ou redis (partagé entre workers, RESPONSE_CACHE_URL)
+    RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'none')
+    RESPONSE_CACHE_URL = os.getenv('RESPONSE_CACHE_URL', 'redis://localhost:6379/0')
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 300))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 1024))
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    RESPONSE_CACHE_MAX_ITEM_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_ITEM_BYTES', 4 * 1024 * 1024))
+
+    # Événements SSE (GET /api/events) : local (clients de ce processus),
+    # postgres (LISTEN/NOTIFY, diffusés à tous les workers) ou auto
+    EVENTS_BACKEND = os.getenv('EVENTS_BACKEND', 'auto')
+    EVENTS_CHANNEL = os.getenv('EVENTS_CHANNEL', 'esme_events')
+    # Intervalle (s) des messages keep-alive et événements en attente par
+    # client avant de le déconnecter
+    EVENTS_HEARTBEAT = float(os.getenv('EVENTS_HEARTBEAT', 15))
+    EVENTS_QUEUE_SIZE = int(os.getenv('EVENTS_QUEUE_SIZE', 100))
+
+    # Synchronisation incrémentale (GET /api/sync) : marge (s) relue à chaque
+    # appel pour les transactions validées en retard, et durée de conservation
+    # des suppressions (un curseur plus ancien impose une resynchronisation)
+    SYNC_OVERLAP = float(os.getenv('SYNC_OVERLAP', 5))
+    SYNC_TOMBSTONE_DAYS = int(os.getenv('SYNC_TOMBSTONE_DAYS', 30))
+
+    # Logs : niveau global et part des requêtes écrites dans le journal d'accès
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    ACCESS_LOG_SAMPLE_RATE = float(os.getenv('ACCESS_LOG_SAMPLE_RATE', 1.0))
+
+    # Serveur WSGI de production (voir gunicorn.conf.py)
+    WEB_WORKERS = int(os.getenv('WEB_WORKERS', 4))
+    WEB_THREADS = int(os.getenv('WEB_THREADS', 4))
+
+    # Flux SSE ouverts en même temps par worker WSGI (chacun occupe un
+    # thread) ; asgi.py les sert sans thread et sans cette limite
+    EVENTS_MAX_STREAMS = int(os.getenv('EVENTS_MAX_STREAMS', max(WEB_THREADS // 2, 1)))
+
+    # Hachage des mots de passe : méthode et coût werkzeug (un changement est
+    # appliqué à chaque utilisateur lors de sa prochaine connexion), calculs
+    # simultanés et en attente par processus avant de répondre 503. Par
+    # défaut, au moins un thread de requête reste libre pour les autres routes.
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', max(WEB_THREADS // 2, 1)))
+    PASSWORD_HASH_QUEUE = int(os.getenv('PASSWORD_HASH_QUEUE', max(WEB_THREADS - PASSWORD_HASH_WORKERS - 1, 0)))
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))
+
+    # Pool de connexions : chaque worker a le sien, dimensionné par défaut sur
+    # son nombre de threads. WEB_WORKERS * (DB_POOL_SIZE + DB_MAX_OVERFLOW)
+    # doit rester sous le max_connections de PostgreSQL.
+    DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', WEB_THREADS))
+    DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', 2))
+    DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', 10))
+    DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', 1800))
+    DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', '1') == '1'
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', 30000))
+
+    # Mode asynchrone (asgi.py) : une boucle d'événements par worker sert de
+    # nombreuses requêtes à la fois, son pool est donc plus grand
+    ASYNC_DB_POOL_SIZE = int(os.getenv('ASYNC_DB_POOL_SIZE', 20))
+
+def engine_options(config):
+    """Options du moteur SQLAlchemy construites à partir de la configuration."""
+    uri = config.SQLALCHEMY_DATABASE_URI
+    if uri.startswith('sqlite'):
+        return {}
+
+    options = {
+        'pool_size': config.DB_POOL_SIZE,
+        'max_overflow': config.DB_MAX_OVERFLOW,
+        'pool_timeout': config.DB_POOL_TIMEOUT,
+        'pool_recycle': config.DB_POOL_RECYCLE,
+        'pool_pre_ping': config.DB_POOL_PRE_PING,
+    }
+    if config.DB_STATEMENT_TIMEOUT_MS and uri.startswith('postgresql'):
+        options['connect_args'] = {'options': f'-c statement_timeout={config.DB_STATEMENT_TIMEOUT_MS}'}
+    return options
+
+# Pilotes asyncio utilisés par asgi.py pour chaque dialecte synchrone
+ASYNC_DRIVERS = {'postgresql': 'postgresql+asyncpg', 'sqlite': 'sqlite+aiosqlite'}
+
+def async_database_url(config):
+    """URL de SQLALCHEMY_DATABASE_URI avec le pilote asyncio correspondant."""
+    scheme, rest = config.SQLALCHEMY_DATABASE_URI.split('://', 1)
+    dialect = scheme.split('+', 1)[0]
+    if dialect not in ASYNC_DRIVERS:
+        raise RuntimeError(f'Pas de pilote asynchrone pour {dialect}')
+    return f'{ASYNC_DRIVERS[dialect]}://{rest}'
+
+def async_engine_options(config):
+    """Options du moteur asynchrone : mêmes réglages, pool dimensionné pour asyncio."""
+    options = engine_options(config)
+    if not options:
+        return {}
+    options['pool_size'] = config.ASYNC_DB_POOL_SIZE
+    if 'connect_args' in options:
+        # asyncpg n'accepte pas `options` : le timeout passe par server_settings
+        options['connect_args'] = {'server_settings': {'statement_timeout': str(config.DB_STATEMENT_TIMEOUT_MS)}}
+    return options
+
+Config.SQLALCHEMY_ENGINE_OPTIONS = engine_options(Config)
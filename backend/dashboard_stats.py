@@ -0,0 +1,157 @@
+from sqlalchemy import delete, event, func, select, update
+from sqlalchemy.orm import Session, attributes
+
+from db_utils import dialect_insert
+from extensions import db
+from models import AssignmentStatusCount, Book, Classroom, ReadingAssignment, StudentReading, classroom_student
+
+# Statuts toujours présents dans les réponses, même à zéro
+STATUSES = ('en_attente', 'valide', 'refuse')
+
+_counts = AssignmentStatusCount.__table__
+
+
+def refresh_assignment_stats(connection, assignment_ids):
+    """Recalcule les compteurs des devoirs `assignment_ids`.
+
+    Le GROUP BY ne lit que les résumés de ces devoirs, par l'index
+    (assignment_id, status). Les compteurs sont remis à zéro puis
+    réécrits par un upsert, ce qui reste correct si deux transactions
+    recalculent le même devoir en même temps ; les statuts qui n'ont plus
+    de résumé sont ensuite supprimés.
+    """
+    ids = sorted(i for i in assignment_ids if i is not None)
+    if not ids:
+        return
+    connection.execute(update(_counts).where(_counts.c.assignment_id.in_(ids)).values(count=0))
+    grouped = select(
+        StudentReading.assignment_id, StudentReading.status, func.count()
+    ).where(
+        StudentReading.assignment_id.in_(ids)
+    ).group_by(StudentReading.assignment_id, StudentReading.status)
+    statement = dialect_insert(_counts, bind=connection).from_select(
+        ['assignment_id', 'status', 'count'], grouped
+    )
+    connection.execute(statement.on_conflict_do_update(
+        index_elements=[_counts.c.assignment_id, _counts.c.status],
+        set_={'count': statement.excluded['count']}
+    ))
+    connection.execute(delete(_counts).where(_counts.c.assignment_id.in_(ids), _counts.c.count == 0))
+
+
+@event.listens_for(Session, 'after_flush')
+def _refresh_flushed_readings(session, flush_context):
+    # Après le flush, les clés étrangères des nouveaux résumés sont connues ;
+    # session.new/dirty/deleted décrivent encore ce qui vient d'être écrit
+    ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if not isinstance(obj, StudentReading):
+            continue
+        ids.add(obj.assignment_id)
+        # Résumé déplacé vers un autre devoir : l'ancien est aussi à recalculer
+        ids.update(attributes.get_history(obj, 'assignment_id').deleted or ())
+    if ids:
+        refresh_assignment_stats(session.connection(), ids)
+
+
+def _rates(counts, expected):
+    submitted = sum(counts.values())
+    return {
+        'counts': counts,
+        'submitted': submitted,
+        'completion_rate': round(min(submitted / expected, 1.0), 4) if expected else 0.0
+    }
+
+
+def _empty_counts():
+    return dict.fromkeys(STATUSES, 0)
+
+
+def classroom_stats(classroom):
+    """Compteurs par devoir d'une classe et totaux, sans lire les résumés."""
+    students = db.session.scalar(
+        select(func.count()).select_from(classroom_student)
+        .where(classroom_student.c.classroom_id == classroom.id)
+    )
+    rows = db.session.execute(
+        select(ReadingAssignment.id, ReadingAssignment.due_date, Book.id, Book.title,
+               AssignmentStatusCount.status, AssignmentStatusCount.count)
+        .join(ReadingAssignment.book)
+        # Seuls les statuts de STATUSES sont comptés : la forme des réponses est fixe
+        .outerjoin(AssignmentStatusCount, (AssignmentStatusCount.assignment_id == ReadingAssignment.id)
+                   & AssignmentStatusCount.status.in_(STATUSES))
+        .where(ReadingAssignment.classroom_id == classroom.id)
+        .order_by(ReadingAssignment.id)
+    ).all()
+
+    assignments = {}
+    totals = _empty_counts()
+    for assignment_id, due_date, book_id, title, status, count in rows:
+        if assignment_id not in assignments:
+            assignments[assignment_id] = {
+                'assignment_id': assignment_id,
+                'book': {'id': book_id, 'title': title},
+                'due_date': due_date.isoformat() if due_date else None,
+                'counts': _empty_counts()
+            }
+        if status is not None:
+            counts = assignments[assignment_id]['counts']
+            counts[status] += count
+            totals[status] += count
+
+    return {
+        'classroom_id': classroom.id,
+        'name': classroom.name,
+        'students': students,
+        'assignments': [
+            dict(item, **_rates(item['counts'], students)) for item in assignments.values()
+        ],
+        **_rates(totals, students * len(assignments))
+    }
+
+
+def professor_summary(professor_id):
+    """Compteurs par classe du professeur : quatre requêtes GROUP BY, quel que
+    soit le nombre de résumés."""
+    classrooms = db.session.execute(
+        select(Classroom.id, Classroom.name).where(Classroom.professor_id == professor_id).order_by(Classroom.id)
+    ).all()
+    students = dict(db.session.execute(
+        select(classroom_student.c.classroom_id, func.count())
+        .join(Classroom, Classroom.id == classroom_student.c.classroom_id)
+        .where(Classroom.professor_id == professor_id)
+        .group_by(classroom_student.c.classroom_id)
+    ).all())
+    assignments = dict(db.session.execute(
+        select(ReadingAssignment.classroom_id, func.count())
+        .join(ReadingAssignment.classroom)
+        .where(Classroom.professor_id == professor_id)
+        .group_by(ReadingAssignment.classroom_id)
+    ).all())
+    status_rows = db.session.execute(
+        select(ReadingAssignment.classroom_id, AssignmentStatusCount.status, func.sum(AssignmentStatusCount.count))
+        .join(ReadingAssignment, ReadingAssignment.id == AssignmentStatusCount.assignment_id)
+        .join(ReadingAssignment.classroom)
+        .where(Classroom.professor_id == professor_id, AssignmentStatusCount.status.in_(STATUSES))
+        .group_by(ReadingAssignment.classroom_id, AssignmentStatusCount.status)
+    ).all()
+
+    counts = {classroom_id: _empty_counts() for classroom_id, _ in classrooms}
+    totals = _empty_counts()
+    for classroom_id, status, count in status_rows:
+        counts[classroom_id][status] += count
+        totals[status] += count
+
+    items = []
+    expected_total = 0
+    for classroom_id, name in classrooms:
+        expected = students.get(classroom_id, 0) * assignments.get(classroom_id, 0)
+        expected_total += expected
+        items.append({
+            'classroom_id': classroom_id,
+            'name': name,
+            'students': students.get(classroom_id, 0),
+            'assignments': assignments.get(classroom_id, 0),
+            **_rates(counts[classroom_id], expected)
+        })
+    return {'classrooms': items, **_rates(totals, expected_total)}
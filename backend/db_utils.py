@@ -0,0 +1,31 @@
+import sqlite3
+
+from sqlalchemy import event, insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+
+from extensions import db
+
+
+def dialect_insert(table, bind=None):
+    """INSERT propre au dialecte courant, pour disposer de ON CONFLICT.
+
+    PostgreSQL et SQLite (utilisé par les tests) supportent tous deux
+    `on_conflict_do_nothing` / `on_conflict_do_update`.
+    """
+    dialect = (bind or db.session.get_bind()).dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(table)
+    if dialect == 'sqlite':
+        return sqlite.insert(table)
+    return insert(table)
+
+
+@event.listens_for(Engine, 'connect')
+def _enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite n'applique les clés étrangères (et leurs ON DELETE CASCADE) que
+    # si on le demande, connexion par connexion
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
@@ -0,0 +1,42 @@
+from functools import wraps
+
+from flask import jsonify
+from flask_jwt_extended import get_jwt, get_jwt_identity, jwt_required
+
+from extensions import db
+from models import User
+
+
+def user_claims(user):
+    """Claims ajoutés au jeton à la connexion pour éviter une lecture de User par requête."""
+    return {
+        'role': user.role,
+        'first_name': user.first_name,
+        'last_name': user.last_name
+    }
+
+
+def current_role():
+    role = get_jwt().get('role')
+    if role is None:
+        # Jeton émis avant l'ajout des claims (les jetons n'expirent pas) : lecture en base
+        user = db.session.get(User, int(get_jwt_identity()))
+        role = user.role if user else None
+    return role
+
+
+def role_required(*roles):
+    """Comme `jwt_required`, en refusant (403) les utilisateurs dont le rôle n'est pas dans `roles`.
+
+    Le rôle est lu dans les claims du jeton : la vérification ne coûte aucune
+    requête SQL.
+    """
+    def decorator(view):
+        @wraps(view)
+        @jwt_required()
+        def wrapper(*args, **kwargs):
+            if current_role() not in roles:
+                return jsonify({'error': 'Accès non autorisé'}), 403
+            return view(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,264 @@
+"""Événements poussés aux clients par Server-Sent Events (GET /api/events).
+
+Les routes publient des événements destinés à des audiences
+(`user:<id>`) ; un client connecté au flux ne reçoit que ceux de son
+audience, au lieu de recharger régulièrement toute sa liste. Un événement
+n'est transmis qu'après le commit de la transaction qui l'a publié, jamais
+si elle est annulée.
+
+`EVENTS_BACKEND` choisit la diffusion :
+
+- local : aux clients connectés à ce processus seulement ;
+- postgres : par NOTIFY, envoyé dans la transaction ; chaque worker écoute
+  le canal (LISTEN) sur une connexion dédiée et relaie à ses clients ;
+- auto (défaut) : postgres si la base est PostgreSQL, sinon local.
+
+Un client trop lent (file pleine) est déconnecté plutôt que de retenir la
+mémoire du worker : il se reconnecte et recharge sa liste.
+"""
+import asyncio
+import json
+import logging
+import queue
+import select
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from extensions import db
+
+logger = logging.getLogger(__name__)
+
+# Taille maximale d'un NOTIFY (8000 octets par défaut dans PostgreSQL)
+NOTIFY_MAX_BYTES = 7900
+
+PING = ': ping\n\n'
+
+_NOTIFY = text('SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload')
+
+
+def user_audience(user_id):
+    return f'user:{user_id}'
+
+
+def format_event(name, data):
+    """Événement SSE ; `data` est déjà encodé en JSON (sur une ligne)."""
+    return f'event: {name}\ndata: {data}\n\n'
+
+
+class Subscription:
+    """File des événements d'un client connecté au flux."""
+
+    def __init__(self, audiences, max_queue=100):
+        self.audiences = frozenset(audiences)
+        self.queue = queue.Queue(max_queue)
+        self.lagging = False
+
+    def put(self, message):
+        # Appelé par le thread qui publie : ne bloque jamais
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            self.lagging = True
+
+    def get(self, timeout):
+        """Prochain événement, ou None après `timeout` secondes sans événement."""
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class AsyncSubscription(Subscription):
+    """Même file pour une vue asyncio (asgi.py), alimentée depuis d'autres threads."""
+
+    def __init__(self, audiences, max_queue=100):
+        self.audiences = frozenset(audiences)
+        self.queue = asyncio.Queue(max_queue)
+        self.lagging = False
+        self.loop = asyncio.get_running_loop()
+
+    def put(self, message):
+        self.loop.call_soon_threadsafe(self._put, message)
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.lagging = True
+
+    async def get(self, timeout):
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class EventBroker:
+    """Abonnements du processus et diffusion locale, après le commit."""
+
+    def __init__(self, max_queue=100, max_streams=None):
+        self.max_queue = max_queue
+        self._subscribers = {}
+        self._lock = threading.Lock()
+        # Flux WSGI ouverts en même temps : chacun occupe un thread du worker
+        self.streams = threading.BoundedSemaphore(max_streams) if max_streams else None
+
+    def subscribe(self, audiences, subscription=None):
+        subscription = subscription or Subscription(audiences, self.max_queue)
+        with self._lock:
+            for audience in subscription.audiences:
+                self._subscribers.setdefault(audience, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            for audience in subscription.audiences:
+                subscribers = self._subscribers.get(audience)
+                if subscribers is not None:
+                    subscribers.discard(subscription)
+                    if not subscribers:
+                        del self._subscribers[audience]
+
+    def dispatch(self, audiences, name, data):
+        """Transmet un événement aux clients connectés à ce processus."""
+        with self._lock:
+            targets = set()
+            for audience in audiences:
+                targets |= self._subscribers.get(audience, set())
+        if targets:
+            message = format_event(name, data)
+            for subscription in targets:
+                subscription.put(message)
+
+    def publish(self, session, events):
+        # Diffusés par _dispatch_committed au commit de la session
+        session.info.setdefault('pending_events', []).append((self, events))
+
+
+class PostgresBroker(EventBroker):
+    """Diffusion à tous les workers par LISTEN/NOTIFY.
+
+    Le NOTIFY part dans la transaction de l'écriture : PostgreSQL ne le
+    délivre qu'au commit. Un thread par worker écoute le canal et relaie aux
+    abonnés du processus, y compris pour ses propres écritures.
+    """
+
+    def __init__(self, channel, max_queue=100, max_streams=None):
+        super().__init__(max_queue, max_streams)
+        self.channel = channel
+        self._listener = None
+
+    def subscribe(self, audiences, subscription=None):
+        self._start_listener()
+        return super().subscribe(audiences, subscription)
+
+    def publish(self, session, events):
+        payloads = [self._payload(audiences, name, data) for audiences, name, data in events]
+        # Un seul SELECT pour tout le lot
+        session.execute(_NOTIFY, {'channel': self.channel, 'payloads': payloads})
+
+    def _payload(self, audiences, name, data):
+        payload = json.dumps({'audiences': list(audiences), 'event': name, 'data': data})
+        if len(payload.encode()) > NOTIFY_MAX_BYTES:
+            # Trop long pour NOTIFY : le client relit l'élément lui-même
+            item_id = json.loads(data).get('id')
+            payload = json.dumps({'audiences': list(audiences), 'event': name,
+                                  'data': json.dumps({'id': item_id, 'truncated': True})})
+        return payload
+
+    def _start_listener(self):
+        with self._lock:
+            if self._listener is None:
+                # Thread créé dans le worker (après le fork), au premier abonné
+                self._listener = threading.Thread(target=self._listen, args=(db.engine,),
+                                                  name='events-listener', daemon=True)
+                self._listener.start()
+
+    def _listen(self, engine):
+        # Réception des notifications propre à chaque pilote : une URL
+        # postgresql:// sans pilote désigne psycopg2 ou psycopg 3 selon la
+        # version de SQLAlchemy
+        receive = {'psycopg2': _psycopg2_notifies, 'psycopg': _psycopg_notifies}.get(engine.dialect.driver)
+        if receive is None:
+            logger.error("Pilote %s non pris en charge pour LISTEN : événements limités à ce processus",
+                         engine.dialect.driver)
+            return
+        while True:
+            connection = None
+            try:
+                # Connexion retirée du pool : elle reste ouverte pour LISTEN
+                connection = engine.raw_connection()
+                connection.detach()
+                driver = connection.driver_connection
+                # Transaction éventuellement ouverte par le pre-ping du pool
+                driver.rollback()
+                driver.autocommit = True
+                driver.cursor().execute(f'LISTEN "{self.channel}"')
+                for notify in receive(driver):
+                    message = json.loads(notify.payload)
+                    self.dispatch(message['audiences'], message['event'], message['data'])
+            except Exception:
+                logger.exception("Écoute du canal %s interrompue, reconnexion", self.channel)
+                time.sleep(1)
+            finally:
+                if connection is not None:
+                    connection.close()
+
+
+def _psycopg2_notifies(driver):
+    while True:
+        if select.select([driver], [], [], 60) == ([], [], []):
+            continue
+        driver.poll()
+        while driver.notifies:
+            yield driver.notifies.pop(0)
+
+
+def _psycopg_notifies(driver):
+    # psycopg 3 : générateur bloquant, interrompu par une erreur si la connexion tombe
+    yield from driver.notifies()
+
+
+def init_events(app):
+    """Installe le broker choisi par `EVENTS_BACKEND` (auto, local ou postgres)."""
+    backend = app.config.get('EVENTS_BACKEND', 'auto')
+    if backend == 'auto':
+        backend = 'postgres' if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgresql') else 'local'
+    options = {'max_queue': app.config.get('EVENTS_QUEUE_SIZE', 100),
+               'max_streams': app.config.get('EVENTS_MAX_STREAMS')}
+    if backend == 'postgres':
+        broker = PostgresBroker(app.config.get('EVENTS_CHANNEL', 'esme_events'), **options)
+    else:
+        broker = EventBroker(**options)
+    app.extensions['events'] = broker
+
+
+def publish_many(events):
+    """Publie `events`, une liste de (audiences, nom, données) ; envoyés au
+    commit de la session courante."""
+    if not events:
+        return
+    dumps = current_app.json.dumps
+    current_app.extensions['events'].publish(
+        db.session, [(tuple(audiences), name, dumps(data)) for audiences, name, data in events]
+    )
+
+
+def publish(audiences, name, data):
+    publish_many([(audiences, name, data)])
+
+
+@event.listens_for(Session, 'after_commit')
+def _dispatch_committed(session):
+    for broker, events in session.info.pop('pending_events', ()):
+        for audiences, name, data in events:
+            broker.dispatch(audiences, name, data)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_pending(session):
+    session.info.pop('pending_events', None)
@@ -0,0 +1,27 @@
+# Configuration gunicorn du serveur de production : gunicorn -c gunicorn.conf.py wsgi:app
+import os
+from config import Config
+
+bind = os.getenv('BIND', '0.0.0.0:5000')
+
+# Workers à threads : les vues attendent surtout PostgreSQL, les threads
+# d'un même worker partagent son pool de connexions (Config.DB_POOL_SIZE)
+worker_class = 'gthread'
+workers = Config.WEB_WORKERS
+threads = Config.WEB_THREADS
+
+timeout = int(os.getenv('WEB_TIMEOUT', 30))
+graceful_timeout = int(os.getenv('WEB_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.getenv('WEB_KEEPALIVE', 5))
+
+# Recycler les workers régulièrement limite l'effet d'éventuelles fuites mémoire
+max_requests = int(os.getenv('WEB_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.getenv('WEB_MAX_REQUESTS_JITTER', 200))
+
+# Pas de preload : chaque worker crée son moteur SQLAlchemy après le fork,
+# aucune connexion n'est partagée entre processus
+preload_app = False
+
+accesslog = os.getenv('WEB_ACCESS_LOG')
+errorlog = '-'
+loglevel = os.getenv('WEB_LOG_LEVEL', 'info')
@@ -0,0 +1,57 @@
+import hashlib
+from functools import wraps
+
+from flask import current_app, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import select
+
+from extensions import db
+from models import TableVersion
+
+
+def table_versions(tables):
+    rows = db.session.execute(
+        select(TableVersion.name, TableVersion.version).where(TableVersion.name.in_(tables))
+    ).all()
+    versions = dict(rows)
+    return tuple(versions.get(name, 0) for name in tables)
+
+
+def _cache_control():
+    max_age = current_app.config.get('HTTP_CACHE_MAX_AGE', 0)
+    if max_age:
+        return f'max-age={max_age}'
+    # Toujours revalider : le client refait la requête mais reçoit un 304 sans corps
+    return 'no-cache'
+
+
+def conditional(*tables, public=False):
+    """GET conditionnel (ETag / If-None-Match) pour une vue qui ne lit que `tables`.
+
+    À placer sous `jwt_required` sauf pour les vues publiques (`public=True`).
+
+    L'ETag est calculé à partir des compteurs de `table_version` (une seule
+    requête indexée), de l'URL avec ses paramètres et de l'utilisateur : si
+    aucune de ces tables n'a changé, la vue n'est pas exécutée et la réponse
+    est un 304 vide.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            identity = None if public else get_jwt_identity()
+            key = repr((tables, table_versions(tables), request.full_path, identity))
+            etag = hashlib.sha1(key.encode()).hexdigest()
+            cache_control = ('public, ' if public else 'private, ') + _cache_control()
+
+            if request.if_none_match.contains(etag):
+                response = current_app.response_class(status=304)
+            else:
+                response = current_app.make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = cache_control
+            return response
+        return wrapper
+    return decorator
@@ -1,6 +1,13 @@
+import argparse
+import random
+import time
 from app import create_app
 from extensions import db
-from models import User, Classroom, Book, ReadingAssignment, StudentReading
+from models import User, Classroom, Book, ReadingAssignment, StudentReading, classroom_student
+from change_tracking import touch_tables
+from dashboard_stats import STATUSES, refresh_assignment_stats
+from passwords import password_hasher
+from sqlalchemy import func, insert, select, text
 from werkzeug.security import generate_password_hash
 from datetime import datetime, timedelta
 
@@ -81,5 +88,157 @@ def init_db():
         db.session.commit()
         print("Base de données initialisée avec succès!")
 
+# Jeu de données synthétique (--scale) : une unité = un professeur, 4 classes
+# de 30 élèves, 5 devoirs par classe et 20 livres
+SCALE_UNIT = {'professors': 1, 'classrooms': 4, 'students': 30, 'assignments': 5, 'books': 20}
+PASSWORD = 'bench123'
+BATCH_SIZE = 5000
+
+WORDS = ('lecture', 'personnage', 'chapitre', 'auteur', 'roman', 'récit', 'thème', 'voyage',
+         'enfance', 'guerre', 'amitié', 'mémoire', 'ville', 'nuit', 'lettre', 'famille')
+
+def _insert(table, rows):
+    """Insère `rows` par lots (executemany, sans passer par l'ORM) ; retourne
+    les identifiants créés dans l'ordre de `rows`.
+
+    Les identifiants sont attribués ici, à la suite du plus grand existant,
+    plutôt que relus par RETURNING ligne à ligne ; la séquence PostgreSQL est
+    recalée ensuite.
+    """
+    table = getattr(table, '__table__', table)
+    ids = []
+    if 'id' in table.c and rows:
+        first = (db.session.scalar(select(func.max(table.c.id))) or 0) + 1
+        ids = list(range(first, first + len(rows)))
+        for row, row_id in zip(rows, ids):
+            row['id'] = row_id
+    for start in range(0, len(rows), BATCH_SIZE):
+        db.session.execute(insert(table), rows[start:start + BATCH_SIZE])
+    if ids and db.session.get_bind().dialect.name == 'postgresql':
+        db.session.execute(text("SELECT setval(pg_get_serial_sequence(:table, 'id'), :value)"),
+                           {'table': f'"{table.name}"', 'value': ids[-1]})
+    return ids
+
+def seed_dataset(professors=5, classrooms=4, students=30, books=200, assignments=5, reading_ratio=0.6, seed=1):
+    """Crée un jeu de données reproductible : `classrooms` classes par
+    professeur, `students` élèves et `assignments` devoirs par classe, un
+    résumé par élève et par devoir avec la probabilité `reading_ratio`.
+
+    Les lignes sont insérées par lots, sans l'ORM ; le mot de passe
+    PASSWORD, commun à tous les comptes, n'est haché qu'une fois. Les emails
+    contiennent `seed` : deux jeux de graines différentes cohabitent dans la
+    même base. Retourne un manifeste (emails, classes et devoirs de chacun,
+    volumes) pour les benchmarks et les tests.
+    """
+    rng = random.Random(seed)
+    password = password_hasher().hash(PASSWORD)
+    now = datetime(2026, 1, 5, 8, 0)
+    # Textes tirés une fois, puis réutilisés : la génération reste rapide
+    summaries = [' '.join(rng.choice(WORDS) for _ in range(rng.randrange(20, 120))) for _ in range(500)]
+
+    professor_emails = [f'prof{i}.s{seed}@bench.test' for i in range(professors)]
+    professor_ids = _insert(User, [
+        {'email': email, 'password': password, 'role': 'professor', 'first_name': 'Professeur', 'last_name': str(i)}
+        for i, email in enumerate(professor_emails)
+    ])
+
+    book_ids = _insert(Book, [
+        {'title': ' '.join(rng.sample(WORDS, 3)).capitalize(), 'author': f'Auteur {rng.randrange(books)}',
+         'published_at': datetime(1800, 1, 1) + timedelta(days=rng.randrange(80000))}
+        for _ in range(books)
+    ])
+
+    classroom_ids = _insert(Classroom, [
+        {'name': f'Classe {p}-{c}', 'professor_id': professor_id}
+        for p, professor_id in enumerate(professor_ids) for c in range(classrooms)
+    ])
+
+    student_emails = [f'eleve{i}.s{seed}@bench.test' for i in range(len(classroom_ids) * students)]
+    student_ids = _insert(User, [
+        {'email': email, 'password': password, 'role': 'student', 'first_name': 'Élève', 'last_name': str(i)}
+        for i, email in enumerate(student_emails)
+    ])
+
+    # Élèves c * students à (c + 1) * students - 1 dans la classe c
+    members = {classroom_id: range(c * students, (c + 1) * students) for c, classroom_id in enumerate(classroom_ids)}
+    _insert(classroom_student, [
+        {'classroom_id': classroom_id, 'user_id': student_ids[i]}
+        for classroom_id, indexes in members.items() for i in indexes
+    ])
+
+    assignment_rows = [
+        {'book_id': rng.choice(book_ids), 'classroom_id': classroom_id,
+         'assigned_date': now - timedelta(days=rng.randrange(60)),
+         'due_date': now + timedelta(days=rng.randrange(1, 30))}
+        for classroom_id in classroom_ids for _ in range(assignments)
+    ]
+    assignment_ids = _insert(ReadingAssignment, assignment_rows)
+
+    readings = 0
+    for start in range(0, len(assignment_ids), 100):
+        # Résumés générés et insérés par paquets de devoirs : mémoire bornée
+        reading_rows = []
+        for assignment_id, row in zip(assignment_ids[start:start + 100], assignment_rows[start:start + 100]):
+            for i in members[row['classroom_id']]:
+                if rng.random() >= reading_ratio:
+                    continue
+                status = rng.choice(STATUSES)
+                submitted_at = row['assigned_date'] + timedelta(minutes=rng.randrange(60 * 24 * 20))
+                reading_rows.append({
+                    'user_id': student_ids[i], 'assignment_id': assignment_id, 'status': status,
+                    'summary': rng.choice(summaries), 'submitted_at': submitted_at,
+                    'validated_at': submitted_at + timedelta(days=1) if status != 'en_attente' else None,
+                })
+        _insert(StudentReading, reading_rows)
+        # Les insertions groupées ne passent pas par le flush de l'ORM
+        refresh_assignment_stats(db.session.connection(), assignment_ids[start:start + 100])
+        readings += len(reading_rows)
+
+    touch_tables(db.session, 'user', 'book', 'classroom', 'classroom_student', 'reading_assignment', 'student_reading')
+    db.session.commit()
+
+    classroom_of = {i: classroom_id for classroom_id, indexes in members.items() for i in indexes}
+    assignments_of = {}
+    for assignment_id, row in zip(assignment_ids, assignment_rows):
+        assignments_of.setdefault(row['classroom_id'], []).append(assignment_id)
+    return {
+        'password': PASSWORD,
+        'professors': [
+            {'email': email, 'classrooms': classroom_ids[p * classrooms:(p + 1) * classrooms]}
+            for p, email in enumerate(professor_emails)
+        ],
+        'students': [
+            {'email': email, 'assignments': assignments_of[classroom_of[i]]}
+            for i, email in enumerate(student_emails)
+        ],
+        'counts': {
+            'professors': professors, 'classrooms': len(classroom_ids), 'students': len(student_ids),
+            'books': books, 'assignments': len(assignment_ids), 'readings': readings,
+        },
+    }
+
+def seed_scale(scale, seed=1, reading_ratio=0.6):
+    """Jeu de données de `scale` unités (voir SCALE_UNIT)."""
+    return seed_dataset(professors=SCALE_UNIT['professors'] * scale, classrooms=SCALE_UNIT['classrooms'],
+                        students=SCALE_UNIT['students'], books=SCALE_UNIT['books'] * scale,
+                        assignments=SCALE_UNIT['assignments'], reading_ratio=reading_ratio, seed=seed)
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Initialise la base avec les comptes de test")
+    parser.add_argument('--scale', type=int, help="Ajoute un jeu de données synthétique : une unité = "
+                                                  "1 professeur, 120 élèves, 20 devoirs, 20 livres")
+    parser.add_argument('--seed', type=int, default=1, help="Graine du jeu de données (reproductible)")
+    parser.add_argument('--reading-ratio', type=float, default=0.6, help="Part des devoirs rendus")
+    args = parser.parse_args()
+
     init_db()
+    if args.scale:
+        app = create_app()
+        with app.app_context():
+            if User.query.filter_by(email=f'prof0.s{args.seed}@bench.test').first():
+                print(f"Jeu de données de graine {args.seed} déjà présent")
+            else:
+                started = time.perf_counter()
+                counts = seed_scale(args.scale, args.seed, args.reading_ratio)['counts']
+                print(', '.join(f'{n} {name}' for name, n in counts.items())
+                      + f' créés en {time.perf_counter() - started:.1f} s')
@@ -0,0 +1,131 @@
+import threading
+import time
+from bisect import bisect_left
+
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+from extensions import db
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        # Une case par borne, plus la case +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """Histogrammes par endpoint, propres au processus courant.
+
+    Avec plusieurs workers gunicorn, chaque processus expose ses propres
+    valeurs : Prometheus les agrège à la lecture.
+    """
+
+    HISTOGRAMS = (
+        ('http_request_duration_seconds', 'Durée totale des requêtes HTTP', DURATION_BUCKETS),
+        ('http_request_db_duration_seconds', 'Temps passé dans la base par requête', DURATION_BUCKETS),
+        ('http_request_sql_queries', 'Nombre de requêtes SQL par requête HTTP', QUERY_COUNT_BUCKETS),
+    )
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {name: {} for name, _, _ in self.HISTOGRAMS}
+        self._requests = {}
+
+    def observe(self, endpoint, method, status, duration, db_duration, sql_queries):
+        labels = (endpoint, method)
+        values = (duration, db_duration, sql_queries)
+        with self._lock:
+            for (name, _, buckets), value in zip(self.HISTOGRAMS, values):
+                series = self._histograms[name]
+                if labels not in series:
+                    series[labels] = Histogram(buckets)
+                series[labels].observe(value)
+            key = (endpoint, method, str(status))
+            self._requests[key] = self._requests.get(key, 0) + 1
+
+    def render(self):
+        """Export au format texte de Prometheus."""
+        lines = [
+            '# HELP http_requests_total Nombre de requêtes HTTP traitées',
+            '# TYPE http_requests_total counter',
+        ]
+        with self._lock:
+            for (endpoint, method, status), value in sorted(self._requests.items()):
+                lines.append(f'http_requests_total{{endpoint="{endpoint}",method="{method}",status="{status}"}} {value}')
+
+            for name, description, buckets in self.HISTOGRAMS:
+                lines.append(f'# HELP {name} {description}')
+                lines.append(f'# TYPE {name} histogram')
+                for (endpoint, method), histogram in sorted(self._histograms[name].items()):
+                    labels = f'endpoint="{endpoint}",method="{method}"'
+                    cumulative = 0
+                    for bound, count in zip(buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+                    lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                    lines.append(f'{name}_sum{{{labels}}} {histogram.sum}')
+                    lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started_at', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = conn.info['query_started_at'].pop()
+    if has_request_context() and 'sql_queries' in g:
+        g.sql_queries += 1
+        g.db_duration += time.perf_counter() - started_at
+
+
+def _handle_error(exception_context):
+    # after_cursor_execute n'est pas appelé quand la requête échoue
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('query_started_at'):
+        connection.info['query_started_at'].pop()
+
+
+def init_metrics(app):
+    """Mesure le temps, le nombre de requêtes SQL et le temps base de chaque requête.
+
+    Les valeurs sont renvoyées dans l'en-tête `Server-Timing` et agrégées par
+    endpoint pour `/api/metrics`.
+    """
+    registry = MetricsRegistry()
+    app.extensions['metrics'] = registry
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+    event.listen(engine, 'handle_error', _handle_error)
+
+    @app.before_request
+    def start_metrics():
+        g.metrics_started_at = time.perf_counter()
+        g.sql_queries = 0
+        g.db_duration = 0.0
+
+    @app.after_request
+    def record_metrics(response):
+        if 'metrics_started_at' not in g:
+            return response
+        duration = time.perf_counter() - g.metrics_started_at
+        response.headers.add('Server-Timing', f'app;dur={duration * 1000:.2f}')
+        response.headers.add('Server-Timing', f'db;dur={g.db_duration * 1000:.2f};desc="{g.sql_queries} queries"')
+        registry.observe(request.endpoint or 'not_found', request.method, response.status_code,
+                         duration, g.db_duration, g.sql_queries)
+        return response
@@ -0,0 +1,31 @@
+"""assignment_status_count summary table for dashboards
+
+Revision ID: add_assignment_status_count
+Revises: add_full_text_search
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'add_assignment_status_count'
+down_revision = 'add_full_text_search'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('assignment_status_count',
+        sa.Column('assignment_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False),
+        sa.Column('count', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['assignment_id'], ['reading_assignment.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('assignment_id', 'status')
+    )
+    # Compteurs initiaux ; l'application les tient ensuite à jour
+    op.execute(
+        'INSERT INTO assignment_status_count (assignment_id, status, count) '
+        'SELECT assignment_id, status, count(*) FROM student_reading GROUP BY assignment_id, status'
+    )
+
+def downgrade():
+    op.drop_table('assignment_status_count')
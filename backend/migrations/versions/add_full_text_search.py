@@ -0,0 +1,33 @@
+"""GIN full-text indexes on book and student_reading
+
+Revision ID: add_full_text_search
+Revises: add_on_delete_cascade
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic
+revision = 'add_full_text_search'
+down_revision = 'add_on_delete_cascade'
+branch_labels = None
+depends_on = None
+
+# Mêmes expressions que search.py : PostgreSQL n'utilise l'index que si la
+# requête reprend exactement l'expression indexée
+INDEXES = {
+    'ix_book_search': ('book', "to_tsvector('simple', coalesce(title, '') || ' ' || coalesce(author, ''))"),
+    'ix_student_reading_search': ('student_reading', "to_tsvector('french', coalesce(summary, ''))"),
+}
+
+def upgrade():
+    # SQLite (tests, poste local) : les tables FTS5 sont créées avec les tables
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for name, (table, expression) in INDEXES.items():
+        op.execute(f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING GIN ({expression})')
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for name in INDEXES:
+        op.execute(f'DROP INDEX IF EXISTS {name}')
@@ -0,0 +1,32 @@
+"""add indexes for hot foreign key lookups
+
+Revision ID: add_hot_lookup_indexes
+Revises: add_dates_to_reading_assignment
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic
+revision = 'add_hot_lookup_indexes'
+down_revision = 'add_dates_to_reading_assignment'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_index('ix_user_role', 'user', ['role'])
+    op.create_index('ix_classroom_professor_id', 'classroom', ['professor_id'])
+    op.create_index('ix_reading_assignment_book_id', 'reading_assignment', ['book_id'])
+    op.create_index('ix_reading_assignment_classroom_id', 'reading_assignment', ['classroom_id'])
+    op.create_index('ix_student_reading_status', 'student_reading', ['status'])
+    # Les index composites couvrent aussi les recherches sur user_id et assignment_id seuls
+    op.create_index('ix_student_reading_user_id_submitted_at', 'student_reading', ['user_id', 'submitted_at'])
+    op.create_index('ix_student_reading_assignment_id_status', 'student_reading', ['assignment_id', 'status'])
+
+def downgrade():
+    op.drop_index('ix_student_reading_assignment_id_status', table_name='student_reading')
+    op.drop_index('ix_student_reading_user_id_submitted_at', table_name='student_reading')
+    op.drop_index('ix_student_reading_status', table_name='student_reading')
+    op.drop_index('ix_reading_assignment_classroom_id', table_name='reading_assignment')
+    op.drop_index('ix_reading_assignment_book_id', table_name='reading_assignment')
+    op.drop_index('ix_classroom_professor_id', table_name='classroom')
+    op.drop_index('ix_user_role', table_name='user')
@@ -0,0 +1,42 @@
+"""ON DELETE CASCADE on book, assignment and classroom children
+
+Revision ID: add_on_delete_cascade
+Revises: add_table_version
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic
+revision = 'add_on_delete_cascade'
+down_revision = 'add_table_version'
+branch_labels = None
+depends_on = None
+
+# (table, colonne, table référencée) : les contraintes portent le nom
+# par défaut de PostgreSQL, <table>_<colonne>_fkey
+FOREIGN_KEYS = [
+    ('reading_assignment', 'book_id', 'book'),
+    ('reading_assignment', 'classroom_id', 'classroom'),
+    ('student_reading', 'assignment_id', 'reading_assignment'),
+    ('classroom_student', 'classroom_id', 'classroom'),
+]
+
+def _recreate_foreign_keys(ondelete):
+    for table, column, referent in FOREIGN_KEYS:
+        name = f'{table}_{column}_fkey'
+        op.drop_constraint(name, table, type_='foreignkey')
+        op.create_foreign_key(name, table, referent, [column], ['id'], ondelete=ondelete)
+
+def upgrade():
+    # SQLite (tests, poste local) : create_all déclare déjà ondelete='CASCADE',
+    # et les contraintes n'y portent pas ces noms
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # Les suppressions de livres, devoirs et classes deviennent une seule
+    # instruction DELETE ; la base supprime les lignes dépendantes
+    _recreate_foreign_keys('CASCADE')
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    _recreate_foreign_keys(None)
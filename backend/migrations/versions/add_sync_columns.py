@@ -0,0 +1,114 @@
+"""updated_at columns and sync_tombstone table for incremental sync
+
+Revision ID: add_sync_columns
+Revises: add_unique_student_submission
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'add_sync_columns'
+down_revision = 'add_unique_student_submission'
+branch_labels = None
+depends_on = None
+
+TABLES = ['book', 'reading_assignment', 'student_reading']
+
+# Heure de la base en UTC, au format des dates de SQLAlchemy sous SQLite
+NOW = {
+    'postgresql': "clock_timestamp() AT TIME ZONE 'utc'",
+    'sqlite': "strftime('%Y-%m-%d %H:%M:%f000', 'now')",
+}
+
+# Mêmes triggers que sync.py : une ligne par suppression et par utilisateur
+# qui voyait la ligne, cascades comprises
+INSERT = 'INSERT INTO sync_tombstone (table_name, row_id, user_id, deleted_at) '
+MEMBERS = ('(SELECT professor_id AS user_id FROM classroom WHERE id = {classroom} '
+           'UNION ALL SELECT user_id FROM classroom_student WHERE classroom_id = {classroom})')
+TRIGGERS = [
+    ('book_tombstone', 'book', 'AFTER DELETE', [
+        INSERT + "VALUES ('book', OLD.id, NULL, {now})",
+    ]),
+    ('classroom_tombstone', 'classroom', 'BEFORE DELETE', [
+        INSERT + "SELECT 'reading_assignment', a.id, m.user_id, {now} FROM reading_assignment a, "
+        + MEMBERS.format(classroom='OLD.id') + " m WHERE a.classroom_id = OLD.id",
+        INSERT + "SELECT 'student_reading', r.id, OLD.professor_id, {now} FROM student_reading r "
+        "JOIN reading_assignment a ON a.id = r.assignment_id WHERE a.classroom_id = OLD.id",
+    ]),
+    ('reading_assignment_tombstone', 'reading_assignment', 'BEFORE DELETE', [
+        INSERT + "SELECT 'reading_assignment', OLD.id, m.user_id, {now} FROM "
+        + MEMBERS.format(classroom='OLD.classroom_id') + " m",
+        INSERT + "SELECT 'student_reading', r.id, c.professor_id, {now} FROM student_reading r "
+        "JOIN classroom c ON c.id = OLD.classroom_id WHERE r.assignment_id = OLD.id",
+    ]),
+    ('student_reading_tombstone', 'student_reading', 'AFTER DELETE', [
+        INSERT + "VALUES ('student_reading', OLD.id, OLD.user_id, {now})",
+        INSERT + "SELECT 'student_reading', OLD.id, c.professor_id, {now} FROM reading_assignment a "
+        "JOIN classroom c ON c.id = a.classroom_id WHERE a.id = OLD.assignment_id",
+    ]),
+    ('classroom_student_tombstone', 'classroom_student', 'AFTER DELETE', [
+        INSERT + "SELECT 'reading_assignment', id, OLD.user_id, {now} FROM reading_assignment "
+        "WHERE classroom_id = OLD.classroom_id",
+    ]),
+    ('classroom_student_visible', 'classroom_student', 'AFTER INSERT', [
+        'UPDATE reading_assignment SET updated_at = {now} WHERE classroom_id = NEW.classroom_id',
+    ]),
+]
+
+def trigger_ddl(dialect, name, table, timing, statements):
+    body = '; '.join(statement.format(now=NOW[dialect]) for statement in statements)
+    if dialect == 'postgresql':
+        result = 'OLD' if timing == 'BEFORE DELETE' else 'NULL'
+        return [
+            f'CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$ BEGIN {body}; '
+            f'RETURN {result}; END $$ LANGUAGE plpgsql',
+            f'CREATE TRIGGER {name} {timing} ON {table} FOR EACH ROW EXECUTE PROCEDURE {name}()',
+        ]
+    return [f'CREATE TRIGGER IF NOT EXISTS {name} {timing} ON {table} FOR EACH ROW BEGIN {body}; END']
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for table in TABLES:
+        # Lignes existantes : datées de la migration, renvoyées à la première synchronisation
+        if dialect == 'postgresql':
+            op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=False,
+                                           server_default=sa.text("(now() AT TIME ZONE 'utc')")))
+            op.alter_column(table, 'updated_at', server_default=None)
+        else:
+            # SQLite (poste local) : ADD COLUMN n'accepte qu'un défaut constant, et
+            # recréer la table (batch) perdrait ses ON DELETE CASCADE
+            op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=False,
+                                           server_default='1970-01-01 00:00:00'))
+            op.execute(f"UPDATE {table} SET updated_at = {NOW['sqlite']}")
+        op.create_index(f'ix_{table}_updated_at', table, ['updated_at'])
+
+    op.create_table('sync_tombstone',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('table_name', sa.String(length=64), nullable=False),
+        sa.Column('row_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_sync_tombstone_user_id_deleted_at_id', 'sync_tombstone', ['user_id', 'deleted_at', 'id'])
+    op.create_index('ix_sync_tombstone_deleted_at_id', 'sync_tombstone', ['deleted_at', 'id'])
+
+    for name, table, timing, statements in TRIGGERS:
+        for statement in trigger_ddl(dialect, name, table, timing, statements):
+            op.execute(statement)
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for name, table, _, _ in TRIGGERS:
+        if dialect == 'postgresql':
+            op.execute(f'DROP TRIGGER IF EXISTS {name} ON {table}')
+            op.execute(f'DROP FUNCTION IF EXISTS {name}()')
+        else:
+            op.execute(f'DROP TRIGGER IF EXISTS {name}')
+    op.drop_index('ix_sync_tombstone_deleted_at_id', table_name='sync_tombstone')
+    op.drop_index('ix_sync_tombstone_user_id_deleted_at_id', table_name='sync_tombstone')
+    op.drop_table('sync_tombstone')
+    for table in TABLES:
+        op.drop_index(f'ix_{table}_updated_at', table_name=table)
+        op.drop_column(table, 'updated_at')
@@ -0,0 +1,24 @@
+"""add table_version counters for HTTP caching
+
+Revision ID: add_table_version
+Revises: add_hot_lookup_indexes
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'add_table_version'
+down_revision = 'add_hot_lookup_indexes'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    op.create_table('table_version',
+        sa.Column('name', sa.String(length=64), nullable=False),
+        sa.Column('version', sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint('name')
+    )
+
+def downgrade():
+    op.drop_table('table_version')
@@ -0,0 +1,34 @@
+"""one student_reading per (user_id, assignment_id) and Idempotency-Key
+
+Revision ID: add_unique_student_submission
+Revises: add_assignment_status_count
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic
+revision = 'add_unique_student_submission'
+down_revision = 'add_assignment_status_count'
+branch_labels = None
+depends_on = None
+
+def upgrade():
+    # Doublons existants : seul le dernier dépôt de chaque élève est gardé
+    op.execute(
+        'DELETE FROM student_reading WHERE id NOT IN '
+        '(SELECT max(id) FROM student_reading GROUP BY user_id, assignment_id)'
+    )
+    op.add_column('student_reading', sa.Column('idempotency_key', sa.String(length=64), nullable=True))
+    op.create_unique_constraint('uq_student_reading_user_id_assignment_id', 'student_reading',
+                                ['user_id', 'assignment_id'])
+    # Compteurs des tableaux de bord recalculés sans les doublons
+    op.execute('DELETE FROM assignment_status_count')
+    op.execute(
+        'INSERT INTO assignment_status_count (assignment_id, status, count) '
+        'SELECT assignment_id, status, count(*) FROM student_reading GROUP BY assignment_id, status'
+    )
+
+def downgrade():
+    op.drop_constraint('uq_student_reading_user_id_assignment_id', 'student_reading', type_='unique')
+    op.drop_column('student_reading', 'idempotency_key')
@@ -1,9 +1,10 @@
 from extensions import db
+from sqlalchemy import exists
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
 classroom_student = db.Table('classroom_student',
-    db.Column('classroom_id', db.Integer, db.ForeignKey('classroom.id'), primary_key=True),
+    db.Column('classroom_id', db.Integer, db.ForeignKey('classroom.id', ondelete='CASCADE'), primary_key=True),
     db.Column('user_id', db.Integer, db.ForeignKey('user.id'), primary_key=True)
 )
 
@@ -13,7 +14,7 @@ class User(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     email = db.Column(db.String(100), nullable=False, unique=True)
     password = db.Column(db.String(255), nullable=False)
-    role = db.Column(db.String(20), nullable=False)  # 'professor' ou 'student'
+    role = db.Column(db.String(20), nullable=False, index=True)  # 'professor' ou 'student'
     first_name = db.Column(db.String(100), nullable=False)
     last_name = db.Column(db.String(100), nullable=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -28,46 +29,121 @@ class User(db.Model):
 class Classroom(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
-    professor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    professor_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
     # Relations
     professor = relationship("User", back_populates="classrooms")
-    reading_assignments = relationship("ReadingAssignment", back_populates="classroom")
+    # Les enfants sont supprimés par les ON DELETE CASCADE de la base :
+    # passive_deletes évite de les charger pour les supprimer un par un
+    reading_assignments = relationship("ReadingAssignment", back_populates="classroom",
+                                       cascade="all, delete-orphan", passive_deletes=True)
     students = relationship("User", 
                           secondary="classroom_student",  # Table d'association
-                          back_populates="enrolled_classrooms")
+                          back_populates="enrolled_classrooms",
+                          passive_deletes=True)
+
+    @staticmethod
+    def has_student(classroom_id, user_id):
+        """Teste l'appartenance par un EXISTS sur la clé primaire de classroom_student,
+        sans charger la liste des élèves."""
+        return db.session.query(exists().where(
+            classroom_student.c.classroom_id == classroom_id,
+            classroom_student.c.user_id == user_id
+        )).scalar()
 
 class Book(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(100), nullable=False)
     author = db.Column(db.String(100), nullable=False)
     published_at = db.Column(db.DateTime)
+    # Date de dernière écriture, lue par la synchronisation incrémentale (sync.py)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     # Relations
-    reading_assignments = relationship("ReadingAssignment", back_populates="book")
+    reading_assignments = relationship("ReadingAssignment", back_populates="book",
+                                       cascade="all, delete-orphan", passive_deletes=True)
 
 class ReadingAssignment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    book_id = db.Column(db.Integer, db.ForeignKey('book.id'), nullable=False)
-    classroom_id = db.Column(db.Integer, db.ForeignKey('classroom.id'), nullable=False)
+    book_id = db.Column(db.Integer, db.ForeignKey('book.id', ondelete='CASCADE'), nullable=False, index=True)
+    classroom_id = db.Column(db.Integer, db.ForeignKey('classroom.id', ondelete='CASCADE'), nullable=False, index=True)
     assigned_date = db.Column(db.DateTime, default=datetime.utcnow)
     due_date = db.Column(db.DateTime)
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     # Relations
     book = relationship("Book", back_populates="reading_assignments")
     classroom = relationship("Classroom", back_populates="reading_assignments")
-    student_readings = relationship("StudentReading", back_populates="assignment")
+    student_readings = relationship("StudentReading", back_populates="assignment",
+                                    cascade="all, delete-orphan", passive_deletes=True)
 
 class StudentReading(db.Model):
+    # Les index composites servent aussi aux recherches sur leur première
+    # colonne seule (user_id, assignment_id)
+    __table_args__ = (
+        db.Index('ix_student_reading_user_id_submitted_at', 'user_id', 'submitted_at'),
+        db.Index('ix_student_reading_assignment_id_status', 'assignment_id', 'status'),
+        # Un seul résumé par élève et par devoir : un nouveau dépôt remplace
+        # le précédent (upsert, voir create_student_reading)
+        db.UniqueConstraint('user_id', 'assignment_id', name='uq_student_reading_user_id_assignment_id'),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    assignment_id = db.Column(db.Integer, db.ForeignKey('reading_assignment.id'), nullable=False)
+    assignment_id = db.Column(db.Integer, db.ForeignKey('reading_assignment.id', ondelete='CASCADE'), nullable=False)
     summary = db.Column(db.Text)  # Le résumé de l'étudiant
-    status = db.Column(db.String(20), nullable=False, default='en_attente')  # 'en_attente', 'valide', 'refuse'
+    status = db.Column(db.String(20), nullable=False, default='en_attente', index=True)  # 'en_attente', 'valide', 'refuse'
     submitted_at = db.Column(db.DateTime, default=datetime.utcnow)
     validated_at = db.Column(db.DateTime)
+    # En-tête Idempotency-Key du dernier dépôt : un nouvel envoi avec la même
+    # clé est une répétition et ne modifie pas le résumé
+    idempotency_key = db.Column(db.String(64))
+    updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     # Relations
     student = relationship("User", back_populates="student_readings")
     assignment = relationship("ReadingAssignment", back_populates="student_readings")
+
+class AssignmentStatusCount(db.Model):
+    """Nombre de résumés par devoir et par statut (voir dashboard_stats.py).
+
+    Recalculé pour chaque devoir touché par une écriture sur StudentReading :
+    les tableaux de bord lisent ces compteurs au lieu de parcourir les résumés.
+    """
+    __tablename__ = 'assignment_status_count'
+
+    assignment_id = db.Column(db.Integer, db.ForeignKey('reading_assignment.id', ondelete='CASCADE'), primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+
+class TableVersion(db.Model):
+    """Compteur incrémenté à chaque écriture sur une table (voir change_tracking.py).
+
+    Sert à calculer les ETag des réponses sans relire les tables elles-mêmes.
+    """
+    __tablename__ = 'table_version'
+
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+class SyncTombstone(db.Model):
+    """Ligne supprimée de book, reading_assignment ou student_reading (voir sync.py).
+
+    Écrite par un trigger de la base : les suppressions en cascade
+    (ON DELETE CASCADE) que l'application ne voit pas sont aussi enregistrées,
+    une fois par utilisateur qui voyait la ligne (`user_id`, NULL pour un livre,
+    visible de tous). Un élève retiré d'une classe reçoit de même la
+    suppression des devoirs de cette classe.
+    """
+    __tablename__ = 'sync_tombstone'
+    __table_args__ = (
+        db.Index('ix_sync_tombstone_user_id_deleted_at_id', 'user_id', 'deleted_at', 'id'),
+        db.Index('ix_sync_tombstone_deleted_at_id', 'deleted_at', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    table_name = db.Column(db.String(64), nullable=False)
+    row_id = db.Column(db.Integer, nullable=False)
+    user_id = db.Column(db.Integer)
+    deleted_at = db.Column(db.DateTime, nullable=False)
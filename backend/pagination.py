@@ -0,0 +1,173 @@
+import base64
+import json
+from datetime import datetime
+
+from flask import current_app, jsonify, request
+from sqlalchemy import and_, or_
+
+
+class PaginationError(ValueError):
+    """Paramètre de pagination ou de filtre invalide (renvoyé en 400)."""
+
+
+class Page:
+    def __init__(self, items, next_cursor, paginated):
+        self.items = items
+        self.next_cursor = next_cursor
+        # False quand le client n'a demandé ni `limit` ni `cursor` :
+        # la réponse garde alors l'ancien format (liste complète)
+        self.paginated = paginated
+
+
+def encode_cursor(values):
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor, columns):
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise PaginationError('Curseur invalide')
+
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise PaginationError('Curseur invalide')
+
+    decoded = []
+    for column, value in zip(columns, values):
+        if value is not None and column.type.python_type is datetime:
+            try:
+                value = datetime.fromisoformat(value)
+            except (TypeError, ValueError):
+                raise PaginationError('Curseur invalide')
+        decoded.append(value)
+    return decoded
+
+
+def _parse_int(name, args):
+    value = args.get(name)
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise PaginationError(f'Paramètre {name} invalide, entier attendu')
+
+
+def _parse_date(name, args):
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise PaginationError(f'Paramètre {name} invalide, date ISO 8601 attendue')
+
+
+def apply_filters(query, columns=None, date_column=None, args=None):
+    """Applique les filtres de la query string.
+
+    `columns` associe un nom de paramètre (status, classroom_id, book_id...)
+    à la colonne filtrée ; `date_column` est bornée par `date_from`/`date_to`.
+    `args` remplace `request.args` hors d'une requête Flask (voir asgi.py).
+    Un filtre vide (`?role=`) est ignoré.
+    """
+    args = request.args if args is None else args
+    for name, column in (columns or {}).items():
+        if not args.get(name):
+            continue
+        if column.type.python_type is int:
+            query = query.filter(column == _parse_int(name, args))
+        else:
+            query = query.filter(column == args[name])
+
+    if date_column is not None:
+        date_from = _parse_date('date_from', args)
+        date_to = _parse_date('date_to', args)
+        if date_from is not None:
+            query = query.filter(date_column >= date_from)
+        if date_to is not None:
+            query = query.filter(date_column <= date_to)
+    return query
+
+
+def keyset_after(columns, values):
+    """Condition « ligne située après `values` » dans l'ordre de `columns`."""
+    # (a, b) > (x, y)  <=>  a > x OU (a = x ET b > y)
+    clauses = []
+    for i, column in enumerate(columns):
+        equals = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equals, column > values[i]))
+    return or_(*clauses)
+
+
+def is_paginated(args=None):
+    args = request.args if args is None else args
+    return 'cursor' in args or 'limit' in args
+
+
+def keyset(query, columns, args=None):
+    """Ordonne `query` sur `columns` et, si la pagination est demandée, la
+    restreint à la page suivant le curseur (limit + 1 lignes).
+
+    Retourne (query, limit), limit valant None sans pagination.
+    """
+    args = request.args if args is None else args
+    query = query.order_by(*columns)
+
+    if not is_paginated(args):
+        return query, None
+
+    cursor = args.get('cursor')
+    limit = _parse_int('limit', args)
+
+    max_limit = current_app.config.get('PAGE_SIZE_MAX', 500)
+    if limit is None:
+        limit = current_app.config.get('PAGE_SIZE_DEFAULT', 50)
+    if limit < 1 or limit > max_limit:
+        raise PaginationError(f'Paramètre limit invalide, attendu entre 1 et {max_limit}')
+
+    if cursor:
+        query = query.filter(keyset_after(columns, decode_cursor(cursor, columns)))
+    return query.limit(limit + 1), limit
+
+
+def make_page(rows, columns, limit, cursor_values=None):
+    """Page construite à partir des lignes lues pour `keyset(...)`."""
+    if limit is None:
+        return Page(rows, None, False)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        if cursor_values is not None:
+            next_cursor = encode_cursor(list(cursor_values(last)))
+        else:
+            next_cursor = encode_cursor([getattr(last, column.key) for column in columns])
+    return Page(rows, next_cursor, True)
+
+
+def paginate(query, *columns, cursor_values=None):
+    """Pagination par curseur (keyset) sur `columns`, la dernière étant unique.
+
+    Sans `limit` ni `cursor` dans la requête, toutes les lignes sont renvoyées
+    pour rester compatible avec les clients existants. `cursor_values(row)`
+    donne les valeurs de `columns` pour une ligne quand ce ne sont pas des
+    attributs de l'objet (expression calculée comme un rang de recherche).
+    """
+    query, limit = keyset(query, columns)
+    return make_page(query.all(), columns, limit, cursor_values)
+
+
+def page_payload(page, serialize):
+    items = [serialize(item) for item in page.items]
+    if not page.paginated:
+        return items
+    return {'items': items, 'next_cursor': page.next_cursor}
+
+
+def page_response(page, serialize):
+    return jsonify(page_payload(page, serialize))
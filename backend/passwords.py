@@ -0,0 +1,70 @@
+"""Hachage des mots de passe hors des threads de requête.
+
+Le KDF (scrypt par défaut) occupe le CPU plusieurs dizaines de millisecondes
+par appel. Les calculs passent par un pool de threads borné (hashlib libère
+le GIL pendant le calcul) : au plus PASSWORD_HASH_WORKERS calculs en même
+temps par processus et PASSWORD_HASH_QUEUE en attente. Au-delà, `HasherBusy`
+est levée et la requête reçoit un 503 au lieu de bloquer les autres routes.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from functools import cached_property
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+
+class HasherBusy(Exception):
+    """Trop de calculs de hachage en cours ou en attente."""
+
+
+class PasswordHasher:
+    def __init__(self, method, workers, queue_depth, timeout):
+        self.method = method
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self.slots = threading.BoundedSemaphore(workers + queue_depth)
+
+    def _run(self, fn, *args):
+        if not self.slots.acquire(blocking=False):
+            raise HasherBusy()
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        # La place est libérée à la fin du calcul, même après un timeout
+        future.add_done_callback(lambda _: self.slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeout:
+            raise HasherBusy()
+
+    def hash(self, password):
+        return self._run(generate_password_hash, password, self.method)
+
+    def check(self, pwhash, password):
+        return self._run(check_password_hash, pwhash, password)
+
+    @cached_property
+    def prefix(self):
+        # Méthode complète telle qu'écrite par werkzeug ("scrypt" devient
+        # "scrypt:32768:8:1") : calculée une fois, au premier besoin
+        return generate_password_hash('', self.method).split('$', 1)[0]
+
+    def needs_rehash(self, pwhash):
+        """Vrai si le hash a été calculé avec une autre méthode ou un autre coût."""
+        return pwhash.split('$', 1)[0] != self.prefix
+
+
+def init_password_hasher(app):
+    app.extensions['password_hasher'] = PasswordHasher(
+        method=app.config.get('PASSWORD_HASH_METHOD', 'scrypt'),
+        workers=app.config.get('PASSWORD_HASH_WORKERS', 2),
+        queue_depth=app.config.get('PASSWORD_HASH_QUEUE', 1),
+        timeout=app.config.get('PASSWORD_HASH_TIMEOUT', 10)
+    )
+
+
+def password_hasher():
+    return current_app.extensions['password_hasher']
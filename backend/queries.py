@@ -0,0 +1,85 @@
+"""Requêtes de lecture partagées par les vues Flask et l'application ASGI (asgi.py).
+
+Les requêtes sont construites sans session : les vues Flask les rattachent à
+`db.session` (`with_session`), asgi.py exécute leur `.statement` sur le
+moteur asynchrone. `args` remplace `request.args` hors d'une requête Flask.
+"""
+from sqlalchemy.orm import Query, contains_eager, load_only
+
+from models import Book, Classroom, ReadingAssignment, StudentReading, User
+from pagination import apply_filters
+from serializers import READING_FIELDS, SUBMISSION_FIELDS
+
+# Tri des listes de résumés, la dernière colonne départage
+READING_ORDER = (StudentReading.submitted_at, StudentReading.id)
+
+
+def _load_columns(selection):
+    # Colonnes demandées, plus celles du tri (curseur de pagination)
+    names = set(selection.fields) | {column.key for column in READING_ORDER}
+    return load_only(*(getattr(StudentReading, name) for name in sorted(names)))
+
+
+def _assignment_options(query):
+    """Jointures et chargement du devoir imbriqué : id, livre et classe."""
+    assignment = contains_eager(StudentReading.assignment)
+    return query.join(ReadingAssignment.book).options(
+        assignment.load_only(ReadingAssignment.id),
+        assignment.contains_eager(ReadingAssignment.book).load_only(Book.id, Book.title, Book.author),
+        assignment.contains_eager(ReadingAssignment.classroom).load_only(Classroom.id, Classroom.name)
+    )
+
+
+def _reading_filters(query, args):
+    return apply_filters(query, {
+        'status': StudentReading.status,
+        'assignment_id': StudentReading.assignment_id,
+        'classroom_id': ReadingAssignment.classroom_id,
+        'book_id': ReadingAssignment.book_id
+    }, date_column=StudentReading.submitted_at, args=args)
+
+
+def professor_readings(professor_id, args=None, selection=None):
+    """Lectures des classes du professeur, filtrées selon la query string.
+
+    Une seule requête : l'étudiant, le devoir, le livre et la classe sont
+    chargés par les jointures au lieu d'un db.session.get par ligne.
+    `selection` (serializers.READING_FIELDS) limite les colonnes lues et les
+    relations jointes ; par défaut, tout est chargé.
+    """
+    selection = selection or READING_FIELDS.full
+    query = Query(StudentReading).join(
+        StudentReading.assignment
+    ).join(
+        ReadingAssignment.classroom
+    ).filter(
+        Classroom.professor_id == professor_id
+    ).options(_load_columns(selection))
+    if 'student' in selection.include:
+        query = query.join(StudentReading.student).options(
+            contains_eager(StudentReading.student).load_only(User.id, User.first_name, User.last_name)
+        )
+    if 'assignment' in selection.include:
+        query = _assignment_options(query)
+    return _reading_filters(query, args)
+
+
+def student_submissions(student_id, args=None, selection=None):
+    """Résumés d'un étudiant avec leur devoir, leur livre et leur classe."""
+    selection = selection or SUBMISSION_FIELDS.full
+    query = Query(StudentReading).filter_by(user_id=student_id).join(
+        StudentReading.assignment
+    ).options(_load_columns(selection))
+    if 'assignment' in selection.include:
+        query = _assignment_options(query.join(ReadingAssignment.classroom))
+    return _reading_filters(query, args)
+
+
+def assignments(args=None):
+    """Devoirs avec leur livre, filtrés selon la query string."""
+    return apply_filters(
+        Query(ReadingAssignment).join(Book).options(contains_eager(ReadingAssignment.book)),
+        {'classroom_id': ReadingAssignment.classroom_id, 'book_id': ReadingAssignment.book_id},
+        date_column=ReadingAssignment.assigned_date,
+        args=args
+    )
@@ -0,0 +1,188 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import current_app, has_app_context, request
+from flask_jwt_extended import get_jwt_identity
+
+from change_tracking import on_commit
+from decorators import current_role
+
+
+class LocalCache:
+    """Cache LRU en mémoire du processus, avec durée de vie et taille maximale.
+
+    Les générations de tables ne sont connues que de ce processus : avec
+    plusieurs workers gunicorn, utiliser `RedisCache`.
+    """
+
+    def __init__(self, ttl=60, max_entries=1024, max_bytes=64 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._size += len(value)
+            while self._entries and (len(self._entries) > self.max_entries or self._size > self.max_bytes):
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key):
+        _, value = self._entries.pop(key)
+        self._size -= len(value)
+
+    def generations(self, tables):
+        with self._lock:
+            return [self._generations.get(table, 0) for table in tables]
+
+    def bump(self, tables):
+        with self._lock:
+            for table in tables:
+                self._generations[table] = self._generations.get(table, 0) + 1
+
+
+class RedisCache:
+    """Cache partagé entre workers sur un serveur compatible Redis."""
+
+    def __init__(self, client, ttl=60, prefix='esme:cache:'):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value):
+        self.client.set(self.prefix + key, value, ex=self.ttl)
+
+    def generations(self, tables):
+        values = self.client.mget([f'{self.prefix}gen:{table}' for table in tables])
+        return [int(value or 0) for value in values]
+
+    def bump(self, tables):
+        for table in tables:
+            self.client.incr(f'{self.prefix}gen:{table}')
+
+
+def init_response_cache(app):
+    """Installe le backend choisi par `RESPONSE_CACHE_BACKEND` (none, local ou redis)."""
+    backend = app.config.get('RESPONSE_CACHE_BACKEND', 'none')
+    ttl = app.config.get('RESPONSE_CACHE_TTL', 60)
+    if backend == 'local':
+        cache = LocalCache(ttl=ttl,
+                           max_entries=app.config.get('RESPONSE_CACHE_MAX_ENTRIES', 1024),
+                           max_bytes=app.config.get('RESPONSE_CACHE_MAX_BYTES', 64 * 1024 * 1024))
+    elif backend == 'redis':
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RESPONSE_CACHE_BACKEND=redis nécessite le paquet redis (pip install redis)")
+        cache = RedisCache(redis.Redis.from_url(app.config['RESPONSE_CACHE_URL']), ttl=ttl)
+    else:
+        cache = None
+    app.extensions['response_cache'] = cache
+
+
+@on_commit
+def _invalidate(tables):
+    # Les réponses qui lisent ces tables changent de clé : les anciennes ne
+    # sont plus jamais servies et finissent évincées (LRU ou expiration)
+    if has_app_context():
+        cache = current_app.extensions.get('response_cache')
+        if cache is not None:
+            cache.bump(tables)
+
+
+def _tee(chunks, store, max_bytes):
+    """Transmet une réponse en streaming tout en la copiant pour le cache."""
+    body = []
+    size = 0
+    try:
+        for chunk in chunks:
+            data = chunk.encode() if isinstance(chunk, str) else chunk
+            if body is not None:
+                size += len(data)
+                if size > max_bytes:
+                    body = None
+                else:
+                    body.append(data)
+            yield chunk
+        if body is not None:
+            store(b''.join(body))
+    finally:
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            close()
+
+
+def cached(*tables, scope='user'):
+    """Met en cache le corps des réponses 200 d'une vue qui ne lit que `tables`.
+
+    La clé dépend de l'URL, de l'en-tête Accept, de la génération de chaque
+    table et, selon `scope`, de l'utilisateur ('user'), de son rôle ('role')
+    ou de personne (None). Chaque commit qui écrit dans une de ces tables
+    incrémente sa génération (voir `_invalidate`).
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            cache = current_app.extensions.get('response_cache')
+            if cache is None:
+                return view(*args, **kwargs)
+
+            if scope == 'user':
+                owner = get_jwt_identity()
+            elif scope == 'role':
+                owner = current_role()
+            else:
+                owner = None
+            key = hashlib.sha1(repr((
+                request.endpoint, request.full_path, request.headers.get('Accept'),
+                owner, tables, cache.generations(tables)
+            )).encode()).hexdigest()
+
+            value = cache.get(key)
+            if value is not None:
+                mimetype, body = value.split(b'\n', 1)
+                response = current_app.response_class(body, mimetype=mimetype.decode())
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            response = current_app.make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+
+            header = response.mimetype.encode() + b'\n'
+            max_item_bytes = current_app.config.get('RESPONSE_CACHE_MAX_ITEM_BYTES', 4 * 1024 * 1024)
+            if response.is_streamed:
+                response.response = _tee(response.response, lambda body: cache.set(key, header + body),
+                                         max_item_bytes)
+            else:
+                body = response.get_data()
+                if len(body) <= max_item_bytes:
+                    cache.set(key, header + body)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
@@ -1,6 +1,11 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models import db, ReadingAssignment, Classroom, User, Book
+from pagination import PaginationError, paginate, page_response
+from http_cache import conditional
+from response_cache import cached
+from queries import assignments
+from serializers import ASSIGNMENT, ASSIGNMENT_BASE
 from datetime import datetime
 
 assignments_bp = Blueprint('assignments', __name__)
@@ -22,35 +27,22 @@ def create_assignment():
         db.session.add(assignment)
         db.session.commit()
         
-        return jsonify({
-            'id': assignment.id,
-            'book_id': assignment.book_id,
-            'classroom_id': assignment.classroom_id,
-            'assigned_date': assignment.assigned_date.isoformat(),
-            'due_date': assignment.due_date.isoformat() if assignment.due_date else None
-        }), 201
+        return jsonify(ASSIGNMENT_BASE(assignment)), 201
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
 @assignments_bp.route('/assignments', methods=['GET'])
 @jwt_required()
+@conditional('reading_assignment', 'book')
+@cached('reading_assignment', 'book', scope='role')
 def get_assignments():
     try:
-        assignments = ReadingAssignment.query.join(Book).all()
-        return jsonify([{
-            'id': a.id,
-            'book_id': a.book_id,
-            'classroom_id': a.classroom_id,
-            'assigned_date': a.assigned_date.isoformat(),
-            'due_date': a.due_date.isoformat() if a.due_date else None,
-            'book': {
-                'id': a.book.id,
-                'title': a.book.title,
-                'author': a.book.author,
-                'published_at': a.book.published_at.isoformat() if a.book.published_at else None
-            }
-        } for a in assignments])
+        query = assignments().with_session(db.session)
+        page = paginate(query, ReadingAssignment.id)
+        return page_response(page, ASSIGNMENT)
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -62,12 +54,7 @@ def get_assignment(id):
         if not assignment:
             return jsonify({'error': 'Devoir non trouvé'}), 404
         
-        return jsonify({
-            'id': assignment.id,
-            'book_id': assignment.book_id,
-            'classroom_id': assignment.classroom_id,
-            'assigned_date': assignment.assigned_date.isoformat()
-        })
+        return jsonify(ASSIGNMENT_BASE(assignment))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -90,13 +77,7 @@ def update_assignment(id):
             assignment.due_date = datetime.fromisoformat(data['due_date']) if data['due_date'] else None
         
         db.session.commit()
-        return jsonify({
-            'id': assignment.id,
-            'book_id': assignment.book_id,
-            'classroom_id': assignment.classroom_id,
-            'assigned_date': assignment.assigned_date.isoformat(),
-            'due_date': assignment.due_date.isoformat() if assignment.due_date else None
-        })
+        return jsonify(ASSIGNMENT_BASE(assignment))
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
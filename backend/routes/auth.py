@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import generate_password_hash, check_password_hash
 from models import db, User
+from decorators import user_claims
+from passwords import HasherBusy, password_hasher
+from serializers import USER
 from marshmallow import Schema, fields, validate
 
 auth_bp = Blueprint('auth', __name__)
@@ -34,7 +36,7 @@ def register():
     # Créer le nouvel utilisateur
     user = User(
         email=data['email'],
-        password=generate_password_hash(data['password']),
+        password=password_hasher().hash(data['password']),
         role=data['role'],
         first_name=data['first_name'],
         last_name=data['last_name']
@@ -55,19 +57,24 @@ def login():
         return jsonify({'error': 'Email et mot de passe requis'}), 400
     
     user = User.query.filter_by(email=data.get('email')).first()
-    if not user or not check_password_hash(user.password, data.get('password')):
+    hasher = password_hasher()
+    if not user or not hasher.check(user.password, data.get('password')):
         return jsonify({'error': 'Email ou mot de passe incorrect'}), 401
     
-    access_token = create_access_token(identity=str(user.id))
+    # Coût de hachage modifié depuis le dernier calcul : le mot de passe en
+    # clair est disponible, on en profite pour réécrire le hash
+    if hasher.needs_rehash(user.password):
+        try:
+            user.password = hasher.hash(data.get('password'))
+            db.session.commit()
+        except HasherBusy:
+            pass  # Sera fait à une prochaine connexion
+    
+    # Rôle et nom dans le jeton : les routes vérifient les droits sans relire User
+    access_token = create_access_token(identity=str(user.id), additional_claims=user_claims(user))
     return jsonify({
         'access_token': access_token,
-        'user': {
-            'id': user.id,
-            'email': user.email,
-            'role': user.role,
-            'first_name': user.first_name,
-            'last_name': user.last_name
-        }
+        'user': USER(user)
     })
 
 @auth_bp.route('/me', methods=['GET'])
@@ -79,10 +86,4 @@ def get_current_user():
     if not user:
         return jsonify({'error': 'Utilisateur non trouvé'}), 404
     
-    return jsonify({
-        'id': user.id,
-        'email': user.email,
-        'role': user.role,
-        'first_name': user.first_name,
-        'last_name': user.last_name
-    })
+    return jsonify(USER(user))
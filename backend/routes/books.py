@@ -1,18 +1,36 @@
-from flask import Blueprint, request, jsonify
-from models import db, Book, ReadingAssignment, StudentReading
+import click
+from flask import Blueprint, Response, current_app, request, jsonify, stream_with_context
+from models import db, Book
 from datetime import datetime
 from flask_jwt_extended import jwt_required
+from pagination import apply_filters, paginate, page_response
+from search import BOOKS, search_terms
+from http_cache import conditional
+from response_cache import cached
+from decorators import role_required
+from book_import import FORMATS, BookImportError, guess_format, import_books
+from streaming import NDJSON_MIMETYPE, wants_ndjson
+from serializers import BOOK
 
 books_bp = Blueprint('books', __name__)
 
 # �� Récupérer tous les livres
 @books_bp.route('/books', methods=['GET'])
+@conditional('book', public=True)
+@cached('book', scope=None)
 def get_books():
-    books = Book.query.all()
-    return jsonify([
-        {'id': b.id, 'title': b.title, 'author': b.author, 'published_at': b.published_at.strftime('%Y-%m-%d') if b.published_at else None}
-        for b in books
-    ])
+    query = apply_filters(Book.query, {'author': Book.author}, date_column=Book.published_at)
+    page = paginate(query, Book.id)
+    return page_response(page, BOOK)
+
+# 🔹 Rechercher des livres par titre ou auteur, les plus pertinents d'abord
+@books_bp.route('/books/search', methods=['GET'])
+@conditional('book', public=True)
+def search_books():
+    query, rank = BOOKS.search(db.session.query(Book), search_terms())
+    page = paginate(query.add_columns(rank.label('rank')), rank, Book.id,
+                    cursor_values=lambda row: (row.rank, row.Book.id))
+    return page_response(page, lambda row: BOOK(row.Book))
 
 # 🔹 Récupérer un livre par ID
 @books_bp.route('/books/<int:id>', methods=['GET'])
@@ -21,7 +39,7 @@ def get_book(id):
     book = db.session.get(Book, id)
     if not book:
         return jsonify({'error': 'Livre non trouvé'}), 404
-    return jsonify(book.to_dict())
+    return jsonify(BOOK(book))
 
 # 🔹 Ajouter un livre
 @books_bp.route('/books', methods=['POST'])
@@ -43,6 +61,62 @@ def add_book():
     db.session.commit()
     return jsonify({'message': 'Book added successfully', 'id': book.id}), 201
 
+# 🔹 Importer un catalogue de livres (CSV ou JSON Lines)
+@books_bp.route('/books/import', methods=['POST'])
+@role_required('professor')
+def import_books_file():
+    # Fichier envoyé en multipart (champ `file`) ou directement comme corps de la requête
+    upload = request.files.get('file')
+    if upload is not None:
+        stream, fmt = upload.stream, guess_format(upload.filename, upload.mimetype)
+    else:
+        stream, fmt = request.stream, guess_format(mimetype=request.mimetype)
+    fmt = request.args.get('format', fmt)
+    if fmt not in FORMATS:
+        return jsonify({'error': f"Format inconnu, attendu : {', '.join(FORMATS)}"}), 400
+
+    progress = import_books(stream, fmt, current_app.config['IMPORT_BATCH_SIZE'])
+    try:
+        # L'en-tête est lu avec le premier lot : ses erreurs donnent un 400
+        first = next(progress)
+    except BookImportError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if wants_ndjson():
+        # Un état par lot, envoyé au fil de l'import
+        dumps = current_app.json.dumps
+        def generate():
+            yield dumps(first) + '\n'
+            for state in progress:
+                yield dumps(state) + '\n'
+        return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
+    max_errors = current_app.config['IMPORT_MAX_ERRORS']
+    errors = first['errors'][:max_errors]
+    report = first
+    for report in progress:
+        errors.extend(report['errors'][:max_errors - len(errors)])
+    report['errors'] = errors
+    return jsonify(report), 200
+
+@books_bp.cli.command('import')
+@click.argument('file', type=click.File('rb'))
+@click.option('--format', 'fmt', type=click.Choice(FORMATS), help='Par défaut, déduit de l\'extension')
+@click.option('--batch-size', default=1000, show_default=True, help='Lignes insérées par transaction')
+def import_books_command(file, fmt, batch_size):
+    """Importe un catalogue de livres (CSV ou JSON Lines, `-` pour l'entrée standard)."""
+    fmt = fmt or guess_format(file.name)
+    if fmt is None:
+        raise click.UsageError('Format inconnu : préciser --format csv ou --format jsonl')
+    try:
+        for state in import_books(file, fmt, batch_size):
+            for error in state['errors']:
+                click.echo(f"ligne {error['line']} : {error['error']}", err=True)
+            click.echo(f"{state['processed']} lignes lues, {state['inserted']} ajoutées, "
+                       f"{state['duplicates']} doublons, {state['failed']} rejetées")
+    except BookImportError as e:
+        raise click.ClickException(str(e))
+
 # 🔹 Mettre à jour un livre
 @books_bp.route('/books/<int:id>', methods=['PUT'])
 @jwt_required()
@@ -77,20 +151,8 @@ def delete_book(id):
         if not book:
             return jsonify({'error': 'Livre non trouvé'}), 404
 
-        # Vérifier s'il y a des devoirs associés
-        assignments = ReadingAssignment.query.filter_by(book_id=id).all()
-        if assignments:
-            # Supprimer d'abord les devoirs associés
-            for assignment in assignments:
-                # Supprimer les lectures des étudiants associées à ce devoir
-                StudentReading.query.filter_by(assignment_id=assignment.id).delete()
-                # Supprimer le devoir
-                db.session.delete(assignment)
-            
-            # Commit les suppressions des devoirs
-            db.session.commit()
-
-        # Maintenant on peut supprimer le livre
+        # Les devoirs du livre et leurs lectures sont supprimés par la base
+        # (ON DELETE CASCADE), dans la même transaction
         db.session.delete(book)
         db.session.commit()
         
@@ -1,5 +1,14 @@
-from flask import Blueprint, request, jsonify
-from models import db, Classroom, User
+from flask import Blueprint, request, jsonify, current_app
+from sqlalchemy import select
+from models import db, Classroom, User, classroom_student
+from pagination import paginate, page_response
+from decorators import role_required
+from db_utils import dialect_insert
+from http_cache import conditional
+from response_cache import cached
+from change_tracking import touch_tables
+from dashboard_stats import classroom_stats
+from serializers import CLASSROOM, STUDENT
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from flask_cors import CORS
 
@@ -9,17 +18,11 @@ CORS(classrooms_bp, origins='*')
 # 🔹 Récupérer toutes les classes du professeur
 @classrooms_bp.route('/classrooms', methods=['GET'])
 @jwt_required()
+@cached('classroom')
 def get_classrooms():
     current_user_id = get_jwt_identity()
-    classrooms = Classroom.query.filter_by(professor_id=current_user_id).all()
-    return jsonify([
-        {
-            'id': c.id,
-            'name': c.name,
-            'professor_id': c.professor_id
-        }
-        for c in classrooms
-    ])
+    page = paginate(Classroom.query.filter_by(professor_id=current_user_id), Classroom.id)
+    return page_response(page, CLASSROOM)
 
 # 🔹 Créer une nouvelle classe
 @classrooms_bp.route('/classrooms', methods=['POST'])
@@ -41,11 +44,7 @@ def create_classroom():
 
         return jsonify({
             'message': 'Classe créée avec succès',
-            'classroom': {
-                'id': classroom.id,
-                'name': classroom.name,
-                'professor_id': classroom.professor_id
-            }
+            'classroom': CLASSROOM(classroom)
         }), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 422
@@ -63,11 +62,7 @@ def get_classroom(id):
     if classroom.professor_id != current_user_id:
         return jsonify({'error': 'Accès non autorisé'}), 403
 
-    return jsonify({
-        'id': classroom.id,
-        'name': classroom.name,
-        'professor_id': classroom.professor_id
-    })
+    return jsonify(CLASSROOM(classroom))
 
 # 🔹 Mettre à jour une classe
 @classrooms_bp.route('/classrooms/<int:id>', methods=['PUT'])
@@ -109,7 +104,14 @@ def delete_classroom(id):
     db.session.commit()
     return jsonify({'message': 'Classe supprimée avec succès'})
 
-# 🔹 Ajouter un étudiant à une classe
+def _parse_student_ids(data):
+    """Liste d'identifiants `student_ids` d'une requête groupée, ou None si invalide."""
+    ids = data.get('student_ids') if data else None
+    if not isinstance(ids, list) or not ids or not all(isinstance(i, int) for i in ids):
+        return None
+    return sorted(set(ids))
+
+# 🔹 Ajouter un ou plusieurs étudiants à une classe
 @classrooms_bp.route('/classrooms/<int:id>/students', methods=['POST'])
 @jwt_required()
 def add_student_to_classroom(id):
@@ -123,6 +125,9 @@ def add_student_to_classroom(id):
         return jsonify({'error': 'Accès non autorisé'}), 403
 
     data = request.get_json()
+    if data and 'student_ids' in data:
+        return _add_students_to_classroom(id, data)
+
     if not data or 'student_id' not in data:
         return jsonify({'error': 'ID de l\'étudiant requis'}), 400
 
@@ -130,14 +135,77 @@ def add_student_to_classroom(id):
     if not student or student.role != 'student':
         return jsonify({'error': 'Étudiant non trouvé'}), 404
 
-    if student in classroom.students:
+    if Classroom.has_student(id, student.id):
         return jsonify({'error': 'L\'étudiant est déjà dans cette classe'}), 400
 
-    classroom.students.append(student)
+    db.session.execute(classroom_student.insert().values(classroom_id=id, user_id=student.id))
+    touch_tables(db.session, 'classroom_student')
     db.session.commit()
 
     return jsonify({'message': 'Étudiant ajouté avec succès'}), 200
 
+def _add_students_to_classroom(classroom_id, data):
+    student_ids = _parse_student_ids(data)
+    if student_ids is None:
+        return jsonify({'error': 'student_ids doit être une liste non vide d\'identifiants'}), 400
+    if len(student_ids) > current_app.config['BULK_MAX_ITEMS']:
+        return jsonify({'error': f"Au plus {current_app.config['BULK_MAX_ITEMS']} étudiants par requête"}), 400
+
+    # Une requête pour valider les identifiants, une pour insérer : les
+    # étudiants déjà inscrits sont ignorés par ON CONFLICT DO NOTHING
+    valid_ids = set(db.session.scalars(
+        select(User.id).where(User.id.in_(student_ids), User.role == 'student')
+    ))
+    added = 0
+    if valid_ids:
+        result = db.session.execute(
+            dialect_insert(classroom_student).values([
+                {'classroom_id': classroom_id, 'user_id': student_id} for student_id in sorted(valid_ids)
+            ]).on_conflict_do_nothing()
+        )
+        added = result.rowcount
+        touch_tables(db.session, 'classroom_student')
+    db.session.commit()
+
+    return jsonify({
+        'message': 'Étudiants ajoutés avec succès',
+        'added': added,
+        'already_enrolled': len(valid_ids) - added,
+        'not_found': [i for i in student_ids if i not in valid_ids]
+    }), 200
+
+# 🔹 Retirer plusieurs étudiants d'une classe
+@classrooms_bp.route('/classrooms/<int:id>/students', methods=['DELETE'])
+@jwt_required()
+def remove_students_from_classroom(id):
+    current_user_id = int(get_jwt_identity())
+    classroom = db.session.get(Classroom, id)
+
+    if not classroom:
+        return jsonify({'error': 'Classe non trouvée'}), 404
+
+    if classroom.professor_id != current_user_id:
+        return jsonify({'error': 'Accès non autorisé'}), 403
+
+    student_ids = _parse_student_ids(request.get_json())
+    if student_ids is None:
+        return jsonify({'error': 'student_ids doit être une liste non vide d\'identifiants'}), 400
+    if len(student_ids) > current_app.config['BULK_MAX_ITEMS']:
+        return jsonify({'error': f"Au plus {current_app.config['BULK_MAX_ITEMS']} étudiants par requête"}), 400
+
+    result = db.session.execute(classroom_student.delete().where(
+        classroom_student.c.classroom_id == id,
+        classroom_student.c.user_id.in_(student_ids)
+    ))
+    touch_tables(db.session, 'classroom_student')
+    db.session.commit()
+
+    return jsonify({
+        'message': 'Étudiants retirés avec succès',
+        'removed': result.rowcount,
+        'not_enrolled': len(student_ids) - result.rowcount
+    }), 200
+
 # 🔹 Supprimer un étudiant d'une classe
 @classrooms_bp.route('/classrooms/<int:id>/students/<int:student_id>', methods=['DELETE'])
 @jwt_required()
@@ -155,17 +223,38 @@ def remove_student_from_classroom(id, student_id):
     if not student:
         return jsonify({'error': 'Étudiant non trouvé'}), 404
 
-    if student not in classroom.students:
+    result = db.session.execute(classroom_student.delete().where(
+        classroom_student.c.classroom_id == id,
+        classroom_student.c.user_id == student_id
+    ))
+    if result.rowcount == 0:
+        db.session.rollback()
         return jsonify({'error': 'L\'étudiant n\'est pas dans cette classe'}), 400
 
-    classroom.students.remove(student)
+    touch_tables(db.session, 'classroom_student')
     db.session.commit()
 
     return jsonify({'message': 'Étudiant supprimé avec succès'}), 200
 
+# 🔹 Statistiques de correction d'une classe, par devoir
+@classrooms_bp.route('/classrooms/<int:id>/stats', methods=['GET'])
+@role_required('professor')
+@conditional('classroom', 'classroom_student', 'reading_assignment', 'book', 'student_reading')
+def get_classroom_stats(id):
+    classroom = db.session.get(Classroom, id)
+
+    if not classroom:
+        return jsonify({'error': 'Classe non trouvée'}), 404
+
+    if classroom.professor_id != int(get_jwt_identity()):
+        return jsonify({'error': 'Accès non autorisé'}), 403
+
+    return jsonify(classroom_stats(classroom))
+
 # 🔹 Récupérer les étudiants d'une classe
 @classrooms_bp.route('/classrooms/<int:id>/students', methods=['GET'])
 @jwt_required()
+@conditional('classroom', 'classroom_student', 'user')
 def get_classroom_students(id):
     current_user_id = int(get_jwt_identity())
     classroom = db.session.get(Classroom, id)
@@ -176,27 +265,15 @@ def get_classroom_students(id):
     if classroom.professor_id != current_user_id:
         return jsonify({'error': 'Accès non autorisé'}), 403
 
-    return jsonify([{
-        'id': student.id,
-        'first_name': student.first_name,
-        'last_name': student.last_name,
-        'email': student.email
-    } for student in classroom.students])
+    query = User.query.join(
+        classroom_student, classroom_student.c.user_id == User.id
+    ).filter(classroom_student.c.classroom_id == id)
+    page = paginate(query, User.id)
+    return page_response(page, STUDENT)
 
 # 🔹 Récupérer tous les étudiants disponibles
 @classrooms_bp.route('/users/students', methods=['GET'])
-@jwt_required()
+@role_required('professor')
 def get_available_students():
-    current_user_id = int(get_jwt_identity())
-    user = db.session.get(User, current_user_id)
-
-    if not user or user.role != 'professor':
-        return jsonify({'error': 'Accès non autorisé'}), 403
-
-    students = User.query.filter_by(role='student').all()
-    return jsonify([{
-        'id': student.id,
-        'first_name': student.first_name,
-        'last_name': student.last_name,
-        'email': student.email
-    } for student in students])
+    page = paginate(User.query.filter_by(role='student'), User.id)
+    return page_response(page, STUDENT)
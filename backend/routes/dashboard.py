@@ -0,0 +1,15 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import get_jwt_identity
+
+from dashboard_stats import professor_summary
+from decorators import role_required
+from http_cache import conditional
+
+dashboard_bp = Blueprint('dashboard', __name__)
+
+# 🔹 Synthèse des corrections de toutes les classes du professeur
+@dashboard_bp.route('/dashboard/summary', methods=['GET'])
+@role_required('professor')
+@conditional('classroom', 'classroom_student', 'reading_assignment', 'student_reading')
+def get_dashboard_summary():
+    return jsonify(professor_summary(int(get_jwt_identity())))
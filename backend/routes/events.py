@@ -0,0 +1,45 @@
+from flask import Blueprint, Response, current_app, jsonify
+from flask_jwt_extended import get_jwt_identity, jwt_required
+
+from events import PING, user_audience
+
+events_bp = Blueprint('events', __name__)
+
+# 🔹 Flux Server-Sent Events des nouveaux résumés (professeurs) et des corrections (élèves)
+@events_bp.route('/events', methods=['GET'])
+# EventSource ne permet pas d'envoyer d'en-tête : jeton accepté dans ?jwt=
+@jwt_required(locations=['headers', 'query_string'])
+def stream_events():
+    broker = current_app.extensions['events']
+    heartbeat = current_app.config.get('EVENTS_HEARTBEAT', 15)
+    if broker.streams is not None and not broker.streams.acquire(blocking=False):
+        return jsonify({'error': 'Trop de flux ouverts, réessayez plus tard'}), 503, {'Retry-After': '5'}
+    subscription = None
+
+    def generate():
+        # Reconnexion automatique du navigateur après 5 s
+        yield 'retry: 5000\n\n'
+        while not subscription.lagging:
+            # Sans événement, un commentaire garde la connexion ouverte et
+            # détecte les clients partis (l'écriture échoue)
+            yield subscription.get(heartbeat) or PING
+
+    def close():
+        if subscription is not None:
+            broker.unsubscribe(subscription)
+        if broker.streams is not None:
+            broker.streams.release()
+
+    try:
+        subscription = broker.subscribe([user_audience(get_jwt_identity())])
+        # Le contexte de la requête n'est pas gardé : aucune connexion à la base
+        # n'est retenue pendant le flux
+        response = Response(generate(), mimetype='text/event-stream')
+        response.headers['Cache-Control'] = 'no-cache'
+        response.headers['X-Accel-Buffering'] = 'no'
+        response.call_on_close(close)
+    except Exception:
+        # Sans réponse, close() ne serait jamais appelé : la place serait perdue
+        close()
+        raise
+    return response
@@ -0,0 +1,9 @@
+from flask import Blueprint, Response, current_app
+
+metrics_bp = Blueprint('metrics', __name__)
+
+# 🔹 Métriques par endpoint au format Prometheus
+@metrics_bp.route('/metrics', methods=['GET'])
+def get_metrics():
+    registry = current_app.extensions['metrics']
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
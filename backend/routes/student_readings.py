@@ -1,81 +1,113 @@
-from flask import Blueprint, request, jsonify
-from flask_jwt_extended import jwt_required, get_jwt_identity
+from flask import Blueprint, request, jsonify, current_app
+from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
+from sqlalchemy import case, select, update
 from models import db, StudentReading, ReadingAssignment, User, Classroom, Book
+from pagination import PaginationError, apply_filters, is_paginated, paginate, page_response
+from streaming import stream_response
+from decorators import role_required
+from response_cache import cached
+from change_tracking import touch_tables
+from db_utils import dialect_insert
+from search import READINGS, search_terms
+from dashboard_stats import STATUSES, refresh_assignment_stats
+from events import publish, publish_many, user_audience
+from queries import READING_ORDER, professor_readings
+from serializers import MY_READING, READING, READING_FIELDS
 from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
 
 student_readings_bp = Blueprint('student_readings', __name__)
 
+SUBMITTED = READING.only('id', 'user_id', 'assignment_id', 'summary', 'status', 'submitted_at')
+GRADED = READING.only('id', 'assignment_id', 'status', 'validated_at')
+IDEMPOTENCY_KEY_LENGTH = StudentReading.idempotency_key.type.length
+
+def _replayed_submission(reading, summary):
+    """Réponse à un envoi répété avec la même Idempotency-Key : le résumé déjà
+    enregistré, sans nouvelle écriture."""
+    if reading.summary != summary:
+        return jsonify({'error': 'Idempotency-Key déjà utilisée pour un autre résumé'}), 422
+    response = jsonify(SUBMITTED(reading))
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response, 200
+
 @student_readings_bp.route('/student-readings', methods=['POST'])
-@jwt_required()
+@role_required('student')
 def create_student_reading():
     try:
-        print("🔍 Début de la création d'une lecture")
         current_user_id = int(get_jwt_identity())
-        print(f"👤 ID de l'utilisateur: {current_user_id}")
-        
         data = request.get_json()
-        print(f"📝 Données reçues: {data}")
-        
-        # Vérifier que l'utilisateur est un étudiant
-        user = db.session.get(User, current_user_id)
-        print(f"👤 Utilisateur trouvé: {user.first_name} {user.last_name} (Rôle: {user.role})")
-        
-        if not user:
-            print("❌ Utilisateur non trouvé")
-            return jsonify({'error': 'Utilisateur non trouvé'}), 404
-            
-        if user.role != 'student':
-            print(f"❌ Rôle incorrect: {user.role} (attendu: student)")
-            return jsonify({'error': 'Accès non autorisé'}), 403
+        key = request.headers.get('Idempotency-Key')
+        if key is not None and not 0 < len(key) <= IDEMPOTENCY_KEY_LENGTH:
+            return jsonify({'error': f'Idempotency-Key doit faire de 1 à {IDEMPOTENCY_KEY_LENGTH} caractères'}), 400
+        logger.debug("Création d'une lecture par l'utilisateur %s", current_user_id)
         
         # Vérifier que le devoir existe
         assignment = db.session.get(ReadingAssignment, data.get('assignment_id'))
-        print(f"📚 Devoir trouvé: {assignment.id if assignment else 'Non trouvé'}")
         
         if not assignment:
-            print("❌ Devoir non trouvé")
+            logger.debug("Devoir %s non trouvé", data.get('assignment_id'))
             return jsonify({'error': 'Devoir non trouvé'}), 404
         
         # Vérifier que l'étudiant est dans la classe
-        classroom = db.session.get(Classroom, assignment.classroom_id)
-        print(f"🏫 Classe trouvée: {classroom.name if classroom else 'Non trouvée'}")
-        
-        if classroom:
-            print(f"👥 Étudiants dans la classe: {[s.first_name for s in classroom.students]}")
-            print(f"🔍 Vérification si {user.first_name} est dans la classe")
-            
-        if not classroom or user not in classroom.students:
-            print(f"❌ L'étudiant {user.first_name} n'est pas dans la classe {classroom.name if classroom else 'Non trouvée'}")
+        if not Classroom.has_student(assignment.classroom_id, current_user_id):
+            logger.debug("L'étudiant %s n'est pas dans la classe %s", current_user_id, assignment.classroom_id)
             return jsonify({'error': 'Vous n\'êtes pas dans cette classe'}), 403
         
-        # Créer le nouveau résumé
-        student_reading = StudentReading(
-            user_id=current_user_id,
-            assignment_id=data.get('assignment_id'),
-            summary=data.get('summary'),
-            status='en_attente',
-            submitted_at=datetime.utcnow()
-        )
-        
-        db.session.add(student_reading)
+        summary = data.get('summary')
+        submitted_at = datetime.utcnow()
+        values = {'summary': summary, 'status': 'en_attente', 'submitted_at': submitted_at,
+                  'validated_at': None, 'idempotency_key': key}
+        same_student_reading = (StudentReading.user_id == current_user_id,
+                                StudentReading.assignment_id == assignment.id)
+
+        # Création ou remplacement décidé par les écritures elles-mêmes, et non
+        # par une lecture préalable : deux premiers envois simultanés ne
+        # créent qu'une ligne et un seul reçoit 201. L'INSERT ne renvoie la
+        # ligne que s'il l'a créée (ON CONFLICT DO NOTHING)
+        student_reading = db.session.execute(
+            dialect_insert(StudentReading).values(user_id=current_user_id, assignment_id=assignment.id, **values)
+            .on_conflict_do_nothing(index_elements=[StudentReading.user_id, StudentReading.assignment_id])
+            .returning(StudentReading),
+            execution_options={'populate_existing': True}
+        ).scalar_one_or_none()
+        created = student_reading is not None
+        if not created:
+            # Nouveau dépôt : il remplace le résumé précédent (à corriger de
+            # nouveau), sauf s'il répète la même Idempotency-Key
+            statement = update(StudentReading).where(*same_student_reading).values(updated_at=submitted_at, **values)
+            if key is not None:
+                statement = statement.where(StudentReading.idempotency_key.is_distinct_from(key))
+            student_reading = db.session.execute(
+                statement.returning(StudentReading),
+                execution_options={'populate_existing': True, 'synchronize_session': False}
+            ).scalar_one_or_none()
+        if student_reading is None:
+            db.session.rollback()
+            return _replayed_submission(db.session.execute(
+                select(StudentReading).where(*same_student_reading)
+            ).scalar_one(), summary)
+
+        touch_tables(db.session, 'student_reading')
+        refresh_assignment_stats(db.session.connection(), {assignment.id})
+        payload = SUBMITTED(student_reading)
+        # Nouveau résumé poussé au professeur de la classe (nom de l'élève lu dans le jeton)
+        claims = get_jwt()
+        publish([user_audience(db.session.scalar(
+            select(Classroom.professor_id).where(Classroom.id == assignment.classroom_id)
+        ))], 'reading.submitted', dict(payload, validated_at=None, student={
+            'id': current_user_id, 'first_name': claims.get('first_name'), 'last_name': claims.get('last_name')
+        }))
         db.session.commit()
         
-        print(f"✅ Résumé créé avec succès - ID: {student_reading.id}")
+        logger.debug("Résumé %s déposé pour le devoir %s", payload['id'], payload['assignment_id'])
         
-        return jsonify({
-            'id': student_reading.id,
-            'user_id': student_reading.user_id,
-            'assignment_id': student_reading.assignment_id,
-            'summary': student_reading.summary,
-            'status': student_reading.status,
-            'submitted_at': student_reading.submitted_at.isoformat()
-        }), 201
+        return jsonify(payload), 201 if created else 200
         
     except Exception as e:
-        print(f"❌ Erreur globale: {str(e)}")
-        print(f"Type d'erreur: {type(e)}")
-        import traceback
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Erreur lors de la création d'une lecture")
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
@@ -83,33 +115,26 @@ def create_student_reading():
 @jwt_required()
 def get_my_readings():
     current_user_id = int(get_jwt_identity())
-    user = db.session.get(User, current_user_id)
     
-    if not user:
-        return jsonify({'error': 'Utilisateur non trouvé'}), 404
+    # Récupérer les résumés de l'étudiant
+    query = apply_filters(
+        StudentReading.query.filter_by(user_id=current_user_id),
+        {'status': StudentReading.status, 'assignment_id': StudentReading.assignment_id},
+        date_column=StudentReading.submitted_at
+    )
+    page = paginate(query, StudentReading.submitted_at, StudentReading.id)
     
-    # Récupérer tous les résumés de l'étudiant
-    readings = StudentReading.query.filter_by(user_id=current_user_id).all()
-    
-    return jsonify([{
-        'id': r.id,
-        'assignment_id': r.assignment_id,
-        'summary': r.summary,
-        'status': r.status,
-        'submitted_at': r.submitted_at.isoformat(),
-        'validated_at': r.validated_at.isoformat() if r.validated_at else None
-    } for r in readings])
+    return page_response(page, MY_READING)
 
 @student_readings_bp.route('/student-readings/<int:id>', methods=['PATCH'])
-@jwt_required()
+@role_required('professor')
 def update_reading(id):
     current_user_id = int(get_jwt_identity())
-    data = request.get_json()
-    
-    # Vérifier que l'utilisateur est un professeur
-    user = db.session.get(User, current_user_id)
-    if not user or user.role != 'professor':
-        return jsonify({'error': 'Accès non autorisé'}), 403
+    data = request.get_json(silent=True)
+    status = data.get('status') if isinstance(data, dict) else None
+    if status not in STATUSES:
+        # Même contrôle que la correction groupée : pas de statut par défaut
+        return jsonify({'error': f"Statut invalide, attendu : {', '.join(STATUSES)}"}), 400
     
     # Récupérer le résumé
     reading = db.session.get(StudentReading, id)
@@ -124,84 +149,120 @@ def update_reading(id):
         return jsonify({'error': 'Accès non autorisé'}), 403
     
     # Mettre à jour le statut
-    reading.status = data.get('status', 'validated')
+    reading.status = status
     reading.validated_at = datetime.utcnow()
+    publish([user_audience(reading.user_id)], 'reading.graded', GRADED(reading))
     
     db.session.commit()
     
+    return jsonify(READING.only('id', 'status', 'validated_at')(reading))
+
+def _parse_reading_updates(data):
+    """Liste de `{id, status}` d'une correction groupée, ou None si invalide."""
+    items = data.get('readings') if isinstance(data, dict) else data
+    if not isinstance(items, list) or not items:
+        return None
+    if not all(isinstance(item, dict) and isinstance(item.get('id'), int) for item in items):
+        return None
+    return items
+
+# 🔹 Corriger plusieurs résumés en une seule transaction
+@student_readings_bp.route('/student-readings', methods=['PATCH'])
+@role_required('professor')
+def update_readings():
+    current_user_id = int(get_jwt_identity())
+    items = _parse_reading_updates(request.get_json(silent=True))
+    if items is None:
+        return jsonify({'error': 'readings doit être une liste non vide de {id, status}'}), 400
+    if len(items) > current_app.config['BULK_MAX_ITEMS']:
+        return jsonify({'error': f"Au plus {current_app.config['BULK_MAX_ITEMS']} résumés par requête"}), 400
+
+    # Une seule jointure pour savoir à quel professeur appartient chaque résumé
+    ids = {item['id'] for item in items}
+    rows = db.session.execute(
+        select(StudentReading.id, Classroom.professor_id, StudentReading.assignment_id, StudentReading.user_id)
+        .join(StudentReading.assignment)
+        .join(ReadingAssignment.classroom)
+        .where(StudentReading.id.in_(ids))
+    ).all()
+    owners = {row.id: row.professor_id for row in rows}
+    assignments = {row.id: row.assignment_id for row in rows}
+    students = {row.id: row.user_id for row in rows}
+
+    results = []
+    statuses = {}
+    for item in items:
+        status = item.get('status')
+        if item['id'] not in owners:
+            results.append({'id': item['id'], 'error': 'Résumé non trouvé'})
+        elif owners[item['id']] != current_user_id:
+            results.append({'id': item['id'], 'error': 'Accès non autorisé'})
+        elif status not in STATUSES:
+            # Un autre statut sortirait des compteurs des tableaux de bord
+            results.append({'id': item['id'], 'error': f"Statut invalide, attendu : {', '.join(STATUSES)}"})
+        else:
+            # Un identifiant répété garde son dernier statut
+            statuses[item['id']] = status
+            results.append({'id': item['id'], 'status': status})
+
+    validated_at = datetime.utcnow()
+    if statuses:
+        # Un seul UPDATE : le nouveau statut de chaque ligne est choisi par CASE
+        db.session.execute(
+            update(StudentReading)
+            .where(StudentReading.id.in_(statuses))
+            .values(status=case(statuses, value=StudentReading.id), validated_at=validated_at)
+            .execution_options(synchronize_session=False)
+        )
+        touch_tables(db.session, 'student_reading')
+        refresh_assignment_stats(db.session.connection(), {assignments[i] for i in statuses})
+        # Une correction poussée à chaque élève concerné
+        publish_many([([user_audience(students[reading_id])], 'reading.graded', {
+            'id': reading_id, 'assignment_id': assignments[reading_id],
+            'status': status, 'validated_at': validated_at.isoformat()
+        }) for reading_id, status in statuses.items()])
+    db.session.commit()
+
+    for result in results:
+        if 'status' in result:
+            result['status'] = statuses[result['id']]
+            result['validated_at'] = validated_at.isoformat()
     return jsonify({
-        'id': reading.id,
-        'status': reading.status,
-        'validated_at': reading.validated_at.isoformat()
-    })
+        'updated': len(statuses),
+        'failed': sum(1 for result in results if 'error' in result),
+        'results': results
+    }), 200
 
 @student_readings_bp.route('/student-readings', methods=['GET'])
-@jwt_required()
+@role_required('professor')
+@cached('student_reading', 'reading_assignment', 'book', 'classroom', 'user')
 def get_all_readings():
     try:
-        print("🔍 Début de la requête GET /student-readings")
         current_user_id = int(get_jwt_identity())
-        print(f"👤 ID du professeur: {current_user_id}")
-        
-        # Vérifier que l'utilisateur est un professeur
-        professor = db.session.get(User, current_user_id)
-        print(f"👤 Professeur trouvé: {professor.first_name} {professor.last_name}")
-        
-        if not professor or professor.role != 'professor':
-            print("❌ Accès refusé: Utilisateur non professeur")
-            return jsonify({'error': 'Accès non autorisé'}), 403
+        # ?fields= et ?include= : seules les colonnes et relations demandées sont lues
+        selection = READING_FIELDS.select()
+        query = professor_readings(current_user_id, selection=selection).with_session(db.session)
         
-        # Récupérer toutes les lectures des classes du professeur
-        readings = StudentReading.query.join(
-            ReadingAssignment
-        ).join(
-            Classroom
-        ).filter(
-            Classroom.professor_id == current_user_id
-        ).all()
+        # Export complet : envoyé en streaming plutôt que construit en mémoire
+        if not is_paginated():
+            return stream_response(query.order_by(*READING_ORDER), selection.serialize)
         
-        print(f"📚 Nombre de lectures trouvées: {len(readings)}")
-        
-        result = []
-        for r in readings:
-            # Récupérer les données associées
-            student = db.session.get(User, r.user_id)
-            assignment = db.session.get(ReadingAssignment, r.assignment_id)
-            book = db.session.get(Book, assignment.book_id) if assignment else None
-            classroom = db.session.get(Classroom, assignment.classroom_id) if assignment else None
-            
-            result.append({
-                'id': r.id,
-                'assignment_id': r.assignment_id,
-                'user_id': r.user_id,
-                'summary': r.summary,
-                'status': r.status,
-                'submitted_at': r.submitted_at.isoformat(),
-                'validated_at': r.validated_at.isoformat() if r.validated_at else None,
-                'student': {
-                    'id': student.id,
-                    'first_name': student.first_name,
-                    'last_name': student.last_name
-                } if student else None,
-                'assignment': {
-                    'id': assignment.id,
-                    'book': {
-                        'id': book.id,
-                        'title': book.title,
-                        'author': book.author
-                    } if book else None,
-                    'classroom': {
-                        'id': classroom.id,
-                        'name': classroom.name
-                    } if classroom else None
-                } if assignment else None
-            })
-        
-        print("✅ Données préparées avec succès")
-        return jsonify(result)
+        page = paginate(query, *READING_ORDER)
+        logger.debug("%d lectures trouvées pour le professeur %s", len(page.items), current_user_id)
+        return page_response(page, selection.serialize)
         
+    except PaginationError as e:
+        return jsonify({'error': str(e)}), 400
     except Exception as e:
-        print(f"❌ Erreur: {str(e)}")
-        import traceback
-        print(f"Traceback: {traceback.format_exc()}")
+        logger.exception("Erreur lors de la récupération des lectures")
         return jsonify({'error': str(e)}), 500
+
+# 🔹 Rechercher dans les résumés des classes du professeur
+@student_readings_bp.route('/student-readings/search', methods=['GET'])
+@role_required('professor')
+def search_readings():
+    query = professor_readings(int(get_jwt_identity())).with_session(db.session)
+    query, rank = READINGS.search(query, search_terms())
+    page = paginate(query.add_columns(rank.label('rank')), rank, StudentReading.id,
+                    cursor_values=lambda row: (row.rank, row.StudentReading.id))
+    return page_response(page, lambda row: READING(row.StudentReading))
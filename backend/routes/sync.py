@@ -0,0 +1,23 @@
+import click
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import get_jwt_identity, jwt_required
+
+from decorators import current_role
+from sync import SyncExpired, changes, parse_limit, prune_tombstones
+
+sync_bp = Blueprint('sync', __name__)
+
+# 🔹 Livres, devoirs et résumés modifiés ou supprimés depuis le curseur `since`
+@sync_bp.route('/sync', methods=['GET'])
+@jwt_required()
+def sync():
+    try:
+        return jsonify(changes(int(get_jwt_identity()), current_role(),
+                               since=request.args.get('since'), limit=parse_limit(request.args)))
+    except SyncExpired:
+        return jsonify({'error': 'Curseur expiré, synchronisation complète nécessaire (sans since)'}), 410
+
+@sync_bp.cli.command('prune')
+def prune_command():
+    """Supprime les suppressions plus anciennes que SYNC_TOMBSTONE_DAYS (à lancer par cron)."""
+    click.echo(f'{prune_tombstones()} suppressions effacées')
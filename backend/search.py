@@ -0,0 +1,93 @@
+import re
+
+from flask import request
+from sqlalchemy import DDL, Float, event, func, literal_column, table, column
+
+from extensions import db
+from models import Book, StudentReading
+from pagination import PaginationError
+
+# Nombre maximal de mots pris en compte dans une recherche
+MAX_TERMS = 8
+
+
+class FullTextIndex:
+    """Index plein texte d'une table, selon le dialecte de la base.
+
+    PostgreSQL : index GIN sur l'expression `to_tsvector(...)`, tenu à jour
+    par la base à chaque INSERT/UPDATE, même groupé. SQLite (tests, poste
+    local) : table virtuelle FTS5 à contenu externe, alimentée par des
+    triggers.
+    """
+
+    def __init__(self, model, columns, pg_config):
+        self.model = model
+        self.table = model.__table__
+        self.columns = columns
+        self.fts_name = f'{self.table.name}_fts'
+        document = " || ' ' || ".join(f"coalesce({name}, '')" for name in columns)
+        self.pg_document = f"to_tsvector('{pg_config}', {document})"
+        self.pg_config = pg_config
+
+    def ddl(self):
+        """Instructions exécutées après la création de la table, par dialecte."""
+        name, table_name = self.fts_name, self.table.name
+        names = ', '.join(self.columns)
+        new_values = ', '.join(f'new.{c}' for c in self.columns)
+        old_values = ', '.join(f'old.{c}' for c in self.columns)
+        delete_old = (f"INSERT INTO {name}({name}, rowid, {names}) "
+                      f"VALUES ('delete', old.id, {old_values});")
+        insert_new = f"INSERT INTO {name}(rowid, {names}) VALUES (new.id, {new_values});"
+        return {
+            'postgresql': [
+                f'CREATE INDEX IF NOT EXISTS ix_{table_name}_search ON {table_name} USING GIN ({self.pg_document})',
+            ],
+            'sqlite': [
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {name} USING fts5({names}, content='{table_name}', "
+                f"content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+                f'CREATE TRIGGER IF NOT EXISTS {name}_ai AFTER INSERT ON {table_name} BEGIN {insert_new} END',
+                f'CREATE TRIGGER IF NOT EXISTS {name}_ad AFTER DELETE ON {table_name} BEGIN {delete_old} END',
+                f'CREATE TRIGGER IF NOT EXISTS {name}_au AFTER UPDATE ON {table_name} '
+                f'BEGIN {delete_old} {insert_new} END',
+            ],
+        }
+
+    def register(self):
+        for dialect, statements in self.ddl().items():
+            for statement in statements:
+                event.listen(self.table, 'after_create', DDL(statement).execute_if(dialect=dialect))
+        event.listen(self.table, 'before_drop',
+                     DDL(f'DROP TABLE IF EXISTS {self.fts_name}').execute_if(dialect='sqlite'))
+
+    def search(self, query, terms):
+        """Restreint `query` aux lignes qui contiennent tous les `terms` (préfixes
+        acceptés) et retourne (query, rang) ; un rang plus petit est meilleur."""
+        dialect = db.session.get_bind().dialect.name
+        if dialect == 'postgresql':
+            document = literal_column(self.pg_document)
+            tsquery = func.to_tsquery(literal_column(f"'{self.pg_config}'"),
+                                      ' & '.join(f'{term}:*' for term in terms))
+            rank = -func.ts_rank(document, tsquery, type_=Float)
+            return query.filter(document.op('@@')(tsquery)), rank
+
+        fts = table(self.fts_name, column('rowid'))
+        match = ' '.join(f'"{term}"*' for term in terms)
+        rank = func.bm25(literal_column(self.fts_name), type_=Float)
+        query = query.join(fts, fts.c.rowid == self.table.c.id).filter(
+            literal_column(self.fts_name).op('MATCH')(match)
+        )
+        return query, rank
+
+
+BOOKS = FullTextIndex(Book, ['title', 'author'], 'simple')
+READINGS = FullTextIndex(StudentReading, ['summary'], 'french')
+BOOKS.register()
+READINGS.register()
+
+
+def search_terms():
+    """Mots du paramètre `q` ; 400 si la recherche est vide."""
+    terms = re.findall(r'\w+', request.args.get('q', ''))[:MAX_TERMS]
+    if not terms:
+        raise PaginationError('Paramètre q requis')
+    return [term.lower() for term in terms]
@@ -0,0 +1,192 @@
+"""Sérialisation des modèles en dictionnaires JSON.
+
+Chaque `Serializer` est compilé une fois en une fonction qui construit le
+dictionnaire en une seule expression (`{'id': obj.id, ...}`), sans boucle ni
+getattr par champ. Les valeurs déjà chargées sont lues directement dans
+`obj.__dict__`. `only()` donne le même sérialiseur restreint à certains
+champs, compilé lui aussi et gardé en cache.
+
+`init_json(app)` remplace l'encodeur JSON de Flask par orjson s'il est
+installé (JSON_ENCODER) : jsonify, les réponses en streaming et asgi.py en
+profitent sans changement.
+"""
+from flask import request
+from flask.json.provider import DefaultJSONProvider
+
+from pagination import PaginationError
+
+
+def iso(value):
+    return value.isoformat() if value is not None else None
+
+
+def day(value):
+    return value.strftime('%Y-%m-%d') if value is not None else None
+
+
+# Conversions écrites directement dans le code compilé ({} : la valeur)
+_INLINE = {
+    iso: '{}.isoformat()',
+    day: "{}.strftime('%Y-%m-%d')",
+}
+
+
+class Serializer:
+    """Champs à sérialiser : nom d'attribut, ou (nom, conversion).
+
+    La conversion est une fonction (iso, day...) ou un autre Serializer pour
+    un objet lié ; une relation vide donne None.
+    """
+
+    def __init__(self, *fields):
+        self.fields = tuple(field if isinstance(field, tuple) else (field, None) for field in fields)
+        self.names = tuple(name for name, _ in self.fields)
+        self._subsets = {}
+        self._serialize = self._compile()
+
+    def _compile(self):
+        namespace = {}
+        items = []
+        for i, (name, convert) in enumerate(self.fields):
+            # Valeur déjà chargée : lue dans __dict__ sans passer par le
+            # descripteur SQLAlchemy ; sinon l'attribut la charge normalement
+            value = f'(d[{name!r}] if {name!r} in d else obj.{name})'
+            if isinstance(convert, Serializer):
+                namespace[f'nested_{i}'] = convert._serialize
+                value = f'(nested_{i}(v{i}) if (v{i} := {value}) is not None else None)'
+            elif convert in _INLINE:
+                value = f'({_INLINE[convert].format(f"v{i}")} if (v{i} := {value}) is not None else None)'
+            elif convert is not None:
+                namespace[f'convert_{i}'] = convert
+                value = f'convert_{i}({value})'
+            items.append(f'{name!r}: {value}')
+        source = 'def serialize(obj):\n    d = obj.__dict__\n    return {' + ', '.join(items) + '}\n'
+        exec(compile(source, f'<serializer {",".join(self.names)}>', 'exec'), namespace)
+        return namespace['serialize']
+
+    def __call__(self, obj):
+        return self._serialize(obj)
+
+    def only(self, *names):
+        """Même sérialiseur limité à `names` (dans l'ordre de la déclaration)."""
+        key = frozenset(names)
+        if key not in self._subsets:
+            unknown = key - set(self.names)
+            if unknown:
+                raise KeyError(', '.join(sorted(unknown)))
+            self._subsets[key] = Serializer(*(field for field in self.fields if field[0] in key))
+        return self._subsets[key]
+
+
+USER = Serializer('id', 'first_name', 'last_name', 'email', 'role')
+STUDENT = USER.only('id', 'first_name', 'last_name', 'email')
+USER_BRIEF = USER.only('id', 'first_name', 'last_name')
+
+CLASSROOM = Serializer('id', 'name', 'professor_id')
+CLASSROOM_BRIEF = CLASSROOM.only('id', 'name')
+
+BOOK = Serializer('id', 'title', 'author', ('published_at', day))
+BOOK_BRIEF = BOOK.only('id', 'title', 'author')
+
+ASSIGNMENT = Serializer(
+    'id', 'book_id', 'classroom_id', ('assigned_date', iso), ('due_date', iso),
+    # Date complète ici, contrairement à /books
+    ('book', Serializer('id', 'title', 'author', ('published_at', iso)))
+)
+ASSIGNMENT_BASE = ASSIGNMENT.only('id', 'book_id', 'classroom_id', 'assigned_date', 'due_date')
+
+READING = Serializer(
+    'id', 'assignment_id', 'user_id', 'summary', 'status', ('submitted_at', iso), ('validated_at', iso),
+    ('student', USER_BRIEF),
+    ('assignment', Serializer('id', ('book', BOOK_BRIEF), ('classroom', CLASSROOM_BRIEF)))
+)
+MY_READING = READING.only('id', 'assignment_id', 'summary', 'status', 'submitted_at', 'validated_at')
+SUBMISSION = READING.only('id', 'assignment_id', 'summary', 'status', 'submitted_at', 'validated_at', 'assignment')
+
+
+class Selection:
+    def __init__(self, fields, include, serializer):
+        self.fields = fields
+        self.include = include
+        self.serialize = serializer
+
+
+class Fieldset:
+    """Champs (`?fields=`) et relations (`?include=`) qu'une liste peut renvoyer.
+
+    Sans paramètre, la réponse garde sa forme complète. Avec `fields` seul,
+    aucune relation n'est incluse. Les requêtes (queries.py) ne chargent que
+    les colonnes et les jointures de la sélection.
+    """
+
+    def __init__(self, serializer, relations):
+        self.serializer = serializer
+        self.relations = tuple(relations)
+        self.columns = tuple(name for name in serializer.names if name not in self.relations)
+
+    def _names(self, args, param, allowed):
+        names = [name for name in args[param].split(',') if name]
+        unknown = sorted(set(names) - set(allowed))
+        if unknown:
+            raise PaginationError(f"Paramètre {param} invalide : {', '.join(unknown)} "
+                                  f"(attendu parmi {', '.join(allowed)})")
+        return tuple(name for name in allowed if name in names)
+
+    def select(self, args=None):
+        args = request.args if args is None else args
+        fields = self._names(args, 'fields', self.columns) if 'fields' in args else ()
+        fields = fields or self.columns
+        if 'include' in args:
+            include = self._names(args, 'include', self.relations)
+        else:
+            include = () if 'fields' in args else self.relations
+        return Selection(fields, include, self.serializer.only(*fields, *include))
+
+    @property
+    def full(self):
+        return Selection(self.columns, self.relations, self.serializer)
+
+
+READING_FIELDS = Fieldset(READING, relations=('student', 'assignment'))
+SUBMISSION_FIELDS = Fieldset(SUBMISSION, relations=('assignment',))
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Encodeur orjson, avec les mêmes conversions que l'encodeur de Flask
+    (dates au format HTTP, Decimal, UUID...) et les clés triées."""
+
+    def _dumps(self, obj):
+        import orjson
+        option = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def dumps(self, obj, **kwargs):
+        # Indentation ou options de json.dumps : encodeur standard
+        if set(kwargs) - {'separators'}:
+            return super().dumps(obj, **kwargs)
+        return self._dumps(obj).decode()
+
+    def response(self, *args, **kwargs):
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            return super().response(*args, **kwargs)
+        if args and kwargs:
+            raise TypeError('app.json.response() takes either args or kwargs, not both')
+        obj = (args[0] if len(args) == 1 else args) if args else (kwargs or None)
+        return self._app.response_class(self._dumps(obj) + b'\n', mimetype=self.mimetype)
+
+
+def init_json(app):
+    """Installe l'encodeur choisi par `JSON_ENCODER` : auto (orjson s'il est
+    installé), orjson ou json (encodeur standard de Flask)."""
+    encoder = app.config.get('JSON_ENCODER', 'auto')
+    if encoder == 'json':
+        return
+    try:
+        import orjson  # noqa: F401
+    except ImportError:
+        if encoder == 'orjson':
+            raise RuntimeError("JSON_ENCODER=orjson nécessite le paquet orjson (pip install orjson)")
+        return
+    app.json = OrjsonProvider(app)
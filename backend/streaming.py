@@ -0,0 +1,37 @@
+from flask import Response, current_app, request, stream_with_context
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def wants_ndjson(accept_mimetypes=None):
+    accept_mimetypes = request.accept_mimetypes if accept_mimetypes is None else accept_mimetypes
+    best = accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE])
+    return best == NDJSON_MIMETYPE
+
+
+def stream_response(query, serialize):
+    """Envoie le résultat de `query` au fil de l'eau.
+
+    Les lignes sont lues par lots (`yield_per`) et sérialisées une à une :
+    la mémoire reste constante et le premier octet part avant la fin de la
+    requête. Le format est un tableau JSON, ou du NDJSON si le client envoie
+    `Accept: application/x-ndjson`.
+    """
+    batch_size = current_app.config.get('STREAM_BATCH_SIZE', 500)
+    dumps = current_app.json.dumps
+    # La requête est exécutée ici pour que ses erreurs remontent avant l'envoi des en-têtes
+    rows = iter(query.yield_per(batch_size))
+
+    if wants_ndjson():
+        def generate():
+            for row in rows:
+                yield dumps(serialize(row)) + '\n'
+        return Response(stream_with_context(generate()), mimetype=NDJSON_MIMETYPE)
+
+    def generate():
+        separator = '['
+        for row in rows:
+            yield separator + dumps(serialize(row))
+            separator = ','
+        yield '[]' if separator == '[' else ']'
+    return Response(stream_with_context(generate()), mimetype='application/json')
@@ -0,0 +1,242 @@
+"""Synchronisation incrémentale des livres, devoirs et résumés (GET /api/sync).
+
+Un client garde ces données localement et ne demande ensuite que ce qui a
+changé depuis son dernier appel : les lignes dont `updated_at` dépasse sa
+position, et les suppressions enregistrées dans `sync_tombstone` par des
+triggers (y compris les ON DELETE CASCADE). Le coût dépend du nombre de
+changements, pas de la taille des tables.
+
+Une suppression est enregistrée pour chaque utilisateur qui voyait la ligne :
+le professeur et les élèves de la classe pour un devoir, l'élève et son
+professeur pour un résumé. Chacun ne reçoit donc que les siennes, et un élève
+retiré d'une classe reçoit la suppression des devoirs de cette classe. Les
+destinataires sont calculés par le trigger tant que la classe existe encore :
+triggers BEFORE DELETE sur les parents, dont les enfants partent en cascade.
+
+Le curseur donne, pour chaque section, la position (date, id) atteinte.
+Une section lue jusqu'au bout repart de la date de début de l'appel moins
+`SYNC_OVERLAP` secondes : une écriture dont la transaction n'était pas encore
+validée pendant la lecture est renvoyée au prochain appel. Une même ligne
+peut donc revenir deux fois ; le client l'applique par id.
+"""
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import DDL, delete, event, or_
+from sqlalchemy.orm import Query, contains_eager
+
+from extensions import db
+from models import Book, Classroom, ReadingAssignment, StudentReading, SyncTombstone, User, classroom_student
+from pagination import PaginationError, decode_cursor, encode_cursor, keyset_after
+from serializers import ASSIGNMENT_BASE, BOOK, MY_READING, READING
+
+# Tables suivies et nom de leur section dans la réponse
+TABLES = {'book': 'books', 'reading_assignment': 'assignments', 'student_reading': 'readings'}
+
+PROFESSOR_READING = READING.only('id', 'assignment_id', 'user_id', 'summary', 'status', 'submitted_at',
+                                 'validated_at', 'student')
+
+
+class SyncExpired(Exception):
+    """Curseur plus ancien que les suppressions conservées (renvoyé en 410)."""
+
+
+class Section:
+    def __init__(self, name, timestamp, scope, serialize):
+        self.name = name
+        self.columns = (timestamp, timestamp.class_.id)
+        self.scope = scope
+        self.serialize = serialize
+
+
+def _books(user_id, role):
+    return Query(Book)
+
+
+def _assignments(user_id, role):
+    query = Query(ReadingAssignment)
+    if role == 'professor':
+        return query.join(ReadingAssignment.classroom).filter(Classroom.professor_id == user_id)
+    return query.join(classroom_student, classroom_student.c.classroom_id == ReadingAssignment.classroom_id) \
+        .filter(classroom_student.c.user_id == user_id)
+
+
+def _readings(user_id, role):
+    if role == 'professor':
+        return Query(StudentReading).join(StudentReading.assignment).join(ReadingAssignment.classroom) \
+            .join(StudentReading.student).filter(Classroom.professor_id == user_id).options(
+                contains_eager(StudentReading.student).load_only(User.id, User.first_name, User.last_name)
+            )
+    return Query(StudentReading).filter(StudentReading.user_id == user_id)
+
+
+SECTIONS = (
+    Section('books', Book.updated_at, _books, lambda role: BOOK),
+    Section('assignments', ReadingAssignment.updated_at, _assignments, lambda role: ASSIGNMENT_BASE),
+    Section('readings', StudentReading.updated_at, _readings,
+            lambda role: PROFESSOR_READING if role == 'professor' else MY_READING),
+)
+TOMBSTONE_ORDER = (SyncTombstone.deleted_at, SyncTombstone.id)
+CURSOR_COLUMNS = tuple(column for section in SECTIONS for column in section.columns) + TOMBSTONE_ORDER
+
+
+def _read(query, columns, position, limit):
+    """Lignes suivant `position` dans l'ordre de `columns`, et si la lecture est complète."""
+    if position is not None:
+        query = query.filter(keyset_after(columns, position))
+    rows = query.with_session(db.session).order_by(*columns).limit(limit + 1).all()
+    return rows[:limit], len(rows) <= limit
+
+
+def _positions(since):
+    if not since:
+        return [None] * (len(SECTIONS) + 1)
+    values = decode_cursor(since, CURSOR_COLUMNS)
+    return [tuple(values[i:i + 2]) for i in range(0, len(values), 2)]
+
+
+def _retention():
+    return timedelta(days=current_app.config.get('SYNC_TOMBSTONE_DAYS', 30))
+
+
+def prune_tombstones():
+    """Supprime les suppressions plus anciennes que `SYNC_TOMBSTONE_DAYS` (flask sync prune)."""
+    expired = SyncTombstone.deleted_at < datetime.utcnow() - _retention()
+    result = db.session.execute(delete(SyncTombstone).where(expired))
+    db.session.commit()
+    return result.rowcount
+
+
+def changes(user_id, role, since=None, limit=500):
+    """Changements visibles par l'utilisateur depuis le curseur `since`."""
+    started_at = datetime.utcnow()
+    positions = _positions(since)
+    deleted_position = positions[-1]
+    if deleted_position is not None and deleted_position[0] < started_at - _retention():
+        raise SyncExpired()
+
+    # Position atteinte par une section lue jusqu'au bout, jamais en arrière
+    caught_up = (started_at - timedelta(seconds=current_app.config.get('SYNC_OVERLAP', 5)), 0)
+
+    payload = {}
+    cursor = []
+    has_more = False
+    for section, position in zip(SECTIONS, positions):
+        rows, complete = _read(section.scope(user_id, role), section.columns, position, limit)
+        serialize = section.serialize(role)
+        payload[section.name] = {'changed': [serialize(row) for row in rows], 'deleted': []}
+        if complete:
+            cursor.extend(max(caught_up, position) if position is not None else caught_up)
+        else:
+            cursor.extend(getattr(rows[-1], column.key) for column in section.columns)
+        has_more = has_more or not complete
+
+    # Sans curseur, le client part d'un état vide : aucune suppression à lui transmettre
+    if deleted_position is None:
+        tombstones, complete = [], True
+    else:
+        query = Query(SyncTombstone).filter(SyncTombstone.table_name.in_(TABLES),
+                                            or_(SyncTombstone.user_id == user_id, SyncTombstone.user_id.is_(None)))
+        tombstones, complete = _read(query, TOMBSTONE_ORDER, deleted_position, limit)
+    for tombstone in tombstones:
+        deleted = payload[TABLES[tombstone.table_name]]['deleted']
+        # Une cascade peut enregistrer deux fois la même suppression
+        if tombstone.row_id not in deleted:
+            deleted.append(tombstone.row_id)
+    if complete:
+        cursor.extend(max(caught_up, deleted_position) if deleted_position is not None else caught_up)
+    else:
+        cursor.extend((tombstones[-1].deleted_at, tombstones[-1].id))
+
+    payload['cursor'] = encode_cursor(cursor)
+    payload['has_more'] = has_more or not complete
+    return payload
+
+
+def parse_limit(args):
+    max_limit = current_app.config.get('PAGE_SIZE_MAX', 500)
+    try:
+        limit = int(args.get('limit', max_limit))
+    except ValueError:
+        raise PaginationError('Paramètre limit invalide, entier attendu')
+    if not 1 <= limit <= max_limit:
+        raise PaginationError(f'Paramètre limit invalide, attendu entre 1 et {max_limit}')
+    return limit
+
+
+# Triggers des suppressions, partagés par les deux dialectes. `{now}` est l'heure
+# de la base, en UTC, au format des dates de SQLAlchemy sous SQLite
+NOW = {
+    'postgresql': "clock_timestamp() AT TIME ZONE 'utc'",
+    'sqlite': "strftime('%Y-%m-%d %H:%M:%f000', 'now')",
+}
+
+_INSERT = 'INSERT INTO sync_tombstone (table_name, row_id, user_id, deleted_at) '
+
+# Professeur et élèves d'une classe
+_MEMBERS = ('(SELECT professor_id AS user_id FROM classroom WHERE id = {classroom} '
+            'UNION ALL SELECT user_id FROM classroom_student WHERE classroom_id = {classroom})')
+
+# (nom, table, moment, instructions)
+TRIGGERS = [
+    ('book_tombstone', 'book', 'AFTER DELETE', [
+        _INSERT + "VALUES ('book', OLD.id, NULL, {now})",
+    ]),
+    # Avant la suppression de la classe, dont les devoirs et les élèves
+    # partent en cascade
+    ('classroom_tombstone', 'classroom', 'BEFORE DELETE', [
+        _INSERT + "SELECT 'reading_assignment', a.id, m.user_id, {now} FROM reading_assignment a, "
+        + _MEMBERS.format(classroom='OLD.id') + " m WHERE a.classroom_id = OLD.id",
+        _INSERT + "SELECT 'student_reading', r.id, OLD.professor_id, {now} FROM student_reading r "
+        "JOIN reading_assignment a ON a.id = r.assignment_id WHERE a.classroom_id = OLD.id",
+    ]),
+    ('reading_assignment_tombstone', 'reading_assignment', 'BEFORE DELETE', [
+        _INSERT + "SELECT 'reading_assignment', OLD.id, m.user_id, {now} FROM "
+        + _MEMBERS.format(classroom='OLD.classroom_id') + " m",
+        _INSERT + "SELECT 'student_reading', r.id, c.professor_id, {now} FROM student_reading r "
+        "JOIN classroom c ON c.id = OLD.classroom_id WHERE r.assignment_id = OLD.id",
+    ]),
+    # Le professeur n'est retrouvé que si le devoir existe encore (suppression
+    # directe) ; sinon le trigger du devoir l'a déjà enregistré
+    ('student_reading_tombstone', 'student_reading', 'AFTER DELETE', [
+        _INSERT + "VALUES ('student_reading', OLD.id, OLD.user_id, {now})",
+        _INSERT + "SELECT 'student_reading', OLD.id, c.professor_id, {now} FROM reading_assignment a "
+        "JOIN classroom c ON c.id = a.classroom_id WHERE a.id = OLD.assignment_id",
+    ]),
+    # Élève retiré d'une classe : les devoirs de la classe disparaissent de sa vue
+    ('classroom_student_tombstone', 'classroom_student', 'AFTER DELETE', [
+        _INSERT + "SELECT 'reading_assignment', id, OLD.user_id, {now} FROM reading_assignment "
+        "WHERE classroom_id = OLD.classroom_id",
+    ]),
+    # Élève ajouté : les devoirs de la classe lui sont renvoyés au prochain appel
+    ('classroom_student_visible', 'classroom_student', 'AFTER INSERT', [
+        'UPDATE reading_assignment SET updated_at = {now} WHERE classroom_id = NEW.classroom_id',
+    ]),
+]
+
+
+def trigger_ddl(dialect, name, table_name, timing, statements):
+    body = '; '.join(statement.format(now=NOW[dialect]) for statement in statements)
+    if dialect == 'postgresql':
+        # Un trigger BEFORE DELETE doit retourner OLD pour que la suppression ait lieu
+        result = 'OLD' if timing == 'BEFORE DELETE' else 'NULL'
+        return [
+            f'CREATE OR REPLACE FUNCTION {name}() RETURNS trigger AS $$ BEGIN {body}; '
+            f'RETURN {result}; END $$ LANGUAGE plpgsql',
+            f'CREATE TRIGGER {name} {timing} ON {table_name} FOR EACH ROW EXECUTE PROCEDURE {name}()',
+        ]
+    return [f'CREATE TRIGGER IF NOT EXISTS {name} {timing} ON {table_name} FOR EACH ROW BEGIN {body}; END']
+
+
+def register_tombstone_triggers():
+    tables = {table.name: table for table in (Book.__table__, Classroom.__table__, classroom_student,
+                                              ReadingAssignment.__table__, StudentReading.__table__)}
+    for name, table_name, timing, statements in TRIGGERS:
+        for dialect in NOW:
+            for statement in trigger_ddl(dialect, name, table_name, timing, statements):
+                # DDL applique le formatage « % » : celui de strftime est échappé
+                event.listen(tables[table_name], 'after_create',
+                             DDL(statement.replace('%', '%%')).execute_if(dialect=dialect))
+
+
+register_tombstone_triggers()
@@ -24,6 +24,13 @@ def app():
 def client(app):
     return app.test_client()
 
+@pytest.fixture
+def dataset(app):
+    """Petit jeu de données synthétique et reproductible (init_db.seed_dataset)."""
+    from init_db import seed_dataset
+    with app.app_context():
+        return seed_dataset(professors=2, classrooms=2, students=5, books=10, assignments=2, seed=7)
+
 @pytest.fixture
 def app_context(app):
     with app.app_context():
@@ -0,0 +1,56 @@
+import json
+import logging
+import pytest
+from app import create_app
+from config import Config
+from models import db
+from access_log import JsonFormatter
+
+@pytest.fixture
+def app():
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def access_records(caplog):
+    return [r for r in caplog.records if r.name == 'access']
+
+def test_access_log_fields_and_request_id(client, caplog):
+    caplog.set_level(logging.INFO, logger='access')
+
+    response = client.get('/api/books', headers={'X-Request-ID': 'req-123'})
+
+    assert response.status_code == 200
+    assert response.headers['X-Request-ID'] == 'req-123'
+
+    [record] = access_records(caplog)
+    assert record.request_id == 'req-123'
+    assert record.status == 200
+    assert record.endpoint == 'books.get_books'
+    assert record.duration_ms >= 0
+
+    # Une ligne JSON par requête
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry['path'] == '/api/books'
+    assert entry['method'] == 'GET'
+
+def test_access_log_sampling(monkeypatch, caplog):
+    caplog.set_level(logging.INFO, logger='access')
+    monkeypatch.setattr(Config, 'ACCESS_LOG_SAMPLE_RATE', 0.0)
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        response = app.test_client().get('/api/books')
+        db.drop_all()
+
+    assert response.status_code == 200
+    # Identifiant généré même quand la requête n'est pas journalisée
+    assert response.headers['X-Request-ID']
+    assert access_records(caplog) == []
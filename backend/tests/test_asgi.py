@@ -0,0 +1,219 @@
+import asyncio
+import json
+import re
+
+import pytest
+from app import create_app
+from config import Config
+from models import db, User, Classroom, Book, ReadingAssignment, StudentReading
+from werkzeug.security import generate_password_hash
+
+pytest.importorskip('aiosqlite')
+pytest.importorskip('asgiref')
+
+from asgi import AsyncApi
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    # Base fichier : le moteur asynchrone et Flask doivent voir les mêmes données
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', f"sqlite:///{tmp_path / 'test.sqlite3'}")
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def _scope(path, headers=None):
+    path, _, query_string = path.partition('?')
+    return {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'GET',
+        'scheme': 'http',
+        'path': path,
+        'raw_path': path.encode(),
+        'query_string': query_string.encode(),
+        'root_path': '',
+        'headers': [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+        'client': ('127.0.0.1', 12345),
+        'server': ('testserver', 80),
+    }
+
+def _call(asgi_app, path, headers=None):
+    """Requête GET sur l'application ASGI ; retourne (statut, en-têtes, corps)."""
+    scope = _scope(path, headers)
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    async def run():
+        try:
+            await asgi_app(scope, receive, send)
+        finally:
+            await asgi_app.engine.dispose()
+
+    asyncio.run(run())
+    start = messages[0]
+    body = b''.join(m.get('body', b'') for m in messages[1:])
+    return start['status'], {k.decode(): v.decode() for k, v in start['headers']}, body
+
+def _setup(client):
+    professor = User(email='prof@test.com', password=generate_password_hash('password123'),
+                     role='professor', first_name='John', last_name='Doe')
+    db.session.add(professor)
+    db.session.flush()
+    classroom = Classroom(name='Test Class', professor_id=professor.id)
+    book = Book(title='Test Book', author='Test Author')
+    db.session.add_all([classroom, book])
+    db.session.flush()
+    assignment = ReadingAssignment(book_id=book.id, classroom_id=classroom.id)
+    db.session.add(assignment)
+    db.session.flush()
+    students = []
+    for i in range(5):
+        student = User(email=f'student{i}@test.com', password=generate_password_hash('password123'),
+                       role='student', first_name=f'Student{i}', last_name='Doe')
+        db.session.add(student)
+        db.session.flush()
+        db.session.add(StudentReading(user_id=student.id, assignment_id=assignment.id, summary=f'Résumé {i}'))
+        students.append(student)
+    db.session.commit()
+
+    def token(email):
+        return client.post('/api/auth/login', json={'email': email, 'password': 'password123'}).json['access_token']
+    return token('prof@test.com'), token('student0@test.com'), students[0].id
+
+def test_async_views_match_flask_views(app, client):
+    professor_token, _, student_id = _setup(client)
+    headers = {'Authorization': f'Bearer {professor_token}'}
+    asgi_app = AsyncApi(app)
+
+    for url in ['/api/student-readings', '/api/student-readings?limit=2', '/api/student-readings?status=en_attente',
+                f'/api/users/{student_id}/submissions', '/api/assignments?limit=10']:
+        status, _, body = _call(asgi_app, url, headers)
+        assert status == 200, body
+        assert json.loads(body) == client.get(url, headers=headers).json, url
+
+    # Pagination : le curseur renvoyé mène à la page suivante
+    _, _, body = _call(asgi_app, '/api/student-readings?limit=3', headers)
+    first = json.loads(body)
+    _, _, body = _call(asgi_app, f"/api/student-readings?limit=3&cursor={first['next_cursor']}", headers)
+    assert len(first['items']) + len(json.loads(body)['items']) == 5
+
+    # Streaming NDJSON
+    status, response_headers, body = _call(asgi_app, '/api/student-readings',
+                                           dict(headers, Accept='application/x-ndjson'))
+    assert response_headers['content-type'] == 'application/x-ndjson'
+    assert len(body.decode().splitlines()) == 5
+
+def test_async_views_check_tokens_and_roles(app, client):
+    _, student_token, student_id = _setup(client)
+    asgi_app = AsyncApi(app)
+
+    assert _call(asgi_app, '/api/student-readings')[0] == 401
+    assert _call(asgi_app, '/api/student-readings', {'Authorization': 'Bearer abc'})[0] == 422
+    assert _call(asgi_app, '/api/student-readings', {'Authorization': f'Bearer {student_token}'})[0] == 403
+    # Tout utilisateur connecté peut lister les devoirs
+    assert _call(asgi_app, '/api/assignments', {'Authorization': f'Bearer {student_token}'})[0] == 200
+
+def test_other_routes_are_served_by_flask(app, client):
+    _setup(client)
+    status, _, body = _call(AsyncApi(app), '/api/books')
+    assert status == 200
+    assert json.loads(body)[0]['title'] == 'Test Book'
+
+def test_async_event_stream(app, client):
+    professor_token, student_token, student_id = _setup(client)
+    reading_id = StudentReading.query.filter_by(user_id=student_id).one().id
+    app.config['EVENTS_HEARTBEAT'] = 0.2
+    asgi_app = AsyncApi(app)
+    messages = []
+
+    async def run():
+        disconnected = asyncio.Event()
+
+        async def receive():
+            await disconnected.wait()
+            return {'type': 'http.disconnect'}
+
+        async def send(message):
+            messages.append(message)
+            if b'reading.graded' in message.get('body', b''):
+                disconnected.set()
+
+        # Jeton dans l'URL, comme avec EventSource
+        stream = asyncio.ensure_future(asgi_app(_scope(f'/api/events?jwt={student_token}'), receive, send))
+        while len(messages) < 2:
+            await asyncio.sleep(0.01)
+        client.patch('/api/student-readings', headers={'Authorization': f'Bearer {professor_token}'},
+                     json={'readings': [{'id': reading_id, 'status': 'valide'}]})
+        await asyncio.wait_for(stream, 5)
+        await asgi_app.engine.dispose()
+
+    asyncio.run(run())
+    assert messages[0]['status'] == 200
+    assert b'text/event-stream' in dict(messages[0]['headers']).values()
+    event = next(m['body'].decode() for m in messages[1:] if b'event:' in m['body'])
+    name, data = event.strip().split('\n')
+    assert name == 'event: reading.graded'
+    assert json.loads(data[len('data: '):])['id'] == reading_id
+    # Client parti : plus aucun abonné
+    assert app.extensions['events']._subscribers == {}
+    assert _call(asgi_app, '/api/events')[0] == 401
+
+def test_async_views_apply_cors_policy(app, client):
+    professor_token, _, student_id = _setup(client)
+    asgi_app = AsyncApi(app)
+    headers = {'Authorization': f'Bearer {professor_token}', 'Origin': 'http://localhost:3000'}
+
+    # Page JSON, liste en streaming et erreur portent l'en-tête, comme en WSGI
+    for url in ['/api/student-readings?limit=2', '/api/student-readings', f'/api/users/{student_id}/submissions',
+                '/api/assignments?limit=10', '/api/users/0/submissions']:
+        _, response_headers, _ = _call(asgi_app, url, headers)
+        assert response_headers['access-control-allow-origin'] == 'http://localhost:3000', url
+        assert response_headers['access-control-allow-credentials'] == 'true'
+        assert response_headers['access-control-allow-origin'] == \
+            client.get(url, headers=headers).headers['Access-Control-Allow-Origin']
+
+    # Origine non autorisée : aucun en-tête CORS
+    _, response_headers, _ = _call(asgi_app, '/api/assignments?limit=10', dict(headers, Origin='http://evil.test'))
+    assert 'access-control-allow-origin' not in response_headers
+
+def test_error_after_response_start_closes_body(app, client):
+    professor_token, _, _ = _setup(client)
+    asgi_app = AsyncApi(app)
+
+    async def failing(session, request, identity, send):
+        await send({'type': 'http.response.start', 'status': 200, 'headers': []})
+        await send({'type': 'http.response.body', 'body': b'[', 'more_body': True})
+        raise RuntimeError('base indisponible')
+
+    asgi_app.routes.insert(0, (re.compile(r'/api/failing'), None, failing))
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        messages.append(message)
+
+    async def run():
+        scope = _scope('/api/failing', {'Authorization': f'Bearer {professor_token}'})
+        await asgi_app(scope, receive, send)
+        await asgi_app.engine.dispose()
+
+    asyncio.run(run())
+    # Un seul début de réponse, puis le corps est clos
+    assert [m['type'] for m in messages].count('http.response.start') == 1
+    assert messages[-1] == {'type': 'http.response.body', 'body': b''}
@@ -3,6 +3,8 @@ from app import create_app, db
 from models import User
 import json
 from werkzeug.security import generate_password_hash
+from flask_jwt_extended import create_access_token, decode_token
+from sqlalchemy import event
 
 @pytest.fixture
 def client():
@@ -155,3 +157,108 @@ def test_get_current_user(client):
     data = json.loads(response.data)
     assert data['email'] == 'test@example.com'
     assert data['role'] == 'professor'
+
+def test_login_token_carries_role_claims(client):
+    user = User(
+        email='student@example.com',
+        password=generate_password_hash('password123'),
+        role='student',
+        first_name='Jane',
+        last_name='Doe'
+    )
+    db.session.add(user)
+    db.session.commit()
+
+    response = client.post('/api/auth/login', json={
+        'email': 'student@example.com',
+        'password': 'password123'
+    })
+    token = response.json['access_token']
+
+    with client.application.test_request_context():
+        claims = decode_token(token)
+    assert claims['role'] == 'student'
+    assert claims['first_name'] == 'Jane'
+
+    # Le rôle est lu dans le jeton : refus sans aucune requête SQL
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        response = client.get('/api/users', headers={'Authorization': f'Bearer {token}'})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert response.status_code == 403
+    assert statements == []
+
+def test_role_required_accepts_token_without_claims(client):
+    user = User(
+        email='prof@example.com',
+        password=generate_password_hash('password123'),
+        role='professor',
+        first_name='John',
+        last_name='Doe'
+    )
+    db.session.add(user)
+    db.session.commit()
+
+    # Jeton émis avant l'ajout des claims : le rôle est relu en base
+    with client.application.test_request_context():
+        token = create_access_token(identity=str(user.id))
+
+    response = client.get('/api/users', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200
+
+    # Filtre vide ignoré, comme avant la pagination
+    response = client.get('/api/users?role=&date_from=', headers={'Authorization': f'Bearer {token}'})
+    assert [u['email'] for u in response.json] == ['prof@example.com']
+
+def test_login_rehashes_password_with_configured_cost(client):
+    user = User(
+        email='old@example.com',
+        password=generate_password_hash('password123', method='pbkdf2:sha256:1000'),
+        role='student',
+        first_name='Jane',
+        last_name='Doe'
+    )
+    db.session.add(user)
+    db.session.commit()
+    old_hash = user.password
+
+    response = client.post('/api/auth/login', json={'email': 'old@example.com', 'password': 'password123'})
+    assert response.status_code == 200
+
+    # Le hash a été recalculé avec PASSWORD_HASH_METHOD et reste valide
+    hasher = client.application.extensions['password_hasher']
+    db.session.refresh(user)
+    assert user.password != old_hash
+    assert not hasher.needs_rehash(user.password)
+    response = client.post('/api/auth/login', json={'email': 'old@example.com', 'password': 'password123'})
+    assert response.status_code == 200
+
+def test_login_returns_503_when_hashing_pool_is_full(client):
+    user = User(
+        email='test@example.com',
+        password=generate_password_hash('password123'),
+        role='professor',
+        first_name='John',
+        last_name='Doe'
+    )
+    db.session.add(user)
+    db.session.commit()
+
+    # Toutes les places du pool sont prises
+    hasher = client.application.extensions['password_hasher']
+    taken = 0
+    while hasher.slots.acquire(blocking=False):
+        taken += 1
+    try:
+        response = client.post('/api/auth/login', json={'email': 'test@example.com', 'password': 'password123'})
+    finally:
+        for _ in range(taken):
+            hasher.slots.release()
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '1'
+    response = client.post('/api/auth/login', json={'email': 'test@example.com', 'password': 'password123'})
+    assert response.status_code == 200
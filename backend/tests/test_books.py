@@ -0,0 +1,138 @@
+import json
+from datetime import datetime
+
+import pytest
+from app import create_app
+from models import db, Book, User
+from werkzeug.security import generate_password_hash
+
+@pytest.fixture
+def app():
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def test_get_books_conditional_get(client):
+    db.session.add(Book(title='Test Book', author='Test Author'))
+    db.session.commit()
+
+    response = client.get('/api/books')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert response.headers['Cache-Control'].startswith('public')
+
+    # Rien n'a changé : 304 sans corps
+    response = client.get('/api/books', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+    # Les paramètres font partie de l'ETag
+    response = client.get('/api/books?limit=1', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+
+    # Un ajout de livre invalide l'ETag
+    response = client.post('/api/books', json={'title': 'Autre livre', 'author': 'Autre auteur'})
+    assert response.status_code == 201
+
+    response = client.get('/api/books', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert len(response.json) == 2
+
+def test_table_version_bumped_at_commit_only(app):
+    from models import TableVersion
+
+    def version():
+        row = db.session.get(TableVersion, 'book', populate_existing=True)
+        return row.version if row else 0
+
+    before = version()
+    db.session.add(Book(title='Test Book', author='Test Author'))
+    db.session.flush()
+    # Pas d'écriture sur table_version pendant la transaction
+    assert version() == before
+    db.session.commit()
+    assert version() == before + 1
+
+def _professor_token(client):
+    db.session.add(User(email='prof@test.com', password=generate_password_hash('password123'),
+                        role='professor', first_name='John', last_name='Doe'))
+    db.session.commit()
+    return client.post('/api/auth/login', json={
+        'email': 'prof@test.com',
+        'password': 'password123'
+    }).json['access_token']
+
+def test_import_books_csv(client):
+    db.session.add(Book(title='Le Petit Prince', author='Antoine de Saint-Exupéry'))
+    db.session.commit()
+    token = _professor_token(client)
+
+    body = (
+        'title,author,published_at\n'
+        'Le Petit Prince,Antoine de Saint-Exupéry,1943-04-06\n'
+        'Germinal,Émile Zola,1885-03-01\n'
+        'Germinal,Émile Zola,\n'
+        '"Vingt mille lieues, sous les mers",Jules Verne,\n'
+        ',Sans titre,\n'
+        'Candide,Voltaire,17/01/1759\n'
+    ).encode()
+    response = client.post('/api/books/import', data=body, content_type='text/csv',
+                           headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200
+    report = response.json
+    assert report['processed'] == 6
+    assert report['inserted'] == 2
+    assert report['duplicates'] == 2
+    assert report['failed'] == 2
+    assert [error['line'] for error in report['errors']] == [6, 7]
+
+    titles = sorted(b.title for b in Book.query.all())
+    assert titles == ['Germinal', 'Le Petit Prince', 'Vingt mille lieues, sous les mers']
+
+def test_import_books_jsonl_progress(app, client):
+    app.config['IMPORT_BATCH_SIZE'] = 2
+    token = _professor_token(client)
+
+    lines = [json.dumps({'title': f'Livre {i}', 'author': 'Auteur'}) for i in range(5)] + ['{pas du json']
+    response = client.post('/api/books/import?format=jsonl', data='\n'.join(lines).encode(),
+                           headers={'Authorization': f'Bearer {token}', 'Accept': 'application/x-ndjson'})
+    states = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    # Un état par lot de deux lignes
+    assert [state['processed'] for state in states] == [2, 4, 6]
+    assert states[-1]['inserted'] == 5
+    assert states[-1]['errors'] == [{'line': 6, 'error': 'Ligne JSON invalide'}]
+
+    # En-tête CSV incomplet
+    response = client.post('/api/books/import', data=b'titre,auteur\nA,B\n', content_type='text/csv',
+                           headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 400
+
+def test_import_books_cli(app, tmp_path):
+    path = tmp_path / 'catalogue.jsonl'
+    path.write_text('\n'.join(json.dumps({'title': f'Livre {i % 3}', 'author': 'Auteur'}) for i in range(6)))
+
+    result = app.test_cli_runner().invoke(args=['books', 'import', str(path)])
+    assert result.exit_code == 0, result.output
+    assert '6 lignes lues, 3 ajoutées, 3 doublons, 0 rejetées' in result.output
+    assert Book.query.count() == 3
+
+def test_get_book(client):
+    book = Book(title='Le Petit Prince', author='Antoine de Saint-Exupéry', published_at=datetime(1943, 4, 6))
+    db.session.add(book)
+    db.session.commit()
+    headers = {'Authorization': f'Bearer {_professor_token(client)}'}
+
+    response = client.get(f'/api/books/{book.id}', headers=headers)
+    assert response.status_code == 200
+    assert response.json == {'id': book.id, 'title': 'Le Petit Prince',
+                             'author': 'Antoine de Saint-Exupéry', 'published_at': '1943-04-06'}
+    assert client.get('/api/books/999', headers=headers).status_code == 404
@@ -0,0 +1,105 @@
+import pytest
+from app import create_app
+from models import db, User, Classroom, Book, ReadingAssignment, StudentReading
+from werkzeug.security import generate_password_hash
+from sqlalchemy import event
+
+@pytest.fixture
+def app():
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def _create_data(assignments, readings_per_assignment):
+    """Un professeur, une classe, un livre et les devoirs/lectures associés."""
+    professor = User(email='prof@test.com', password=generate_password_hash('password123'),
+                     role='professor', first_name='John', last_name='Doe')
+    db.session.add(professor)
+    db.session.flush()
+    classroom = Classroom(name='Test Class', professor_id=professor.id)
+    book = Book(title='Test Book', author='Test Author')
+    db.session.add_all([classroom, book])
+    db.session.flush()
+
+    for i in range(readings_per_assignment):
+        student = User(email=f'student{i}@test.com', password='x', role='student',
+                       first_name=f'Student{i}', last_name='Doe')
+        classroom.students.append(student)
+    db.session.flush()
+
+    for _ in range(assignments):
+        assignment = ReadingAssignment(book_id=book.id, classroom_id=classroom.id)
+        db.session.add(assignment)
+        db.session.flush()
+        db.session.add_all([
+            StudentReading(user_id=student.id, assignment_id=assignment.id, summary='Résumé')
+            for student in classroom.students
+        ])
+    db.session.commit()
+
+    return {
+        'book': f'/api/books/{book.id}',
+        'assignment': f'/api/assignments/{assignment.id}',
+        'classroom': f'/api/classrooms/{classroom.id}'
+    }
+
+def _delete(client, url):
+    """Supprime via l'API et retourne (réponse, requêtes SQL exécutées)."""
+    token = client.post('/api/auth/login', json={
+        'email': 'prof@test.com',
+        'password': 'password123'
+    }).json['access_token']
+    db.session.expire_all()
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.delete(url, headers={'Authorization': f'Bearer {token}'})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return response, statements
+
+@pytest.mark.parametrize('target', ['book', 'assignment', 'classroom'])
+def test_delete_runs_constant_statements(app, target):
+    counts = []
+    for assignments, readings in [(1, 1), (5, 8)]:
+        db.drop_all()
+        db.create_all()
+        urls = _create_data(assignments, readings)
+        response, statements = _delete(app.test_client(), urls[target])
+        assert response.status_code == 200, response.json
+        counts.append(len(statements))
+
+        # Un seul DELETE : les enfants sont supprimés par la base
+        assert sum(1 for s in statements if s.lstrip().upper().startswith('DELETE')) == 1
+
+    assert counts[0] == counts[1]
+
+def test_delete_book_cascades(client):
+    urls = _create_data(3, 2)
+    response, _ = _delete(client, urls['book'])
+    assert response.status_code == 200
+    assert ReadingAssignment.query.count() == 0
+    assert StudentReading.query.count() == 0
+    assert Classroom.query.count() == 1
+
+def test_delete_classroom_cascades(client):
+    urls = _create_data(2, 3)
+    response, _ = _delete(client, urls['classroom'])
+    assert response.status_code == 200
+    assert ReadingAssignment.query.count() == 0
+    assert StudentReading.query.count() == 0
+    assert db.session.execute(db.select(db.func.count()).select_from(db.metadata.tables['classroom_student'])).scalar() == 0
+    # Les élèves eux-mêmes sont conservés
+    assert User.query.filter_by(role='student').count() == 3
@@ -137,3 +137,70 @@ def test_get_classroom_details(client):
     data = json.loads(response.data)
     assert data['name'] == 'Classe Test'
     assert data['professor_id'] == professor.id
+
+def test_bulk_roster_add_and_remove(client):
+    # Créer un professeur, une classe et trois étudiants
+    professor = User(
+        email='prof4@test.com',
+        password=generate_password_hash('password123'),
+        role='professor',
+        first_name='Bob',
+        last_name='Martin'
+    )
+    students = [
+        User(email=f'bulk{i}@test.com', password='x', role='student',
+             first_name=f'Student{i}', last_name='Bulk')
+        for i in range(3)
+    ]
+    db.session.add(professor)
+    db.session.add_all(students)
+    db.session.commit()
+
+    classroom = Classroom(name='Classe Bulk', professor_id=professor.id)
+    classroom.students.append(students[0])
+    db.session.add(classroom)
+    db.session.commit()
+
+    login_response = client.post('/api/auth/login', json={
+        'email': 'prof4@test.com',
+        'password': 'password123'
+    })
+    headers = {'Authorization': f'Bearer {login_response.json["access_token"]}'}
+    student_ids = [s.id for s in students]
+
+    response = client.get(f'/api/classrooms/{classroom.id}/students', headers=headers)
+    etag = response.headers['ETag']
+    response = client.get(f'/api/classrooms/{classroom.id}/students',
+                          headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 304
+
+    # Ajout groupé : l'étudiant déjà inscrit est ignoré, le professeur n'est pas un étudiant
+    response = client.post(f'/api/classrooms/{classroom.id}/students',
+                           json={'student_ids': student_ids + [professor.id]},
+                           headers=headers)
+    assert response.status_code == 200
+    assert response.json['added'] == 2
+    assert response.json['already_enrolled'] == 1
+    assert response.json['not_found'] == [professor.id]
+    assert all(Classroom.has_student(classroom.id, i) for i in student_ids)
+
+    # L'insertion directe dans classroom_student invalide l'ETag
+    response = client.get(f'/api/classrooms/{classroom.id}/students',
+                          headers={**headers, 'If-None-Match': etag})
+    assert response.status_code == 200
+    assert len(response.json) == 3
+
+    # Retrait groupé
+    response = client.delete(f'/api/classrooms/{classroom.id}/students',
+                             json={'student_ids': student_ids[:2]},
+                             headers=headers)
+    assert response.status_code == 200
+    assert response.json['removed'] == 2
+    assert not Classroom.has_student(classroom.id, student_ids[0])
+    assert Classroom.has_student(classroom.id, student_ids[2])
+
+    # Requête invalide
+    response = client.delete(f'/api/classrooms/{classroom.id}/students',
+                             json={'student_ids': []},
+                             headers=headers)
+    assert response.status_code == 400
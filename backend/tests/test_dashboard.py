@@ -0,0 +1,168 @@
+import pytest
+from app import create_app
+from models import db, User, Classroom, Book, ReadingAssignment, StudentReading, AssignmentStatusCount
+from werkzeug.security import generate_password_hash
+from sqlalchemy import event, func, select
+
+@pytest.fixture
+def app():
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def _setup():
+    """Un professeur, une classe de quatre élèves et deux devoirs."""
+    professor = User(email='prof@test.com', password=generate_password_hash('password123'),
+                     role='professor', first_name='John', last_name='Doe')
+    db.session.add(professor)
+    db.session.flush()
+    classroom = Classroom(name='Test Class', professor_id=professor.id)
+    book = Book(title='Test Book', author='Test Author')
+    db.session.add_all([classroom, book])
+    db.session.flush()
+    students = [User(email=f'student{i}@test.com', password='x', role='student',
+                     first_name=f'Student{i}', last_name='Doe') for i in range(4)]
+    classroom.students.extend(students)
+    assignments = [ReadingAssignment(book_id=book.id, classroom_id=classroom.id) for _ in range(2)]
+    db.session.add_all(assignments)
+    db.session.commit()
+    return classroom, students, assignments
+
+def _token(client):
+    return client.post('/api/auth/login', json={
+        'email': 'prof@test.com',
+        'password': 'password123'
+    }).json['access_token']
+
+def test_stats_follow_reading_writes(client):
+    classroom, students, assignments = _setup()
+    first, second = assignments
+
+    # Écritures par l'ORM : création, changement de statut, suppression
+    readings = [StudentReading(user_id=s.id, assignment_id=first.id, summary='Résumé') for s in students[:3]]
+    readings.append(StudentReading(user_id=students[0].id, assignment_id=second.id, summary='Résumé'))
+    db.session.add_all(readings)
+    db.session.commit()
+    readings[0].status = 'valide'
+    db.session.delete(readings[2])
+    db.session.commit()
+
+    counts = {(c.assignment_id, c.status): c.count for c in AssignmentStatusCount.query.all()}
+    assert counts[(first.id, 'en_attente')] == 1
+    assert counts[(first.id, 'valide')] == 1
+    assert counts[(second.id, 'en_attente')] == 1
+
+    # Correction groupée (UPDATE sans l'ORM)
+    headers = {'Authorization': f'Bearer {_token(client)}'}
+    response = client.patch('/api/student-readings', headers=headers, json={
+        'readings': [{'id': readings[1].id, 'status': 'refuse'}, {'id': readings[3].id, 'status': 'valide'}]
+    })
+    assert response.status_code == 200
+
+    response = client.get(f'/api/classrooms/{classroom.id}/stats', headers=headers)
+    assert response.status_code == 200
+    stats = response.json
+    assert stats['students'] == 4
+    assert stats['counts'] == {'en_attente': 0, 'valide': 2, 'refuse': 1}
+    assert stats['submitted'] == 3
+    assert stats['completion_rate'] == 0.375
+    assert [a['counts'] for a in stats['assignments']] == [
+        {'en_attente': 0, 'valide': 1, 'refuse': 1},
+        {'en_attente': 0, 'valide': 1, 'refuse': 0}
+    ]
+    assert stats['assignments'][0]['completion_rate'] == 0.5
+
+def test_dashboard_summary_reads_only_aggregates(client):
+    classroom, students, assignments = _setup()
+    for assignment in assignments:
+        db.session.add_all([StudentReading(user_id=s.id, assignment_id=assignment.id, summary='Résumé')
+                            for s in students])
+    db.session.commit()
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    headers = {'Authorization': f'Bearer {_token(client)}'}
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get('/api/dashboard/summary', headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    assert response.status_code == 200
+    summary = response.json
+    assert summary['classrooms'] == [{
+        'classroom_id': classroom.id,
+        'name': 'Test Class',
+        'students': 4,
+        'assignments': 2,
+        'counts': {'en_attente': 8, 'valide': 0, 'refuse': 0},
+        'submitted': 8,
+        'completion_rate': 1.0
+    }]
+    # Les résumés eux-mêmes ne sont jamais lus
+    assert not any('FROM student_reading' in s for s in statements)
+
+    # Une autre classe ne peut pas être consultée
+    other = User(email='other@test.com', password='x', role='professor', first_name='Ann', last_name='Roe')
+    db.session.add(other)
+    db.session.flush()
+    other_classroom = Classroom(name='Other', professor_id=other.id)
+    db.session.add(other_classroom)
+    db.session.commit()
+    assert client.get(f'/api/classrooms/{other_classroom.id}/stats', headers=headers).status_code == 403
+
+def test_stats_ignore_unknown_statuses(client):
+    classroom, students, assignments = _setup()
+    first = assignments[0]
+    # Statut hors STATUSES écrit directement en base (données antérieures)
+    readings = [StudentReading(user_id=students[0].id, assignment_id=first.id, summary='Résumé', status='validated'),
+                StudentReading(user_id=students[1].id, assignment_id=first.id, summary='Résumé', status='valide')]
+    db.session.add_all(readings)
+    db.session.commit()
+
+    headers = {'Authorization': f'Bearer {_token(client)}'}
+    stats = client.get(f'/api/classrooms/{classroom.id}/stats', headers=headers).json
+    assert stats['counts'] == {'en_attente': 0, 'valide': 1, 'refuse': 0}
+    assert stats['submitted'] == 1
+    summary = client.get('/api/dashboard/summary', headers=headers).json
+    assert summary['counts'] == {'en_attente': 0, 'valide': 1, 'refuse': 0}
+    assert summary['classrooms'][0]['submitted'] == 1
+
+    # Le statut corrigé, son compteur à zéro est supprimé
+    readings[0].status = 'refuse'
+    db.session.commit()
+    counts = {c.status: c.count for c in AssignmentStatusCount.query.filter_by(assignment_id=first.id)}
+    assert counts == {'valide': 1, 'refuse': 1}
+
+def test_seeded_dataset_keeps_counters_consistent(client, dataset):
+    assert dataset['counts'] == {'professors': 2, 'classrooms': 4, 'students': 20, 'books': 10,
+                                 'assignments': 8, 'readings': dataset['counts']['readings']}
+    # Insertions groupées : les compteurs sont recalculés comme après un flush
+    grouped = dict(db.session.execute(
+        select(StudentReading.status, func.count()).group_by(StudentReading.status)
+    ).all())
+    counted = dict(db.session.execute(
+        select(AssignmentStatusCount.status, func.sum(AssignmentStatusCount.count))
+        .group_by(AssignmentStatusCount.status)
+    ).all())
+    assert sum(grouped.values()) == dataset['counts']['readings']
+    assert {status: n for status, n in counted.items() if n} == grouped
+
+    # Les comptes générés se connectent avec le mot de passe commun
+    professor = dataset['professors'][0]
+    response = client.post('/api/auth/login', json={'email': professor['email'], 'password': dataset['password']})
+    assert response.status_code == 200
+    headers = {'Authorization': f"Bearer {response.json['access_token']}"}
+    summary = client.get('/api/dashboard/summary', headers=headers).json
+    assert [c['classroom_id'] for c in summary['classrooms']] == professor['classrooms']
+    assert all(c['students'] == 5 and c['assignments'] == 2 for c in summary['classrooms'])
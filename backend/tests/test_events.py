@@ -0,0 +1,177 @@
+import json
+import threading
+from types import SimpleNamespace
+
+import pytest
+from app import create_app
+from events import EventBroker, PostgresBroker, user_audience
+from models import db, User, Classroom, Book, ReadingAssignment
+from werkzeug.security import generate_password_hash
+
+@pytest.fixture
+def app():
+    app = create_app()
+    app.config['EVENTS_HEARTBEAT'] = 0.2
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def _setup(client):
+    professor = User(email='prof@test.com', password=generate_password_hash('password123'),
+                     role='professor', first_name='John', last_name='Doe')
+    student = User(email='student@test.com', password=generate_password_hash('password123'),
+                   role='student', first_name='Jane', last_name='Doe')
+    db.session.add_all([professor, student])
+    db.session.flush()
+    classroom = Classroom(name='Test Class', professor_id=professor.id)
+    classroom.students.append(student)
+    book = Book(title='Test Book', author='Test Author')
+    db.session.add_all([classroom, book])
+    db.session.flush()
+    assignment = ReadingAssignment(book_id=book.id, classroom_id=classroom.id)
+    db.session.add(assignment)
+    db.session.commit()
+
+    def token(email):
+        return client.post('/api/auth/login', json={'email': email, 'password': 'password123'}).json['access_token']
+    return assignment, token('prof@test.com'), token('student@test.com')
+
+def _next_event(chunks):
+    """Prochain événement du flux, en sautant les messages keep-alive."""
+    for _ in range(10):
+        chunk = next(chunks).decode()
+        if chunk.startswith('event:'):
+            name, data = chunk.strip().split('\n')
+            return name[len('event: '):], json.loads(data[len('data: '):])
+    raise AssertionError('Aucun événement reçu')
+
+def test_events_push_submissions_and_grades(app, client):
+    assignment, professor_token, student_token = _setup(client)
+
+    # EventSource ne sait pas envoyer d'en-tête : jeton dans l'URL
+    professor_stream = client.get(f'/api/events?jwt={professor_token}')
+    student_stream = client.get('/api/events', headers={'Authorization': f'Bearer {student_token}'})
+    assert professor_stream.mimetype == 'text/event-stream'
+    professor_chunks, student_chunks = iter(professor_stream.response), iter(student_stream.response)
+    assert next(professor_chunks) == b'retry: 5000\n\n'
+    next(student_chunks)
+
+    response = client.post('/api/student-readings', headers={'Authorization': f'Bearer {student_token}'},
+                           json={'assignment_id': assignment.id, 'summary': 'Mon résumé'})
+    assert response.status_code == 201
+    name, data = _next_event(professor_chunks)
+    assert name == 'reading.submitted'
+    assert data['id'] == response.json['id']
+    assert data['summary'] == 'Mon résumé'
+    assert data['student'] == {'id': data['user_id'], 'first_name': 'Jane', 'last_name': 'Doe'}
+
+    client.patch('/api/student-readings', headers={'Authorization': f'Bearer {professor_token}'},
+                 json={'readings': [{'id': data['id'], 'status': 'valide'}]})
+    name, data = _next_event(student_chunks)
+    assert name == 'reading.graded'
+    assert data['status'] == 'valide' and data['assignment_id'] == assignment.id
+
+    # Le professeur ne reçoit pas les corrections, seulement ses keep-alive
+    assert next(professor_chunks) == b': ping\n\n'
+
+    professor_stream.close()
+    student_stream.close()
+    assert app.extensions['events']._subscribers == {}
+
+def test_events_are_dropped_on_rollback(app, client):
+    from events import publish
+
+    _, professor_token, _ = _setup(client)
+    professor_id = User.query.filter_by(email='prof@test.com').one().id
+    stream = client.get('/api/events', headers={'Authorization': f'Bearer {professor_token}'})
+    chunks = iter(stream.response)
+    next(chunks)
+
+    publish([f'user:{professor_id}'], 'reading.submitted', {'id': 1})
+    db.session.rollback()
+    publish([f'user:{professor_id}'], 'reading.submitted', {'id': 2})
+    db.session.commit()
+
+    assert _next_event(chunks) == ('reading.submitted', {'id': 2})
+    stream.close()
+
+def test_events_limit_open_streams(app, client):
+    _, professor_token, _ = _setup(client)
+    headers = {'Authorization': f'Bearer {professor_token}'}
+    assert client.get('/api/events').status_code == 401
+
+    streams = [client.get('/api/events', headers=headers) for _ in range(app.config['EVENTS_MAX_STREAMS'])]
+    refused = client.get('/api/events', headers=headers)
+    assert refused.status_code == 503
+    assert refused.headers['Retry-After'] == '5'
+
+    streams[0].close()
+    reopened = client.get('/api/events', headers=headers)
+    assert reopened.status_code == 200
+    for stream in streams[1:] + [reopened]:
+        stream.close()
+
+def test_events_release_stream_slot_on_setup_error(app, client, monkeypatch):
+    _, professor_token, _ = _setup(client)
+    headers = {'Authorization': f'Bearer {professor_token}'}
+    broker = app.extensions['events']
+
+    def failing_subscribe(audiences, subscription=None):
+        raise RuntimeError('abonnement impossible')
+
+    monkeypatch.setattr(broker, 'subscribe', failing_subscribe)
+    for _ in range(app.config['EVENTS_MAX_STREAMS'] + 1):
+        assert client.get('/api/events', headers=headers).status_code == 500
+    monkeypatch.undo()
+
+    # Aucune place perdue : toutes restent disponibles
+    streams = [client.get('/api/events', headers=headers) for _ in range(app.config['EVENTS_MAX_STREAMS'])]
+    assert all(stream.status_code == 200 for stream in streams)
+    for stream in streams:
+        stream.close()
+
+class _FakeNotify:
+    def __init__(self, payload):
+        self.payload = payload
+
+class _FakePsycopgConnection:
+    """Connexion psycopg 3 : notifications lues par le générateur notifies()."""
+
+    def __init__(self, payloads):
+        self.payloads = payloads
+        self.autocommit = False
+        self.listening = []
+
+    def rollback(self):
+        pass
+
+    def cursor(self):
+        return self
+
+    def execute(self, statement):
+        self.listening.append(statement)
+
+    def notifies(self):
+        for payload in self.payloads:
+            yield _FakeNotify(payload)
+        threading.Event().wait()
+
+def test_postgres_listener_supports_psycopg3():
+    payload = json.dumps({'audiences': [user_audience(1)], 'event': 'reading.graded', 'data': '{"id": 7}'})
+    driver = _FakePsycopgConnection([payload])
+    engine = SimpleNamespace(dialect=SimpleNamespace(driver='psycopg'), raw_connection=lambda: SimpleNamespace(
+        detach=lambda: None, close=lambda: None, driver_connection=driver))
+    broker = PostgresBroker('test_events')
+    # Abonnement sans démarrer le thread d'écoute sur db.engine
+    subscription = EventBroker.subscribe(broker, [user_audience(1)])
+    threading.Thread(target=broker._listen, args=(engine,), daemon=True).start()
+
+    assert subscription.get(timeout=5) == 'event: reading.graded\ndata: {"id": 7}\n\n'
+    assert driver.autocommit is True
+    assert driver.listening == ['LISTEN "test_events"']
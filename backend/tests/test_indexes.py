@@ -0,0 +1,48 @@
+import pytest
+from app import create_app
+from models import db, User, Classroom, ReadingAssignment, StudentReading
+from sqlalchemy import text
+
+@pytest.fixture
+def app():
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+def explain(query):
+    """Retourne le plan d'exécution de la requête ORM sous forme de texte."""
+    statement = query.statement.compile(db.engine, compile_kwargs={'literal_binds': True})
+    if db.engine.dialect.name == 'postgresql':
+        # Sur des tables presque vides, PostgreSQL préfère un seq scan :
+        # on le désactive pour vérifier que l'index est utilisable
+        db.session.execute(text('SET LOCAL enable_seqscan = off'))
+        rows = db.session.execute(text(f'EXPLAIN {statement}')).all()
+        return '\n'.join(row[0] for row in rows)
+    rows = db.session.execute(text(f'EXPLAIN QUERY PLAN {statement}')).all()
+    return '\n'.join(row[-1] for row in rows)
+
+@pytest.mark.parametrize('build_query, index_name', [
+    # GET /student-readings/me et /users/<id>/submissions
+    (lambda: StudentReading.query.filter_by(user_id=1).order_by(StudentReading.submitted_at),
+     'ix_student_reading_user_id_submitted_at'),
+    # Lectures d'un devoir filtrées par statut
+    (lambda: StudentReading.query.filter_by(assignment_id=1, status='en_attente'),
+     'ix_student_reading_assignment_id_status'),
+    # GET /classrooms
+    (lambda: Classroom.query.filter_by(professor_id=1),
+     'ix_classroom_professor_id'),
+    # Devoirs d'une classe et d'un livre
+    (lambda: ReadingAssignment.query.filter_by(classroom_id=1),
+     'ix_reading_assignment_classroom_id'),
+    (lambda: ReadingAssignment.query.filter_by(book_id=1),
+     'ix_reading_assignment_book_id'),
+    # GET /users/students
+    (lambda: User.query.filter_by(role='student'),
+     'ix_user_role'),
+])
+def test_hot_queries_use_indexes(app, build_query, index_name):
+    plan = explain(build_query())
+    assert index_name in plan, plan
@@ -0,0 +1,43 @@
+import pytest
+from app import create_app
+from models import db, Book
+
+@pytest.fixture
+def app():
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def test_server_timing_header(client):
+    db.session.add(Book(title='Test Book', author='Test Author'))
+    db.session.commit()
+
+    response = client.get('/api/books')
+
+    assert response.status_code == 200
+    timings = response.headers.getlist('Server-Timing')
+    assert any(t.startswith('app;dur=') for t in timings)
+    db_timing = next(t for t in timings if t.startswith('db;dur='))
+    queries = int(db_timing.split('desc="')[1].split(' ')[0])
+    assert queries >= 1
+
+def test_metrics_endpoint_prometheus_format(client):
+    client.get('/api/books')
+    client.get('/api/books')
+
+    response = client.get('/api/metrics')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    body = response.get_data(as_text=True)
+    assert '# TYPE http_request_duration_seconds histogram' in body
+    assert 'http_requests_total{endpoint="books.get_books",method="GET",status="200"} 2' in body
+    assert 'http_request_sql_queries_count{endpoint="books.get_books",method="GET"} 2' in body
+    assert 'http_request_sql_queries_bucket{endpoint="books.get_books",method="GET",le="5"} 2' in body
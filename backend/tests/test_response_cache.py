@@ -0,0 +1,142 @@
+import time
+
+import pytest
+from app import create_app
+from config import Config
+from models import db, User, Classroom, Book, ReadingAssignment, StudentReading
+from response_cache import LocalCache, RedisCache
+from werkzeug.security import generate_password_hash
+
+
+class FakeRedis:
+    """Sous-ensemble des commandes Redis utilisées par RedisCache."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    def incr(self, key):
+        self.data[key] = int(self.data.get(key, 0)) + 1
+        return self.data[key]
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(Config, 'RESPONSE_CACHE_BACKEND', 'local')
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def test_local_cache_evicts_oldest_and_expired_entries():
+    cache = LocalCache(ttl=60, max_entries=2, max_bytes=10)
+    cache.set('a', b'1')
+    cache.set('b', b'2')
+    cache.get('a')
+    cache.set('c', b'3')
+    # 'b' est le moins récemment utilisé
+    assert cache.get('b') is None
+    assert cache.get('a') == b'1'
+
+    # La taille totale est bornée
+    cache.set('d', b'x' * 10)
+    assert cache.get('a') is None and cache.get('c') is None
+    assert cache.get('d') == b'x' * 10
+
+    cache.ttl = 0
+    cache.set('e', b'5')
+    time.sleep(0.01)
+    assert cache.get('e') is None
+
+def test_books_cache_invalidated_by_add_book(client):
+    db.session.add(Book(title='Test Book', author='Test Author'))
+    db.session.commit()
+
+    response = client.get('/api/books')
+    assert response.headers['X-Cache'] == 'MISS'
+    response = client.get('/api/books')
+    assert response.headers['X-Cache'] == 'HIT'
+    assert len(response.json) == 1
+
+    response = client.post('/api/books', json={'title': 'Autre livre', 'author': 'Autre auteur'})
+    assert response.status_code == 201
+
+    response = client.get('/api/books')
+    assert response.headers['X-Cache'] == 'MISS'
+    assert len(response.json) == 2
+
+def test_streamed_readings_cache_invalidated_by_update_reading(client):
+    professor = User(email='prof@test.com', password=generate_password_hash('password123'),
+                     role='professor', first_name='John', last_name='Doe')
+    student = User(email='student@test.com', password=generate_password_hash('password123'),
+                   role='student', first_name='Jane', last_name='Doe')
+    db.session.add_all([professor, student])
+    db.session.commit()
+
+    classroom = Classroom(name='Test Class', professor_id=professor.id)
+    book = Book(title='Test Book', author='Test Author')
+    db.session.add_all([classroom, book])
+    db.session.commit()
+
+    assignment = ReadingAssignment(book_id=book.id, classroom_id=classroom.id)
+    db.session.add(assignment)
+    db.session.commit()
+
+    reading = StudentReading(user_id=student.id, assignment_id=assignment.id, summary='Résumé')
+    db.session.add(reading)
+    db.session.commit()
+    reading_id = reading.id
+
+    token = client.post('/api/auth/login', json={
+        'email': 'prof@test.com', 'password': 'password123'
+    }).json['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    # Réponse en streaming : copiée dans le cache une fois envoyée en entier
+    response = client.get('/api/student-readings', headers=headers)
+    body = response.get_data()
+    assert response.headers['X-Cache'] == 'MISS'
+
+    response = client.get('/api/student-readings', headers=headers)
+    assert response.headers['X-Cache'] == 'HIT'
+    assert response.get_data() == body
+    assert 'db;dur=0.00;desc="0 queries"' in response.headers.getlist('Server-Timing')
+
+    # Le format NDJSON a sa propre entrée
+    response = client.get('/api/student-readings', headers={**headers, 'Accept': 'application/x-ndjson'})
+    response.get_data()
+    assert response.headers['X-Cache'] == 'MISS'
+
+    response = client.patch(f'/api/student-readings/{reading_id}', headers=headers, json={'status': 'valide'})
+    assert response.status_code == 200
+
+    response = client.get('/api/student-readings', headers=headers)
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.json[0]['status'] == 'valide'
+
+def test_redis_backend_shares_generations(app, client):
+    redis = FakeRedis()
+    app.extensions['response_cache'] = RedisCache(redis)
+    db.session.add(Book(title='Test Book', author='Test Author'))
+    db.session.commit()
+
+    assert client.get('/api/books').headers['X-Cache'] == 'MISS'
+    assert client.get('/api/books').headers['X-Cache'] == 'HIT'
+
+    # Une écriture faite par un autre worker incrémente la génération partagée
+    redis.incr('esme:cache:gen:book')
+    assert client.get('/api/books').headers['X-Cache'] == 'MISS'
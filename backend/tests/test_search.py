@@ -0,0 +1,102 @@
+import pytest
+from app import create_app
+from models import db, User, Classroom, Book, ReadingAssignment, StudentReading
+from werkzeug.security import generate_password_hash
+
+@pytest.fixture
+def app():
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def test_search_books_ranked_and_paginated(client):
+    db.session.add_all([
+        Book(title='Le Petit Prince', author='Antoine de Saint-Exupéry'),
+        Book(title='Prince Caspian', author='C. S. Lewis'),
+        Book(title='Le Prince, le prince et le prince', author='Anonyme'),
+        Book(title='Germinal', author='Émile Zola'),
+    ])
+    db.session.commit()
+
+    response = client.get('/api/books/search?q=prince')
+    assert response.status_code == 200
+    titles = [b['title'] for b in response.json]
+    assert len(titles) == 3
+    # Le titre qui répète le mot arrive en tête
+    assert titles[0] == 'Le Prince, le prince et le prince'
+
+    # Plusieurs mots : tous requis, préfixes et accents ignorés
+    response = client.get('/api/books/search?q=petit exup')
+    assert [b['title'] for b in response.json] == ['Le Petit Prince']
+    response = client.get('/api/books/search?q=emile')
+    assert [b['title'] for b in response.json] == ['Germinal']
+
+    # Pagination par curseur sur (rang, id)
+    seen = []
+    url = '/api/books/search?q=prince&limit=2'
+    while url:
+        page = client.get(url).json
+        seen += [b['title'] for b in page['items']]
+        url = f"/api/books/search?q=prince&limit=2&cursor={page['next_cursor']}" if page['next_cursor'] else None
+    assert seen == titles
+
+    assert client.get('/api/books/search?q=').status_code == 400
+
+def test_search_index_follows_updates(client):
+    book = Book(title='Titre provisoire', author='Auteur')
+    db.session.add(book)
+    db.session.commit()
+
+    book.title = 'Les Misérables'
+    db.session.commit()
+
+    assert client.get('/api/books/search?q=provisoire').json == []
+    assert [b['id'] for b in client.get('/api/books/search?q=miserables').json] == [book.id]
+
+    db.session.delete(book)
+    db.session.commit()
+    assert client.get('/api/books/search?q=miserables').json == []
+
+def test_search_readings_scoped_to_professor(client):
+    professor = User(email='prof@test.com', password=generate_password_hash('password123'),
+                     role='professor', first_name='John', last_name='Doe')
+    other = User(email='other@test.com', password='x', role='professor', first_name='Ann', last_name='Roe')
+    student = User(email='student@test.com', password='x', role='student', first_name='Jane', last_name='Doe')
+    db.session.add_all([professor, other, student])
+    db.session.commit()
+
+    book = Book(title='Test Book', author='Test Author')
+    classroom = Classroom(name='Test Class', professor_id=professor.id)
+    other_classroom = Classroom(name='Other Class', professor_id=other.id)
+    db.session.add_all([book, classroom, other_classroom])
+    db.session.commit()
+
+    assignment = ReadingAssignment(book_id=book.id, classroom_id=classroom.id)
+    second_assignment = ReadingAssignment(book_id=book.id, classroom_id=classroom.id)
+    other_assignment = ReadingAssignment(book_id=book.id, classroom_id=other_classroom.id)
+    db.session.add_all([assignment, second_assignment, other_assignment])
+    db.session.commit()
+
+    db.session.add_all([
+        StudentReading(user_id=student.id, assignment_id=assignment.id, summary='Un aviateur rencontre un petit prince.'),
+        StudentReading(user_id=student.id, assignment_id=second_assignment.id, summary='Une histoire de mineurs.'),
+        StudentReading(user_id=student.id, assignment_id=other_assignment.id, summary="L'aviateur et le renard."),
+    ])
+    db.session.commit()
+
+    token = client.post('/api/auth/login', json={
+        'email': 'prof@test.com',
+        'password': 'password123'
+    }).json['access_token']
+
+    response = client.get('/api/student-readings/search?q=aviateur', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200
+    assert [r['summary'] for r in response.json] == ['Un aviateur rencontre un petit prince.']
+    assert response.json[0]['student']['first_name'] == 'Jane'
@@ -0,0 +1,52 @@
+import json
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+from app import create_app
+from models import Book, Classroom, ReadingAssignment, StudentReading, User
+from serializers import READING, Serializer, SUBMISSION, OrjsonProvider
+from flask.json.provider import DefaultJSONProvider
+
+def _reading():
+    book = Book(id=3, title='Test Book', author='Test Author')
+    classroom = Classroom(id=4, name='Test Class')
+    assignment = ReadingAssignment(id=2, book=book, classroom=classroom)
+    student = User(id=5, first_name='Jane', last_name='Doe', email='jane@test.com', role='student')
+    return StudentReading(id=1, user_id=5, assignment_id=2, summary='Résumé', status='en_attente',
+                          submitted_at=datetime(2024, 1, 2, 3, 4, 5), student=student, assignment=assignment)
+
+def test_serializer_builds_nested_dicts():
+    assert READING(_reading()) == {
+        'id': 1, 'assignment_id': 2, 'user_id': 5, 'summary': 'Résumé', 'status': 'en_attente',
+        'submitted_at': '2024-01-02T03:04:05', 'validated_at': None,
+        'student': {'id': 5, 'first_name': 'Jane', 'last_name': 'Doe'},
+        'assignment': {'id': 2, 'book': {'id': 3, 'title': 'Test Book', 'author': 'Test Author'},
+                       'classroom': {'id': 4, 'name': 'Test Class'}}
+    }
+
+    reading = _reading()
+    reading.student = None
+    assert READING(reading)['student'] is None
+    assert set(SUBMISSION(reading)) == {'id', 'assignment_id', 'summary', 'status', 'submitted_at',
+                                        'validated_at', 'assignment'}
+
+def test_only_is_cached_and_checks_fields():
+    serializer = Serializer('id', 'title', 'author')
+    assert serializer.only('title', 'id') is serializer.only('id', 'title')
+    assert serializer.only('id')(Book(id=1, title='T', author='A')) == {'id': 1}
+    with pytest.raises(KeyError):
+        serializer.only('id', 'password')
+
+def test_orjson_provider_matches_default_provider():
+    pytest.importorskip('orjson')
+    app = create_app()
+    payload = {'b': [1, 2.5, None, True], 'a': 'é', 'date': datetime(2024, 1, 2, 3, 4, 5),
+               'decimal': Decimal('1.50')}
+    fast, default = OrjsonProvider(app), DefaultJSONProvider(app)
+
+    assert json.loads(fast.dumps(payload)) == json.loads(default.dumps(payload))
+    # Clés triées, comme l'encodeur de Flask
+    assert fast.dumps({'b': 1, 'a': 2}) == '{"a":2,"b":1}'
+    with app.app_context():
+        assert json.loads(fast.response(payload).data) == json.loads(default.response(payload).data)
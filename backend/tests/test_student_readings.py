@@ -1,7 +1,9 @@
 import pytest
+import json
 from app import create_app
-from models import db, User, Classroom, Book, ReadingAssignment, StudentReading
+from models import db, User, Classroom, Book, ReadingAssignment, StudentReading, AssignmentStatusCount
 from werkzeug.security import generate_password_hash
+from sqlalchemy import event
 
 @pytest.fixture
 def app():
@@ -231,3 +233,489 @@ def test_validate_reading(client):
     
     assert response.status_code == 200
     assert response.json['status'] == 'valide'
+
+def _count_queries(client, url, token):
+    """Exécute une requête GET et retourne (réponse, nombre de requêtes SQL)."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get(url, headers={'Authorization': f'Bearer {token}'})
+        # Consommer la réponse (éventuellement en streaming) pendant le comptage
+        response.get_data()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+    return response, len(statements)
+
+def test_get_all_readings_query_count_is_flat(client):
+    # Créer un professeur, une classe, un livre et un devoir
+    professor = User(
+        email='prof@test.com',
+        password=generate_password_hash('password123'),
+        role='professor',
+        first_name='John',
+        last_name='Doe'
+    )
+    db.session.add(professor)
+    db.session.commit()
+
+    classroom = Classroom(name='Test Class', professor_id=professor.id)
+    book = Book(title='Test Book', author='Test Author')
+    db.session.add_all([classroom, book])
+    db.session.commit()
+
+    assignment = ReadingAssignment(book_id=book.id, classroom_id=classroom.id)
+    db.session.add(assignment)
+    db.session.commit()
+
+    def add_readings(count, offset):
+        for i in range(offset, offset + count):
+            student = User(
+                email=f'student{i}@test.com',
+                password='x',
+                role='student',
+                first_name=f'Student{i}',
+                last_name='Doe'
+            )
+            db.session.add(student)
+            db.session.flush()
+            db.session.add(StudentReading(
+                user_id=student.id,
+                assignment_id=assignment.id,
+                summary=f'Résumé {i}',
+                status='en_attente'
+            ))
+        db.session.commit()
+
+    login_response = client.post('/api/auth/login', json={
+        'email': 'prof@test.com',
+        'password': 'password123'
+    })
+    token = login_response.json['access_token']
+
+    # Quelques lectures, puis beaucoup plus : le nombre de requêtes ne doit pas bouger
+    add_readings(2, 0)
+    db.session.expire_all()
+    small_response, small_count = _count_queries(client, '/api/student-readings', token)
+
+    add_readings(20, 2)
+    db.session.expire_all()
+    large_response, large_count = _count_queries(client, '/api/student-readings', token)
+
+    assert small_response.status_code == 200
+    assert large_response.status_code == 200
+    assert len(small_response.json) == 2
+    assert len(large_response.json) == 22
+    assert large_count == small_count
+
+    reading = large_response.json[0]
+    assert reading['student']['first_name'].startswith('Student')
+    assert reading['assignment']['book']['title'] == 'Test Book'
+    assert reading['assignment']['classroom']['name'] == 'Test Class'
+
+def test_get_all_readings_keyset_pagination(client):
+    # Créer un professeur, une classe, un livre et un devoir
+    professor = User(
+        email='prof@test.com',
+        password=generate_password_hash('password123'),
+        role='professor',
+        first_name='John',
+        last_name='Doe'
+    )
+    db.session.add(professor)
+    db.session.commit()
+
+    classroom = Classroom(name='Test Class', professor_id=professor.id)
+    book = Book(title='Test Book', author='Test Author')
+    db.session.add_all([classroom, book])
+    db.session.commit()
+
+    assignment = ReadingAssignment(book_id=book.id, classroom_id=classroom.id)
+    db.session.add(assignment)
+    db.session.commit()
+
+    # Cinq lectures, dont deux validées
+    for i in range(5):
+        student = User(
+            email=f'student{i}@test.com',
+            password='x',
+            role='student',
+            first_name=f'Student{i}',
+            last_name='Doe'
+        )
+        db.session.add(student)
+        db.session.flush()
+        db.session.add(StudentReading(
+            user_id=student.id,
+            assignment_id=assignment.id,
+            summary=f'Résumé {i}',
+            status='valide' if i % 2 else 'en_attente'
+        ))
+    db.session.commit()
+
+    login_response = client.post('/api/auth/login', json={
+        'email': 'prof@test.com',
+        'password': 'password123'
+    })
+    headers = {'Authorization': f'Bearer {login_response.json["access_token"]}'}
+
+    # Parcourir toutes les pages de deux éléments
+    ids = []
+    cursor = None
+    while True:
+        url = '/api/student-readings?limit=2' + (f'&cursor={cursor}' if cursor else '')
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        assert len(response.json['items']) <= 2
+        ids.extend(item['id'] for item in response.json['items'])
+        cursor = response.json['next_cursor']
+        if not cursor:
+            break
+
+    assert len(ids) == 5
+    assert len(set(ids)) == 5
+
+    # Filtre côté serveur sur le statut
+    response = client.get('/api/student-readings?limit=10&status=valide', headers=headers)
+    assert response.status_code == 200
+    assert len(response.json['items']) == 2
+    assert all(item['status'] == 'valide' for item in response.json['items'])
+    assert response.json['next_cursor'] is None
+
+    # Paramètres invalides
+    response = client.get('/api/student-readings?limit=0', headers=headers)
+    assert response.status_code == 400
+    response = client.get('/api/student-readings?cursor=invalide', headers=headers)
+    assert response.status_code == 400
+
+def test_get_all_readings_streaming_formats(client):
+    # Créer un professeur, un étudiant, une classe, un livre, un devoir et deux lectures
+    professor = User(
+        email='prof@test.com',
+        password=generate_password_hash('password123'),
+        role='professor',
+        first_name='John',
+        last_name='Doe'
+    )
+    student = User(
+        email='student@test.com',
+        password='x',
+        role='student',
+        first_name='Jane',
+        last_name='Doe'
+    )
+    db.session.add_all([professor, student])
+    db.session.commit()
+
+    classroom = Classroom(name='Test Class', professor_id=professor.id)
+    book = Book(title='Test Book', author='Test Author')
+    db.session.add_all([classroom, book])
+    db.session.commit()
+
+    assignments = [ReadingAssignment(book_id=book.id, classroom_id=classroom.id) for _ in range(2)]
+    db.session.add_all(assignments)
+    db.session.commit()
+
+    for assignment, summary in zip(assignments, ('Premier résumé', 'Second résumé')):
+        db.session.add(StudentReading(user_id=student.id, assignment_id=assignment.id, summary=summary))
+    db.session.commit()
+
+    login_response = client.post('/api/auth/login', json={
+        'email': 'prof@test.com',
+        'password': 'password123'
+    })
+    token = login_response.json['access_token']
+
+    # Tableau JSON envoyé en streaming
+    response = client.get('/api/student-readings', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert [r['summary'] for r in response.json] == ['Premier résumé', 'Second résumé']
+
+    # NDJSON sur demande via Accept
+    response = client.get('/api/student-readings', headers={
+        'Authorization': f'Bearer {token}',
+        'Accept': 'application/x-ndjson'
+    })
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    lines = response.get_data(as_text=True).splitlines()
+    assert len(lines) == 2
+    assert json.loads(lines[1])['assignment']['book']['title'] == 'Test Book'
+
+    # Même chose pour les soumissions d'un étudiant
+    response = client.get(f'/api/users/{student.id}/submissions', headers={
+        'Authorization': f'Bearer {token}',
+        'Accept': 'application/x-ndjson'
+    })
+    assert response.status_code == 200
+    assert len(response.get_data(as_text=True).splitlines()) == 2
+
+def test_batch_update_readings(client):
+    # Deux professeurs, chacun avec sa classe et son devoir
+    professor = User(email='prof@test.com', password=generate_password_hash('password123'),
+                     role='professor', first_name='John', last_name='Doe')
+    other = User(email='other@test.com', password='x', role='professor', first_name='Ann', last_name='Roe')
+    db.session.add_all([professor, other])
+    db.session.commit()
+
+    book = Book(title='Test Book', author='Test Author')
+    classroom = Classroom(name='Test Class', professor_id=professor.id)
+    other_classroom = Classroom(name='Other Class', professor_id=other.id)
+    db.session.add_all([book, classroom, other_classroom])
+    db.session.commit()
+
+    assignment = ReadingAssignment(book_id=book.id, classroom_id=classroom.id)
+    other_assignment = ReadingAssignment(book_id=book.id, classroom_id=other_classroom.id)
+    db.session.add_all([assignment, other_assignment])
+    db.session.commit()
+
+    readings = []
+    for i, assignment_id in enumerate([assignment.id, assignment.id, assignment.id, other_assignment.id]):
+        student = User(email=f'student{i}@test.com', password='x', role='student',
+                       first_name=f'Student{i}', last_name='Doe')
+        db.session.add(student)
+        db.session.flush()
+        readings.append(StudentReading(user_id=student.id, assignment_id=assignment_id,
+                                       summary=f'Résumé {i}', status='en_attente'))
+    db.session.add_all(readings)
+    db.session.commit()
+    ids = [r.id for r in readings]
+
+    token = client.post('/api/auth/login', json={
+        'email': 'prof@test.com',
+        'password': 'password123'
+    }).json['access_token']
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.patch('/api/student-readings', headers={'Authorization': f'Bearer {token}'}, json={
+            'readings': [
+                {'id': ids[0], 'status': 'valide'},
+                {'id': ids[1], 'status': 'refuse'},
+                {'id': ids[2], 'status': 'validated'},
+                {'id': ids[3], 'status': 'valide'},
+                {'id': 9999, 'status': 'valide'},
+                {'id': ids[2]}
+            ]
+        })
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    assert response.status_code == 200
+    assert response.json['updated'] == 2
+    assert response.json['failed'] == 4
+    results = response.json['results']
+    assert results[0]['status'] == 'valide' and results[0]['validated_at']
+    assert results[1]['status'] == 'refuse'
+    # Seuls les statuts comptés par les tableaux de bord sont acceptés, sans valeur par défaut
+    assert results[2]['error'] == 'Statut invalide, attendu : en_attente, valide, refuse'
+    assert results[3]['error'] == 'Accès non autorisé'
+    assert results[4]['error'] == 'Résumé non trouvé'
+    assert results[5]['error'] == results[2]['error']
+
+    # Une seule requête d'autorisation et un seul UPDATE des résumés
+    assert sum(1 for s in statements if s.lstrip().upper().startswith('SELECT')) == 1
+    assert sum(1 for s in statements if s.lstrip().upper().startswith('UPDATE STUDENT_READING')) == 1
+
+    db.session.expire_all()
+    assert [db.session.get(StudentReading, i).status for i in ids] == ['valide', 'refuse', 'en_attente', 'en_attente']
+
+    # Corps invalide
+    response = client.patch('/api/student-readings', headers={'Authorization': f'Bearer {token}'}, json={'readings': []})
+    assert response.status_code == 400
+
+def test_update_reading_rejects_unknown_status(client):
+    professor = User(email='prof@test.com', password=generate_password_hash('password123'),
+                     role='professor', first_name='John', last_name='Doe')
+    student = User(email='student@test.com', password='x', role='student', first_name='Jane', last_name='Doe')
+    db.session.add_all([professor, student])
+    db.session.commit()
+    book = Book(title='Test Book', author='Test Author')
+    classroom = Classroom(name='Test Class', professor_id=professor.id)
+    db.session.add_all([book, classroom])
+    db.session.commit()
+    assignment = ReadingAssignment(book_id=book.id, classroom_id=classroom.id)
+    db.session.add(assignment)
+    db.session.commit()
+    reading = StudentReading(user_id=student.id, assignment_id=assignment.id, summary='Résumé', status='en_attente')
+    db.session.add(reading)
+    db.session.commit()
+
+    token = client.post('/api/auth/login', json={
+        'email': 'prof@test.com',
+        'password': 'password123'
+    }).json['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    # Même contrat que la correction groupée : statut obligatoire, parmi STATUSES
+    for body in ({}, {'status': 'validated'}, {'status': 'n_importe_quoi'}):
+        response = client.patch(f'/api/student-readings/{reading.id}', headers=headers, json=body)
+        assert response.status_code == 400
+        assert response.json['error'] == 'Statut invalide, attendu : en_attente, valide, refuse'
+    db.session.expire_all()
+    assert db.session.get(StudentReading, reading.id).status == 'en_attente'
+
+    response = client.patch(f'/api/student-readings/{reading.id}', headers=headers, json={'status': 'refuse'})
+    assert response.status_code == 200
+    assert response.json['status'] == 'refuse'
+
+def test_get_all_readings_sparse_fieldsets(client):
+    professor = User(email='prof@test.com', password=generate_password_hash('password123'),
+                     role='professor', first_name='John', last_name='Doe')
+    student = User(email='student@test.com', password='x', role='student', first_name='Jane', last_name='Doe')
+    db.session.add_all([professor, student])
+    db.session.flush()
+    classroom = Classroom(name='Test Class', professor_id=professor.id)
+    book = Book(title='Test Book', author='Test Author')
+    db.session.add_all([classroom, book])
+    db.session.flush()
+    assignment = ReadingAssignment(book_id=book.id, classroom_id=classroom.id)
+    db.session.add(assignment)
+    db.session.flush()
+    db.session.add(StudentReading(user_id=student.id, assignment_id=assignment.id, summary='Un long résumé'))
+    db.session.commit()
+    token = client.post('/api/auth/login', json={
+        'email': 'prof@test.com',
+        'password': 'password123'
+    }).json['access_token']
+    headers = {'Authorization': f'Bearer {token}'}
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        response = client.get('/api/student-readings?limit=10&fields=id,status', headers=headers)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    # Ni résumé, ni relation : colonnes et jointures absentes du SQL
+    assert response.status_code == 200
+    assert list(response.json['items'][0]) == ['id', 'status']
+    select_statement = next(s for s in statements if 'FROM student_reading' in s)
+    assert 'summary' not in select_statement
+    assert '"user"' not in select_statement and 'book' not in select_statement
+
+    # Relation demandée explicitement, format complet des objets liés
+    response = client.get('/api/student-readings?fields=id&include=student', headers=headers)
+    response.get_data()
+    assert response.json == [{'id': response.json[0]['id'],
+                              'student': {'id': student.id, 'first_name': 'Jane', 'last_name': 'Doe'}}]
+
+    response = client.get(f'/api/users/{student.id}/submissions?include=assignment&fields=status', headers=headers)
+    response.get_data()
+    assert response.json[0] == {'status': 'en_attente', 'assignment': {
+        'id': assignment.id,
+        'book': {'id': book.id, 'title': 'Test Book', 'author': 'Test Author'},
+        'classroom': {'id': classroom.id, 'name': 'Test Class'}
+    }}
+
+    # Champ ou relation inconnus
+    assert client.get('/api/student-readings?fields=password', headers=headers).status_code == 400
+    assert client.get('/api/student-readings?include=book', headers=headers).status_code == 400
+
+def _submission_setup(client):
+    professor = User(email='prof@test.com', password=generate_password_hash('password123'),
+                     role='professor', first_name='John', last_name='Doe')
+    student = User(email='student@test.com', password=generate_password_hash('password123'),
+                   role='student', first_name='Jane', last_name='Doe')
+    db.session.add_all([professor, student])
+    db.session.flush()
+    classroom = Classroom(name='Test Class', professor_id=professor.id)
+    classroom.students.append(student)
+    book = Book(title='Test Book', author='Test Author')
+    db.session.add_all([classroom, book])
+    db.session.flush()
+    assignment = ReadingAssignment(book_id=book.id, classroom_id=classroom.id)
+    db.session.add(assignment)
+    db.session.commit()
+    token = client.post('/api/auth/login', json={
+        'email': 'student@test.com',
+        'password': 'password123'
+    }).json['access_token']
+    return assignment, {'Authorization': f'Bearer {token}'}
+
+def test_resubmission_updates_reading_in_place(client):
+    assignment, headers = _submission_setup(client)
+
+    first = client.post('/api/student-readings', headers=headers,
+                        json={'assignment_id': assignment.id, 'summary': 'Premier jet'})
+    assert first.status_code == 201
+
+    # Résumé corrigé puis redéposé : il repasse en attente
+    reading = db.session.get(StudentReading, first.json['id'])
+    reading.status = 'refuse'
+    db.session.commit()
+
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        second = client.post('/api/student-readings', headers=headers,
+                             json={'assignment_id': assignment.id, 'summary': 'Version corrigée'})
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', before_cursor_execute)
+
+    assert second.status_code == 200
+    assert second.json['id'] == first.json['id']
+    assert second.json['summary'] == 'Version corrigée'
+    assert second.json['status'] == 'en_attente'
+    # INSERT sans effet (conflit), puis un UPDATE : aucune lecture préalable ne
+    # décide entre création et remplacement
+    inserts = [s for s in statements if s.startswith('INSERT INTO student_reading')]
+    updates = [s for s in statements if s.startswith('UPDATE student_reading')]
+    assert len(inserts) == 1 and 'DO NOTHING' in inserts[0]
+    assert len(updates) == 1
+    assert not any(s.startswith('SELECT') and 'FROM student_reading' in s
+                   for s in statements[:statements.index(updates[0])])
+
+    db.session.expire_all()
+    assert StudentReading.query.count() == 1
+    counts = {c.status: c.count for c in AssignmentStatusCount.query.filter_by(assignment_id=assignment.id)}
+    assert counts.get('en_attente') == 1 and not counts.get('refuse')
+
+def test_idempotency_key_replays_submission(client):
+    assignment, headers = _submission_setup(client)
+    retry = {**headers, 'Idempotency-Key': 'depot-42'}
+
+    first = client.post('/api/student-readings', headers=retry,
+                        json={'assignment_id': assignment.id, 'summary': 'Mon résumé'})
+    assert first.status_code == 201
+    assert 'Idempotent-Replayed' not in first.headers
+
+    # Envoi répété : même réponse, rien n'est réécrit
+    replay = client.post('/api/student-readings', headers=retry,
+                         json={'assignment_id': assignment.id, 'summary': 'Mon résumé'})
+    assert replay.status_code == 200
+    assert replay.headers['Idempotent-Replayed'] == 'true'
+    assert replay.json == first.json
+
+    # Même clé pour un autre contenu : refusé
+    conflict = client.post('/api/student-readings', headers=retry,
+                           json={'assignment_id': assignment.id, 'summary': 'Autre chose'})
+    assert conflict.status_code == 422
+
+    # Nouvelle clé : nouveau dépôt, toujours sur la même ligne
+    update = client.post('/api/student-readings', headers={**headers, 'Idempotency-Key': 'depot-43'},
+                         json={'assignment_id': assignment.id, 'summary': 'Autre chose'})
+    assert update.status_code == 200
+    assert update.json['id'] == first.json['id']
+    assert StudentReading.query.count() == 1
+
+    too_long = {**headers, 'Idempotency-Key': 'x' * 65}
+    assert client.post('/api/student-readings', headers=too_long,
+                       json={'assignment_id': assignment.id, 'summary': 'Mon résumé'}).status_code == 400
@@ -0,0 +1,166 @@
+from datetime import datetime, timedelta
+
+import pytest
+from app import create_app
+from models import db, User, Classroom, Book, ReadingAssignment, StudentReading, SyncTombstone
+from pagination import encode_cursor
+from sync import prune_tombstones
+from werkzeug.security import generate_password_hash
+
+@pytest.fixture
+def app():
+    app = create_app()
+    # Sans marge, un second appel immédiat ne renvoie que les nouveaux changements
+    app.config['SYNC_OVERLAP'] = 0
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+def _setup(client):
+    password = generate_password_hash('password123')
+    professor = User(email='prof@test.com', password=password, role='professor', first_name='John', last_name='Doe')
+    other = User(email='other@test.com', password=password, role='professor', first_name='Ann', last_name='Roe')
+    student = User(email='student@test.com', password=password, role='student', first_name='Jane', last_name='Doe')
+    db.session.add_all([professor, other, student])
+    db.session.flush()
+    classroom = Classroom(name='Test Class', professor_id=professor.id)
+    classroom.students.append(student)
+    books = [Book(title='Test Book', author='Test Author'), Book(title='Other Book', author='Other Author')]
+    db.session.add_all([classroom, *books])
+    db.session.flush()
+    assignment = ReadingAssignment(book_id=books[0].id, classroom_id=classroom.id)
+    db.session.add(assignment)
+    db.session.flush()
+    reading = StudentReading(user_id=student.id, assignment_id=assignment.id, summary='Résumé')
+    db.session.add(reading)
+    db.session.commit()
+
+    def headers(email):
+        token = client.post('/api/auth/login', json={'email': email, 'password': 'password123'}).json['access_token']
+        return {'Authorization': f'Bearer {token}'}
+    return books, assignment, reading, headers
+
+def _ids(response, section):
+    return [item['id'] for item in response.json[section]['changed']]
+
+def test_sync_returns_only_changes_since_cursor(client):
+    books, assignment, reading, headers = _setup(client)
+    professor = headers('prof@test.com')
+
+    # Premier appel : tout ce que le professeur peut voir
+    first = client.get('/api/sync', headers=professor)
+    assert first.status_code == 200
+    assert sorted(_ids(first, 'books')) == sorted(book.id for book in books)
+    assert _ids(first, 'assignments') == [assignment.id]
+    assert first.json['readings']['changed'][0]['student'] == {'id': reading.user_id, 'first_name': 'Jane',
+                                                              'last_name': 'Doe'}
+    assert first.json['has_more'] is False
+
+    # Rien n'a changé
+    second = client.get(f"/api/sync?since={first.json['cursor']}", headers=professor)
+    assert all(second.json[name] == {'changed': [], 'deleted': []} for name in ('books', 'assignments', 'readings'))
+
+    # Correction groupée (UPDATE direct) : updated_at suit
+    client.patch('/api/student-readings', headers=professor,
+                 json={'readings': [{'id': reading.id, 'status': 'valide'}]})
+    third = client.get(f"/api/sync?since={second.json['cursor']}", headers=professor)
+    assert third.json['readings']['changed'][0]['status'] == 'valide'
+    assert _ids(third, 'books') == [] and _ids(third, 'assignments') == []
+
+    # Suppression d'un livre : le devoir et le résumé supprimés en cascade sont signalés aussi
+    deleted = books[0].id, assignment.id, reading.id
+    client.delete(f'/api/books/{books[0].id}', headers=professor)
+    fourth = client.get(f"/api/sync?since={third.json['cursor']}", headers=professor)
+    assert fourth.json['books']['deleted'] == [deleted[0]]
+    assert fourth.json['assignments']['deleted'] == [deleted[1]]
+    assert fourth.json['readings']['deleted'] == [deleted[2]]
+
+def test_sync_is_scoped_to_the_user(client):
+    _, assignment, reading, headers = _setup(client)
+
+    student = client.get('/api/sync', headers=headers('student@test.com')).json
+    assert [r['id'] for r in student['readings']['changed']] == [reading.id]
+    assert 'student' not in student['readings']['changed'][0]
+    assert [a['id'] for a in student['assignments']['changed']] == [assignment.id]
+
+    other = client.get('/api/sync', headers=headers('other@test.com')).json
+    assert other['readings']['changed'] == [] and other['assignments']['changed'] == []
+
+def test_sync_pages_and_cursor_errors(client):
+    books, _, _, headers = _setup(client)
+    professor = headers('prof@test.com')
+
+    # Une ligne par section : les livres arrivent en deux appels
+    first = client.get('/api/sync?limit=1', headers=professor).json
+    assert first['has_more'] is True
+    second = client.get(f"/api/sync?limit=1&since={first['cursor']}", headers=professor).json
+    assert sorted(_ids_of(first['books']) + _ids_of(second['books'])) == sorted(book.id for book in books)
+    assert second['has_more'] is False
+
+    assert client.get('/api/sync?since=abc', headers=professor).status_code == 400
+    assert client.get('/api/sync?limit=0', headers=professor).status_code == 400
+
+    # Suppressions plus anciennes que la durée de conservation : resynchronisation complète
+    old = datetime.utcnow() - timedelta(days=60)
+    expired = encode_cursor([old, 0] * 4)
+    assert client.get(f'/api/sync?since={expired}', headers=professor).status_code == 410
+
+    # Nettoyage hors requête (flask sync prune) : seules les suppressions expirées partent
+    db.session.add_all([SyncTombstone(table_name='book', row_id=1, deleted_at=old),
+                        SyncTombstone(table_name='book', row_id=2, deleted_at=datetime.utcnow())])
+    db.session.commit()
+    assert prune_tombstones() == 1
+    assert [t.row_id for t in SyncTombstone.query] == [2]
+
+def _ids_of(section):
+    return [item['id'] for item in section['changed']]
+
+def test_sync_deletions_are_scoped_to_the_user(client):
+    books, assignment, reading, headers = _setup(client)
+    professor, other, student = headers('prof@test.com'), headers('other@test.com'), headers('student@test.com')
+    cursors = {name: client.get('/api/sync', headers=h).json['cursor']
+               for name, h in (('prof', professor), ('other', other), ('student', student))}
+
+    deleted = assignment.id, reading.id
+    client.delete(f'/api/books/{books[0].id}', headers=professor)
+
+    def sync(name, h):
+        return client.get(f'/api/sync?since={cursors[name]}', headers=h).json
+
+    # Le livre est visible de tous ; le devoir et le résumé seulement de la classe
+    assert sync('other', other)['books']['deleted'] == [books[0].id]
+    assert sync('other', other)['assignments']['deleted'] == [] and sync('other', other)['readings']['deleted'] == []
+    assert sync('student', student)['assignments']['deleted'] == [deleted[0]]
+    assert sync('student', student)['readings']['deleted'] == [deleted[1]]
+    assert sync('prof', professor)['readings']['deleted'] == [deleted[1]]
+
+def test_sync_follows_classroom_membership(client):
+    _, assignment, _, headers = _setup(client)
+    professor, student = headers('prof@test.com'), headers('student@test.com')
+    student_id = User.query.filter_by(email='student@test.com').one().id
+    classroom_id, assignment_id = assignment.classroom_id, assignment.id
+    cursor = client.get('/api/sync', headers=student).json['cursor']
+
+    # Retiré de la classe : les devoirs de la classe sont supprimés de sa vue
+    client.delete(f'/api/classrooms/{classroom_id}/students/{student_id}', headers=professor)
+    response = client.get(f'/api/sync?since={cursor}', headers=student).json
+    assert response['assignments']['deleted'] == [assignment_id]
+    cursor = response['cursor']
+
+    # Ajouté de nouveau : les devoirs lui sont renvoyés
+    client.post(f'/api/classrooms/{classroom_id}/students', headers=professor, json={'student_id': student_id})
+    response = client.get(f'/api/sync?since={cursor}', headers=student).json
+    assert _ids_of(response['assignments']) == [assignment_id]
+    cursor = response['cursor']
+
+    # Classe supprimée : devoirs et résumés de l'élève supprimés, une seule fois chacun
+    client.delete(f'/api/classrooms/{classroom_id}', headers=professor)
+    response = client.get(f'/api/sync?since={cursor}', headers=student).json
+    assert response['assignments']['deleted'] == [assignment_id]
+    assert len(response['readings']['deleted']) == 1
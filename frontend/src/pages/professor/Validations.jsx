@@ -56,7 +56,7 @@ const Validations = () => {
   const handleValidate = async (readingId) => {
     try {
       await axios.patch(`/api/student-readings/${readingId}`, {
-        status: 'validated'
+        status: 'valide'
       });
       fetchAssignments();
     } catch (error) {
@@ -68,7 +68,7 @@ const Validations = () => {
   const handleReject = async (readingId) => {
     try {
       await axios.patch(`/api/student-readings/${readingId}`, {
-        status: 'rejected'
+        status: 'refuse'
       });
       fetchAssignments();
     } catch (error) {
@@ -223,10 +223,10 @@ const Validations = () => {
                       </Typography>
                       <Box sx={{ mt: 2 }}>
                         <Chip
-                          label={reading.status === 'validated' ? 'Validé' : 
-                                 reading.status === 'rejected' ? 'Rejeté' : 'En attente'}
-                          color={reading.status === 'validated' ? 'success' : 
-                                 reading.status === 'rejected' ? 'error' : 'warning'}
+                          label={reading.status === 'valide' ? 'Validé' : 
+                                 reading.status === 'refuse' ? 'Rejeté' : 'En attente'}
+                          color={reading.status === 'valide' ? 'success' : 
+                                 reading.status === 'refuse' ? 'error' : 'warning'}
                           sx={{
                             fontWeight: 500,
                             borderRadius: '8px',
@@ -351,10 +351,10 @@ const Validations = () => {
                 </Typography>
                 <Box sx={{ mb: 3 }}>
                   <Chip
-                    label={selectedAssignment.status === 'validated' ? 'Validé' : 
-                           selectedAssignment.status === 'rejected' ? 'Rejeté' : 'En attente'}
-                    color={selectedAssignment.status === 'validated' ? 'success' : 
-                           selectedAssignment.status === 'rejected' ? 'error' : 'warning'}
+                    label={selectedAssignment.status === 'valide' ? 'Validé' : 
+                           selectedAssignment.status === 'refuse' ? 'Rejeté' : 'En attente'}
+                    color={selectedAssignment.status === 'valide' ? 'success' : 
+                           selectedAssignment.status === 'refuse' ? 'error' : 'warning'}
                     sx={{
                       fontWeight: 500,
                       borderRadius: '8px'
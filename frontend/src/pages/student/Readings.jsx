@@ -133,11 +133,11 @@ const Readings = () => {
 
   const getStatusColor = (status) => {
     switch (status) {
-      case 'validated':
+      case 'valide':
         return 'success';
-      case 'pending':
+      case 'en_attente':
         return 'warning';
-      case 'rejected':
+      case 'refuse':
         return 'error';
       default:
         return 'default';
@@ -146,11 +146,11 @@ const Readings = () => {
 
   const getStatusLabel = (status) => {
     switch (status) {
-      case 'validated':
+      case 'valide':
         return 'Validé';
-      case 'pending':
+      case 'en_attente':
         return 'En attente';
-      case 'rejected':
+      case 'refuse':
         return 'Refusé';
       default:
         return status;